@@ -3,38 +3,29 @@ import sys
 import json
 import urllib.request
 import urllib.error
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 from urllib.parse import urljoin
 
+from cargo_filter import NameFilter
+from cargo_http import HttpClient, create_http_client
+
 
 class CargoDependencyFetcher:
 
-    def __init__(self):
+    def __init__(self, http_client: Optional[HttpClient] = None):
         self.base_url = "https://crates.io"
         self.api_url = "https://crates.io/api/v1/crates"
+        self.http_client = http_client or HttpClient()
 
-    def get_crate_data(self, package_name: str, version: str = "latest") -> Optional[Dict[str, Any]]:
+    def fetch_json(self, url: str, cache_key: str, not_found_message: str) -> Optional[Dict[str, Any]]:
         try:
-            url = f"{self.api_url}/{package_name}"
-
             print(f"Запрос данных из: {url}")
 
-            req = urllib.request.Request(
-                url,
-                headers={'User-Agent': 'DependencyGraphVisualizer/1.0'}
-            )
-
-            with urllib.request.urlopen(req, timeout=10) as response:
-                if response.status == 200:
-                    data = json.loads(response.read().decode('utf-8'))
-                    return data
-                else:
-                    print(f"Ошибка HTTP: {response.status}", file=sys.stderr)
-                    return None
+            return self.http_client.get_json(url, cache_key)
 
         except urllib.error.HTTPError as e:
             if e.code == 404:
-                print(f"Пакет '{package_name}' не найден", file=sys.stderr)
+                print(not_found_message, file=sys.stderr)
             else:
                 print(f"Ошибка HTTP при запросе пакета: {e.code}", file=sys.stderr)
             return None
@@ -48,23 +39,27 @@ class CargoDependencyFetcher:
             print(f"Неожиданная ошибка при получении данных: {e}", file=sys.stderr)
             return None
 
-    def find_version_data(self, crate_data: Dict[str, Any], target_version: str) -> Optional[Dict[str, Any]]:
-        try:
-            versions = crate_data.get('versions', [])
-
-            if target_version == "latest":
-                return versions[0] if versions else None
+    def get_crate_data(self, package_name: str) -> Optional[Dict[str, Any]]:
+        # include=default_version убирает из ответа историю всех релизов
+        return self.fetch_json(f"{self.api_url}/{package_name}?include=default_version",
+                               f"{package_name}@latest", f"Пакет '{package_name}' не найден")
 
-            for version_data in versions:
-                if version_data.get('num') == target_version:
-                    return version_data
+    def get_version_dependencies_data(self, package_name: str, version: str) -> Optional[Dict[str, Any]]:
+        # Только список зависимостей одной версии, без истории всех релизов
+        return self.fetch_json(f"{self.api_url}/{package_name}/{version}/dependencies",
+                               f"{package_name}@{version}",
+                               f"Версия '{version}' пакета '{package_name}' не найдена")
 
-            print(f"Версия '{target_version}' не найдена для пакета", file=sys.stderr)
+    def get_latest_version(self, package_name: str) -> Optional[str]:
+        crate_data = self.get_crate_data(package_name)
+        if not crate_data:
             return None
 
-        except Exception as e:
-            print(f"Ошибка при поиске версии: {e}", file=sys.stderr)
-            return None
+        crate = crate_data.get('crate') or {}
+        latest = crate.get('default_version') or crate.get('max_stable_version') or crate.get('max_version')
+        if not latest:
+            print(f"У пакета '{package_name}' нет опубликованных версий", file=sys.stderr)
+        return latest
 
     def extract_dependencies(self, version_data: Dict[str, Any]) -> List[Dict[str, str]]:
         dependencies = []
@@ -91,15 +86,16 @@ class CargoDependencyFetcher:
     def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
         print(f"Получение зависимостей для пакета: {package_name} (версия: {version})")
 
-        crate_data = self.get_crate_data(package_name)
-        if not crate_data:
-            return []
+        if version == "latest":
+            version = self.get_latest_version(package_name)
+            if not version:
+                return []
 
-        version_data = self.find_version_data(crate_data, version)
-        if not version_data:
+        dependencies_data = self.get_version_dependencies_data(package_name, version)
+        if not dependencies_data:
             return []
 
-        dependencies = self.extract_dependencies(version_data)
+        dependencies = self.extract_dependencies(dependencies_data)
         return dependencies
 
 
@@ -183,8 +179,39 @@ class DependencyGraphVisualizer:
         parser.add_argument(
             '--filter',
             type=str,
+            action='append',
             dest='filter_substring',
-            help='Подстрока для фильтрации пакетов'
+            help='Шаблон для фильтрации пакетов: подстрока, маска (glob:serde_*) '
+                 'или регулярное выражение (re:^tokio-); можно указать несколько раз'
+        )
+        parser.add_argument(
+            '--cache-dir',
+            type=str,
+            help='Каталог локального кэша ответов crates.io'
+        )
+        parser.add_argument(
+            '--cache-ttl',
+            type=int,
+            default=3600,
+            help='Время жизни записи кэша в секундах (по умолчанию: 3600)'
+        )
+        parser.add_argument(
+            '--cache-size',
+            type=int,
+            default=256,
+            help='Наибольший размер кэша в мегабайтах, сверх него удаляются '
+                 'давно использованные записи (по умолчанию: 256)'
+        )
+        parser.add_argument(
+            '--offline',
+            action='store_true',
+            help='Работать только с локальным кэшем, без обращений к сети'
+        )
+        parser.add_argument(
+            '--pool-size',
+            type=int,
+            default=4,
+            help='Число keep-alive соединений на хост (по умолчанию: 4)'
         )
 
         return parser.parse_args()
@@ -205,9 +232,22 @@ class DependencyGraphVisualizer:
                 if not all(c.isalnum() or c in '.-_' for c in args.version):
                     raise ValueError("Версия пакета содержит недопустимые символы")
 
-            if args.filter_substring:
-                if len(args.filter_substring.strip()) < 2:
+            for filter_substring in args.filter_substring or []:
+                if len(filter_substring.strip()) < 2:
                     raise ValueError("Подстрока для фильтрации должна содержать хотя бы 2 символа")
+            NameFilter.from_value(args.filter_substring)
+
+            if args.offline and not args.cache_dir:
+                raise ValueError("Режим --offline требует указания --cache-dir")
+
+            if args.cache_ttl < 0:
+                raise ValueError("Время жизни кэша не может быть отрицательным")
+
+            if args.cache_size < 1:
+                raise ValueError("Размер кэша должен быть положительным числом мегабайт")
+
+            if args.pool_size < 1:
+                raise ValueError("Размер пула соединений должен быть положительным числом")
 
             return True
 
@@ -225,7 +265,10 @@ class DependencyGraphVisualizer:
             ("Файл репозитория", args.file_repo or "Не указан"),
             ("Режим тестирования", "Да" if args.test_mode else "Нет"),
             ("Версия пакета", args.version),
-            ("Фильтр пакетов", args.filter_substring or "Не указан")
+            ("Фильтр пакетов", ", ".join(args.filter_substring or []) or "Не указан"),
+            ("Каталог кэша", args.cache_dir or "Не указан"),
+            ("Режим offline", "Да" if args.offline else "Нет"),
+            ("Соединений на хост", args.pool_size)
         ]
 
         for key, value in config_items:
@@ -233,16 +276,18 @@ class DependencyGraphVisualizer:
 
         print("=" * 50)
 
-    def display_dependencies(self, dependencies: List[Dict[str, str]], filter_substring: Optional[str] = None):
+    def display_dependencies(self, dependencies: List[Dict[str, str]],
+                             filter_substring: Union[None, str, List[str], NameFilter] = None):
         if not dependencies:
             print("Прямые зависимости не найдены")
             return
 
         filtered_deps = dependencies
-        if filter_substring:
+        name_filter = NameFilter.from_value(filter_substring)
+        if name_filter:
             filtered_deps = [
                 dep for dep in dependencies
-                if filter_substring.lower() in dep['name'].lower()
+                if name_filter.matches(dep['name'])
             ]
             print(f"Отфильтровано зависимостей: {len(filtered_deps)} (из {len(dependencies)})")
 
@@ -275,6 +320,10 @@ class DependencyGraphVisualizer:
             if args.test_mode:
                 dependencies = self.test_fetcher.get_dependencies(args.package, args.version)
             elif args.repository and "crates.io" in args.repository:
+                self.cargo_fetcher = CargoDependencyFetcher(
+                    create_http_client(args.cache_dir, args.offline, args.cache_ttl, args.pool_size,
+                                       max_size=args.cache_size * 1024 * 1024)
+                )
                 dependencies = self.cargo_fetcher.get_dependencies(args.package, args.version)
 
                 if not dependencies:
@@ -1,131 +1,1087 @@
 import argparse
+import hashlib
+import heapq
+import io
+import os
 import sys
 import json
+import threading
+import time
 import urllib.request
 import urllib.error
-from typing import Dict, List, Optional, Any, Set, Tuple
-from urllib.parse import urljoin
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple, IO, Iterable, Iterator, Union
+from urllib.parse import urljoin, urlsplit
+
+from cargo_export import CLUSTER_MODES, EXPORT_FORMATS, LAYOUT_FORMATS, export_graph, guess_format
+from cargo_filter import NameFilter
+from cargo_graphfile import GraphFile, is_graph_file
+from cargo_http import HttpClient, create_http_client
+from cargo_jsonstream import JsonFormatError, iter_repository, read_entry
+from cargo_profile import NO_HOOKS, Hooks, Profiler, install_hooks
+from cargo_semver import VersionResolver
+from cargo_server import GraphService, parse_address
+
+
+class AdjacencyView(Mapping):
+
+    # Представление графа в виде "имя -> список имен" поверх целочисленной смежности;
+    # scope ограничивает представление пакетами, посещенными при обходе одного корня,
+    # и фиксирует число их ребер: последующие обходы общего графа его не меняют
+    def __init__(self, owner: "DependencyGraph", scope: Optional[Set[int]] = None):
+        self.owner = owner
+        self.sizes: Optional[Dict[int, int]] = None
+        if scope is not None:
+            self.sizes = {package_id: len(edges) for package_id, edges in owner.adjacency.items()
+                          if package_id in scope}
+
+    def __getitem__(self, package: str) -> List[str]:
+        package_id = self.owner.ids.get(package)
+        if package_id is None or package_id not in self.owner.adjacency:
+            raise KeyError(package)
+        names = self.owner.names
+        edges = self.owner.adjacency[package_id]
+        if self.sizes is not None:
+            if package_id not in self.sizes:
+                raise KeyError(package)
+            edges = islice(edges, self.sizes[package_id])
+        return [names[dependency_id] for dependency_id in edges]
+
+    def __contains__(self, package: object) -> bool:
+        package_id = self.owner.ids.get(package)
+        if self.sizes is not None:
+            return package_id in self.sizes
+        return package_id in self.owner.adjacency
+
+    def __iter__(self) -> Iterator[str]:
+        names = self.owner.names
+        package_ids = self.owner.adjacency if self.sizes is None else self.sizes
+        return (names[package_id] for package_id in package_ids)
+
+    def __len__(self) -> int:
+        return len(self.owner.adjacency if self.sizes is None else self.sizes)
 
 
 class DependencyGraph:
 
+    LIST_EDGES_LIMIT = 16
+
     def __init__(self):
-        self.graph: Dict[str, List[str]] = {}
+        # Имена пакетов хранятся один раз, ребра - как целочисленные идентификаторы
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        # Идентификатор пакета -> зависимости в порядке добавления: короткий список,
+        # который при большом числе зависимостей заменяется на dict для проверки за O(1)
+        self.adjacency: Dict[int, Union[List[int], Dict[int, None]]] = {}
+        # Обратный индекс: идентификатор пакета -> пакеты, которые от него зависят
+        self.reverse: Dict[int, List[int]] = {}
+        self.graph: Mapping[str, List[str]] = AdjacencyView(self)
         self.visited: Set[str] = set()
-        self.recursion_stack: Set[str] = set()
         self.cycles: List[List[str]] = []
+        # Узел графа -> (имя пакета, выбранная версия) и имя пакета -> его узлы
+        self.node_versions: Dict[str, Tuple[str, str]] = {}
+        self.package_nodes: Dict[str, List[str]] = {}
+        # Компоненты сильной связности и кэш транзитивных замыканий по компонентам;
+        # сбрасываются при любом изменении ребер. Замыкание - битовое множество
+        # номеров компонент в целом числе: бит на компоненту, а не множество узлов
+        self.components: Optional[List[List[int]]] = None
+        self.component_of: Dict[int, int] = {}
+        self.discovery: Dict[int, int] = {}
+        self.closures: Dict[int, int] = {}
+        # Инструментирование обхода (--profile); по умолчанию вызовы ничего не делают
+        self.hooks: Hooks = NO_HOOKS
+        self.traversal_start = 0.0
+        self.filter_stats = [0.0, 0]
+        # Разрешение версий текущего обхода: его ошибки попадают в результат
+        self.resolver: Optional[VersionResolver] = None
+
+    def intern(self, package: str) -> int:
+        package_id = self.ids.get(package)
+        if package_id is None:
+            package_id = self.ids[package] = len(self.names)
+            self.names.append(sys.intern(package))
+        return package_id
 
     def add_dependency(self, package: str, dependency: str):
-        if package not in self.graph:
-            self.graph[package] = []
-        if dependency not in self.graph[package]:
-            self.graph[package].append(dependency)
+        package_id = self.intern(package)
+        dependency_id = self.intern(dependency)
+
+        edges = self.adjacency.get(package_id)
+        if edges is None:
+            self.adjacency[package_id] = [dependency_id]
+        elif dependency_id in edges:
+            return
+        elif type(edges) is dict:
+            edges[dependency_id] = None
+        elif len(edges) < self.LIST_EDGES_LIMIT:
+            edges.append(dependency_id)
+        else:
+            edges = self.adjacency[package_id] = dict.fromkeys(edges)
+            edges[dependency_id] = None
+
+        self.components = None
+        # Ребро новое, поэтому в обратном индексе повторов не бывает
+        dependents = self.reverse.get(dependency_id)
+        if dependents is None:
+            self.reverse[dependency_id] = [package_id]
+        else:
+            dependents.append(package_id)
+
+    def successors(self, package_id: int) -> Iterable[int]:
+        return self.adjacency.get(package_id, ())
+
+    def predecessors(self, package_id: int) -> Iterable[int]:
+        return self.reverse.get(package_id, ())
+
+    def reverse_dependencies(self, package: str) -> List[str]:
+        package_id = self.ids.get(package)
+        if package_id is None:
+            return []
+        return [self.names[parent] for parent in self.predecessors(package_id)]
+
+    def transitive_dependents(self, package: str) -> Set[str]:
+        # Все пакеты, от которых достижим данный: обход по обратному индексу
+        # затрагивает только найденные пакеты и их входящие ребра
+        package_id = self.ids.get(package)
+        if package_id is None:
+            return set()
+
+        seen: Set[int] = set()
+        stack = [package_id]
+        while stack:
+            for parent in self.predecessors(stack.pop()):
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+
+        return {self.names[member] for member in seen}
+
+    def bidirectional_path(self, sources: Iterable[int], targets: Iterable[int],
+                           banned_nodes: Set[int] = frozenset(),
+                           banned_edges: Set[Tuple[int, int]] = frozenset()) -> Optional[List[int]]:
+        # Поиск в ширину одновременно от начала по прямым ребрам и от цели по обратному
+        # индексу; на каждом шаге целиком раскрывается меньший из двух фронтов
+        forward: Dict[int, Tuple[Optional[int], int]] = {
+            node: (None, 0) for node in sources if node not in banned_nodes}
+        backward: Dict[int, Tuple[Optional[int], int]] = {
+            node: (None, 0) for node in targets if node not in banned_nodes}
+        meets = [node for node in forward if node in backward]
+        forward_frontier, backward_frontier = list(forward), list(backward)
+
+        while not meets and forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                next_frontier = []
+                for node in forward_frontier:
+                    depth = forward[node][1] + 1
+                    for child in self.successors(node):
+                        if child in forward or child in banned_nodes or (node, child) in banned_edges:
+                            continue
+                        forward[child] = (node, depth)
+                        if child in backward:
+                            meets.append(child)
+                        next_frontier.append(child)
+                forward_frontier = next_frontier
+            else:
+                next_frontier = []
+                for node in backward_frontier:
+                    depth = backward[node][1] + 1
+                    for parent in self.predecessors(node):
+                        if parent in backward or parent in banned_nodes or (parent, node) in banned_edges:
+                            continue
+                        backward[parent] = (node, depth)
+                        if parent in forward:
+                            meets.append(parent)
+                        next_frontier.append(parent)
+                backward_frontier = next_frontier
+
+        if not meets:
+            return None
 
-    def build_graph_dfs(self, start_package: str,
-                        dependency_fetcher: Any,
-                        version: str = "latest",
-                        exclude_filter: Optional[str] = None,
-                        max_depth: int = 10) -> Dict[str, Any]:
+        # Уровень раскрыт полностью, поэтому лучшая из встреч дает кратчайший путь
+        meet = min(meets, key=lambda node: forward[node][1] + backward[node][1])
+        path = [meet]
+        while forward[path[-1]][0] is not None:
+            path.append(forward[path[-1]][0])
+        path.reverse()
+        while backward[path[-1]][0] is not None:
+            path.append(backward[path[-1]][0])
+        return path
+
+    def k_shortest_paths(self, source: str, target: str, k: int = 1) -> List[List[str]]:
+        sources = [self.ids[node] for node in self.nodes_for(source)]
+        targets = {self.ids[node] for node in self.nodes_for(target)}
+        first = self.bidirectional_path(sources, targets) if sources and targets else None
+        if first is None:
+            return []
+
+        # Алгоритм Йена: очередной путь ищется как ответвление от уже найденных
+        paths = [first]
+        candidates: List[Tuple[int, int, List[int]]] = []
+        seen = {tuple(first)}
+
+        while len(paths) < k:
+            previous = paths[-1]
+            for i in range(len(previous) - 1):
+                root = previous[:i + 1]
+                banned_edges = {(path[i], path[i + 1]) for path in paths
+                                if len(path) > i + 1 and path[:i + 1] == root}
+                spur = self.bidirectional_path([root[-1]], targets, set(root[:-1]), banned_edges)
+                if spur is not None:
+                    candidate = root[:-1] + spur
+                    if tuple(candidate) not in seen:
+                        seen.add(tuple(candidate))
+                        heapq.heappush(candidates, (len(candidate), len(seen), candidate))
+
+            if not candidates:
+                break
+            paths.append(heapq.heappop(candidates)[2])
+
+        return [[self.names[member] for member in path] for path in paths]
+
+    def shortest_path(self, source: str, target: str) -> Optional[List[str]]:
+        paths = self.k_shortest_paths(source, target, 1)
+        return paths[0] if paths else None
+
+    def resolve_node(self, resolver: Optional[VersionResolver], package_name: str,
+                     requirement: str, fallback_version: str) -> Tuple[str, str, str]:
+        resolved = resolver.resolve(package_name, requirement) if resolver else None
+        if resolved is None:
+            return package_name, package_name, fallback_version
+
+        # Узел определяется парой (пакет, версия): разные версии одного пакета - разные узлы
+        node = f"{package_name}@{resolved}"
+        if node not in self.node_versions:
+            self.node_versions[node] = (package_name, resolved)
+            self.package_nodes.setdefault(package_name, []).append(node)
+        return node, package_name, resolved
+
+    def nodes_for(self, package: str) -> List[str]:
+        # Без указания версии имени пакета соответствуют все его версии, попавшие в граф
+        if package in self.ids:
+            return [package]
+        return sorted(node for node in self.package_nodes.get(package, ()) if node in self.ids)
+
+    def strong_components(self, roots: Iterable[int], successors: Callable[[int], Iterable[int]]
+                          ) -> Tuple[List[List[int]], Dict[int, int], Dict[int, int]]:
+        # Алгоритм Тарьяна без рекурсии за O(V+E); компоненты выдаются в обратном
+        # топологическом порядке: все достижимые из компоненты выданы раньше нее
+        index: Dict[int, int] = {}
+        low: Dict[int, int] = {}
+        on_stack: Set[int] = set()
+        component_stack: List[int] = []
+        components: List[List[int]] = []
+        component_of: Dict[int, int] = {}
+
+        for root in roots:
+            if root in index:
+                continue
+
+            index[root] = low[root] = len(index)
+            component_stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(successors(root)))]
+
+            while work:
+                node, neighbors = work[-1]
+                child = next(neighbors, None)
+
+                if child is not None:
+                    if child not in index:
+                        index[child] = low[child] = len(index)
+                        component_stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(successors(child))))
+                    elif child in on_stack:
+                        low[node] = min(low[node], index[child])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = component_stack.pop()
+                        on_stack.discard(member)
+                        component_of[member] = len(components)
+                        component.append(member)
+                        if member == node:
+                            break
+                    component.sort(key=index.__getitem__)
+                    components.append(component)
+
+        return components, component_of, index
+
+    def compute_components(self) -> List[List[int]]:
+        if self.components is not None:
+            return self.components
+
+        self.components, self.component_of, self.discovery = self.strong_components(
+            list(self.adjacency), self.successors)
+        self.closures = {}
+        return self.components
+
+    def find_cyclic_components(self, scope: Optional[Set[int]] = None) -> List[List[str]]:
+        successors = self.successors
+        if scope is None:
+            components, discovery = self.compute_components(), self.discovery
+        else:
+            # Учитываются только ребра пакетов, посещенных при обходе одного корня, в том
+            # числе при проверке петли: у непосещенного пакета ребра другого корня
+            def successors(node: int) -> Iterable[int]:
+                return self.successors(node) if node in scope else ()
+
+            components, _, discovery = self.strong_components(sorted(scope), successors)
+
+        # Каждая компонента с циклом выдается один раз, в порядке обнаружения
+        cyclic = [component for component in components
+                  if len(component) > 1 or component[0] in successors(component[0])]
+        cyclic.sort(key=lambda component: discovery[component[0]])
+        return [[self.names[member] for member in component] for component in cyclic]
+
+    def component_closure(self, component: int) -> int:
+        # Замыкание считается один раз на компоненту: все ее узлы имеют одно множество
+        # достижимых пакетов, поэтому циклы не требуют повторного обхода. Компоненты
+        # пронумерованы в обратном топологическом порядке, и замыкание - это объединение
+        # битов дочерних компонент и их уже посчитанных замыканий
+        stack = [component]
+        while stack:
+            current = stack[-1]
+            if current in self.closures:
+                stack.pop()
+                continue
+
+            children = {self.component_of[child] for member in self.components[current]
+                        for child in self.successors(member)}
+            pending = [child for child in children if child != current and child not in self.closures]
+            if pending:
+                stack.extend(pending)
+                continue
+
+            # Бит самой компоненты попадает в замыкание, только если она содержит цикл
+            closure = 0
+            for child in children:
+                closure |= 1 << child
+                if child != current:
+                    closure |= self.closures[child]
+
+            self.closures[current] = closure
+            stack.pop()
+
+        return self.closures[component]
+
+    def transitive_dependencies(self, package: str) -> Set[str]:
+        package_id = self.ids.get(package)
+        if package_id is None:
+            return set()
+
+        self.compute_components()
+        closure = self.component_closure(self.component_of[package_id])
+        bits = bin(closure)[:1:-1]
+        return {self.names[member] for component, bit in enumerate(bits) if bit == '1'
+                for member in self.components[component]}
+
+    def component_cycle(self, component: List[str]) -> List[str]:
+        # Кратчайший цикл через первый найденный узел компоненты (BFS внутри компоненты)
+        start = self.ids[component[0]]
+        members = {self.ids[member] for member in component}
+        parents: Dict[int, int] = {}
+        queue = [start]
+
+        for node in queue:
+            for child in self.successors(node):
+                if child == start:
+                    cycle = [node]
+                    while cycle[-1] != start:
+                        cycle.append(parents[cycle[-1]])
+                    return [self.names[member] for member in reversed(cycle)] + [component[0]]
+                if child in members and child not in parents:
+                    parents[child] = node
+                    queue.append(child)
+
+        return [component[0], component[0]]
+
+    def enumerate_cycles(self, limit: int, components: Optional[List[List[str]]] = None) -> List[List[str]]:
+        # Алгоритм Джонсона с ограничением числа найденных элементарных циклов
+        cycles: List[List[str]] = []
+        names = self.names
+
+        for component in components if components is not None else self.find_cyclic_components():
+            member_ids = [self.ids[member] for member in component]
+
+            for position, start in enumerate(member_ids):
+                allowed = set(member_ids[position:])
+
+                def neighbors(node: int) -> List[int]:
+                    return [child for child in reversed(list(self.successors(node))) if child in allowed]
+
+                path = [start]
+                blocked = {start}
+                closed: Set[int] = set()
+                blocked_by: Dict[int, Set[int]] = {}
+                stack = [(start, neighbors(start))]
+
+                while stack:
+                    node, children = stack[-1]
+                    if children:
+                        child = children.pop()
+                        if child == start:
+                            cycles.append([names[member] for member in path] + [names[start]])
+                            if len(cycles) >= limit:
+                                return cycles
+                            closed.update(path)
+                        elif child not in blocked:
+                            path.append(child)
+                            stack.append((child, neighbors(child)))
+                            closed.discard(child)
+                            blocked.add(child)
+                            continue
+
+                    if not children:
+                        if node in closed:
+                            unblock = [node]
+                            while unblock:
+                                member = unblock.pop()
+                                if member in blocked:
+                                    blocked.discard(member)
+                                    unblock.extend(blocked_by.pop(member, ()))
+                        else:
+                            for child in self.successors(node):
+                                if child in allowed:
+                                    blocked_by.setdefault(child, set()).add(node)
+                        stack.pop()
+                        path.pop()
+
+        return cycles
+
+    def save_snapshot(self, path: str, params: Dict[str, Any], snapshot_fetcher: "SnapshotFetcher"):
+        snapshot = {
+            'format': 1,
+            'params': params,
+        }
+        snapshot.update(snapshot_fetcher.snapshot_data())
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load_snapshot(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Ошибка загрузки снимка графа: {e}", file=sys.stderr)
+            return None
+
+        if not isinstance(snapshot, dict) or snapshot.get('format') != 1:
+            print("Неподдерживаемый формат снимка графа", file=sys.stderr)
+            return None
+        return snapshot
+
+    def prepare_traversal(self, start_package: str, dependency_fetcher: Any, version: str,
+                          exclude_filter: Union[None, str, List[str], NameFilter]):
+        # Версии разрешаются по требованиям только если источник знает список версий
+        resolver = VersionResolver(dependency_fetcher) if hasattr(dependency_fetcher, 'get_versions') else None
+        root_requirement = "*" if version == "latest" else f"={version}"
+        start = self.resolve_node(resolver, start_package, root_requirement, version)
+        self.resolver = resolver
+
+        # Шаблоны компилируются один раз, решение по каждому имени кэшируется
+        name_filter = NameFilter.from_value(exclude_filter)
+        is_excluded = name_filter.matches
+
+        if self.hooks.enabled:
+            matches = name_filter.matches
+            filter_stats = self.filter_stats
+
+            def is_excluded(dep_name: str) -> bool:
+                start_time = time.perf_counter()
+                verdict = matches(dep_name)
+                filter_stats[0] += time.perf_counter() - start_time
+                filter_stats[1] += 1
+                return verdict
+
+        def warm_versions(dep_name: str):
+            if not is_excluded(dep_name):
+                resolver.get_index(dep_name)
+
+        def child_target(dep: Dict[str, str]) -> Optional[Tuple[str, str, str]]:
+            dep_name = dep['name']
+            if is_excluded(dep_name):
+                return None
+            if resolver is None:
+                return dep_name, dep_name, "latest"
+            return self.resolve_node(resolver, dep_name, dep.get('version', '*'), "latest")
+
+        return start, child_target, warm_versions if resolver else None
+
+    def start_result(self) -> Dict[str, Any]:
         self.visited.clear()
-        self.recursion_stack.clear()
         self.cycles.clear()
+        self.traversal_start = time.perf_counter()
+        self.filter_stats = [0.0, 0]
 
-        result = {
+        return {
+            'errors': {},
             'graph': {},
             'cycles': [],
+            'cyclic_components': [],
+            'transitive_dependencies': [],
             'packages_count': 0,
             'max_depth': 0
         }
 
-        def dfs(current_package: str, depth: int = 0, path: List[str] = None) -> Set[str]:
-            if path is None:
-                path = []
+    def finish_result(self, result: Dict[str, Any], start_node: str, cycle_limit: int) -> Dict[str, Any]:
+        finish_start = time.perf_counter()
+        self.hooks.phase('обход графа', self.traversal_start, finish_start, root=start_node)
+        if self.filter_stats[1]:
+            self.hooks.total('фильтр исключения', *self.filter_stats)
+
+        if self.resolver is not None:
+            # Пакеты без списка версий вошли в граф без версии, под своим именем
+            for package_name, error in self.resolver.failures.items():
+                result['errors'].setdefault(package_name, f"список версий недоступен: {error}")
+
+        visited_ids = {self.ids[package] for package in self.visited if package in self.ids}
+        # Граф может содержать ребра других корней (пакетный режим) - тогда циклы
+        # ищутся только среди пакетов, посещенных при этом обходе
+        scope = None if all(package_id in visited_ids for package_id in self.adjacency) else visited_ids
+
+        # Циклы ищутся после обхода поиском компонент сильной связности
+        components = self.find_cyclic_components(scope)
+        if cycle_limit > 0:
+            self.cycles.extend(self.enumerate_cycles(cycle_limit, components))
+        else:
+            self.cycles.extend(self.component_cycle(component) for component in components)
+
+        # Результат каждого корня - отдельное представление с зафиксированными ребрами:
+        # обходы следующих корней дописывают ребра в общий граф, но не в него
+        result['graph'] = AdjacencyView(self, visited_ids)
+        if scope is None:
+            result['transitive_dependencies'] = sorted(self.transitive_dependencies(start_node))
+        else:
+            # Все ребра посещенных пакетов принадлежат этому обходу, поэтому замыкание корня -
+            # это объединение их зависимостей
+            result['transitive_dependencies'] = sorted(
+                {self.names[child] for package_id in scope for child in self.successors(package_id)})
+
+        result['cycles'] = list(self.cycles)
+        result['cyclic_components'] = components
+        result['packages_count'] = len(self.visited)
 
-            nonlocal result
-            result['max_depth'] = max(result['max_depth'], depth)
+        self.hooks.phase('циклы и замыкание', finish_start, time.perf_counter(), root=start_node)
+        return result
+
+    def build_graph_dfs(self, start_package: str,
+                        dependency_fetcher: Any,
+                        version: str = "latest",
+                        exclude_filter: Union[None, str, List[str], NameFilter] = None,
+                        max_depth: int = 10,
+                        jobs: int = 1,
+                        cycle_limit: int = 0) -> Dict[str, Any]:
+        result = self.start_result()
+        start, child_target, warm_versions = self.prepare_traversal(
+            start_package, dependency_fetcher, version, exclude_filter)
+
+        if jobs > 1:
+            # Сначала параллельно загружаем все уровни, затем DFS идет по кэшу
+            dependency_fetcher = ConcurrentDependencyFetcher(dependency_fetcher, jobs)
+            try:
+                dependency_fetcher.prefetch(start, child_target, max_depth, warm_versions)
+            finally:
+                dependency_fetcher.close()
 
-            if current_package in self.recursion_stack:
-                cycle_start = path.index(current_package)
-                cycle = path[cycle_start:] + [current_package]
-                if cycle not in self.cycles:
-                    self.cycles.append(cycle)
-                return set()
+        stack: List[Tuple[str, int, Iterator[Dict[str, str]]]] = []
+
+        def enter(current_package: str, package_name: str, package_version: str, depth: int):
+            result['max_depth'] = max(result['max_depth'], depth)
 
             if current_package in self.visited:
-                return set([current_package])
+                return
 
             self.visited.add(current_package)
-            self.recursion_stack.add(current_package)
-            path.append(current_package)
-
-            all_dependencies: Set[str] = set()
 
             try:
-                dependencies_data = dependency_fetcher.get_dependencies(current_package, version)
+                dependencies_data = dependency_fetcher.get_dependencies(package_name, package_version)
+            except Exception as e:
+                result['errors'][current_package] = str(e)
+                print(f"Ошибка при обработке пакета {current_package}: {e}", file=sys.stderr)
+                return
 
-                for dep in dependencies_data:
-                    dep_name = dep['name']
+            stack.append((current_package, depth, iter(dependencies_data)))
 
-                    if exclude_filter and exclude_filter.lower() in dep_name.lower():
-                        continue
+        enter(*start, 0)
 
-                    self.add_dependency(current_package, dep_name)
-                    all_dependencies.add(dep_name)
+        while stack:
+            current_package, depth, dependencies = stack[-1]
 
-                    if depth < max_depth:
-                        child_deps = dfs(dep_name, depth + 1, path.copy())
-                        all_dependencies.update(child_deps)
+            try:
+                dep = next(dependencies, None)
+                if dep is None:
+                    stack.pop()
+                    continue
+
+                target = child_target(dep)
+                if target is None:
+                    continue
+
+                self.add_dependency(current_package, target[0])
+
+                if depth < max_depth:
+                    enter(*target, depth + 1)
 
             except Exception as e:
+                result['errors'][current_package] = str(e)
                 print(f"Ошибка при обработке пакета {current_package}: {e}", file=sys.stderr)
+                stack.pop()
 
-            self.recursion_stack.remove(current_package)
-            path.pop()
+        return self.finish_result(result, start[0], cycle_limit)
 
-            return all_dependencies
+    def build_graph_bfs(self, start_package: str,
+                        dependency_fetcher: Any,
+                        version: str = "latest",
+                        exclude_filter: Union[None, str, List[str], NameFilter] = None,
+                        max_depth: int = 10,
+                        jobs: int = 1,
+                        cycle_limit: int = 0) -> Dict[str, Any]:
+        result = self.start_result()
+        result['node_depths'] = {}
+        start, child_target, warm_versions = self.prepare_traversal(
+            start_package, dependency_fetcher, version, exclude_filter)
+
+        # Каждый уровень загружается одной волной запросов
+        level_fetcher = ConcurrentDependencyFetcher(dependency_fetcher, jobs)
+        depths: Dict[str, int] = result['node_depths']
+        depths[start[0]] = 0
+        self.visited.add(start[0])
+        frontier = [start]
+        depth = 0
 
-        dfs(start_package)
+        try:
+            while frontier:
+                result['max_depth'] = depth
+                level_fetcher.fetch_level([(name, package_version) for _, name, package_version in frontier])
+
+                if warm_versions and depth < max_depth:
+                    names = [dep['name'] for _, name, package_version in frontier
+                             for dep in level_fetcher.results.get((name, package_version), [])]
+                    level_fetcher.map_parallel(warm_versions, list(dict.fromkeys(names)))
+
+                next_frontier = []
+                for current_package, name, package_version in frontier:
+                    try:
+                        for dep in level_fetcher.get_dependencies(name, package_version):
+                            target = child_target(dep)
+                            if target is None:
+                                continue
+
+                            self.add_dependency(current_package, target[0])
+
+                            # Первое появление узла в BFS дает его минимальную глубину
+                            if depth < max_depth and target[0] not in depths:
+                                depths[target[0]] = depth + 1
+                                self.visited.add(target[0])
+                                next_frontier.append(target)
+
+                    except Exception as e:
+                        result['errors'][current_package] = str(e)
+                        print(f"Ошибка при обработке пакета {current_package}: {e}", file=sys.stderr)
+
+                frontier = next_frontier
+                depth += 1
+        finally:
+            level_fetcher.close()
+
+        return self.finish_result(result, start[0], cycle_limit)
+
+    def build_graph_batch(self, start_packages: List[str],
+                          dependency_fetcher: Any,
+                          version: str = "latest",
+                          exclude_filter: Union[None, str, List[str], NameFilter] = None,
+                          max_depth: int = 10,
+                          jobs: int = 1,
+                          cycle_limit: int = 0,
+                          engine: str = "dfs") -> Dict[str, Dict[str, Any]]:
+        # Все корни строятся в одном графе поверх общего кэша ответов: каждый пакет
+        # загружается из источника один раз, общие поддеревья обходятся уже в памяти
+        shared_fetcher = dependency_fetcher
+        if not isinstance(dependency_fetcher, CachingDependencyFetcher):
+            shared_fetcher = CachingDependencyFetcher(dependency_fetcher)
+        name_filter = NameFilter.from_value(exclude_filter)
+        build_graph = self.build_graph_bfs if engine == 'bfs' else self.build_graph_dfs
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for start_package in dict.fromkeys(start_packages):
+            results[start_package] = build_graph(
+                start_package, shared_fetcher, version, name_filter, max_depth, jobs, cycle_limit)
+
+        return results
+
+
+class ConcurrentDependencyFetcher:
+
+    def __init__(self, fetcher: Any, jobs: int = 8):
+        self.fetcher = fetcher
+        self.jobs = jobs
+        self.results: Dict[Tuple[str, str], List[Dict[str, str]]] = {}
+        self.errors: Dict[Tuple[str, str], Exception] = {}
+        # Один пул потоков на весь обход, а не на каждый уровень
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    def map_parallel(self, func: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+        if self.jobs <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.jobs)
+        return list(self.executor.map(func, items))
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def _fetch(self, key: Tuple[str, str]) -> Tuple[Any, Optional[Exception]]:
+        try:
+            return self.fetcher.get_dependencies(*key), None
+        except Exception as e:
+            return [], e
 
-        result['graph'] = self.graph
-        result['cycles'] = self.cycles
-        result['packages_count'] = len(self.visited)
+    def fetch_level(self, keys: List[Tuple[str, str]]):
+        pending = [key for key in dict.fromkeys(keys)
+                   if key not in self.results and key not in self.errors]
 
-        return result
+        for key, (deps, error) in zip(pending, self.map_parallel(self._fetch, pending)):
+            if error is not None:
+                self.errors[key] = error
+            else:
+                self.results[key] = deps
+
+    def prefetch(self, start: Tuple[str, str, str],
+                 child_target: Callable[[Dict[str, str]], Optional[Tuple[str, str, str]]],
+                 max_depth: int = 10,
+                 warm_versions: Optional[Callable[[str], Any]] = None):
+        # Обход по уровням: время ограничено глубиной графа, а не числом пакетов
+        seen: Set[str] = {start[0]}
+        frontier = [start]
+        depth = 0
+
+        while frontier:
+            self.fetch_level([(name, version) for _, name, version in frontier])
+            if depth >= max_depth:
+                break
+
+            children = [dep for _, name, version in frontier
+                        for dep in self.results.get((name, version), [])]
+            if warm_versions:
+                # Списки версий дочерних пакетов тоже загружаем одной волной
+                self.map_parallel(warm_versions, list(dict.fromkeys(dep['name'] for dep in children)))
+
+            next_frontier = []
+            for dep in children:
+                target = child_target(dep)
+                if target and target[0] not in seen:
+                    seen.add(target[0])
+                    next_frontier.append(target)
+
+            frontier = next_frontier
+            depth += 1
 
+    def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
+        key = (package_name, version)
+        if key in self.errors:
+            raise self.errors[key]
+        if key not in self.results:
+            self.fetch_level([key])
+            return self.get_dependencies(package_name, version)
+        return self.results[key]
 
-class CargoDependencyFetcher:
 
-    def __init__(self):
-        self.api_url = "https://crates.io/api/v1/crates"
+class CachingDependencyFetcher:
 
-    def get_crate_data(self, package_name: str) -> Optional[Dict[str, Any]]:
-        try:
-            url = f"{self.api_url}/{package_name}"
+    # Общий кэш ответов источника для нескольких обходов (пакетный режим)
+    def __init__(self, fetcher: Any):
+        self.fetcher = fetcher
+        self.dependencies: Dict[Tuple[str, str], List[Dict[str, str]]] = {}
+        self.versions: Dict[str, List[str]] = {}
+        self.fetched = 0
+        self.hits = 0
 
-            req = urllib.request.Request(
-                url,
-                headers={'User-Agent': 'DependencyGraphVisualizer/1.0'}
-            )
+        # Список версий доступен, только если его умеет отдавать исходный источник
+        if hasattr(fetcher, 'get_versions'):
+            self.get_versions = self.get_cached_versions
 
-            with urllib.request.urlopen(req, timeout=10) as response:
-                if response.status == 200:
-                    return json.loads(response.read().decode('utf-8'))
-                else:
-                    return None
+    def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
+        key = (package_name, version)
+        dependencies = self.dependencies.get(key)
+        if dependencies is None:
+            dependencies = self.dependencies[key] = self.fetcher.get_dependencies(package_name, version)
+            self.fetched += 1
+        else:
+            self.hits += 1
+        return dependencies
 
-        except Exception:
-            return None
+    def get_cached_versions(self, package_name: str) -> List[str]:
+        versions = self.versions.get(package_name)
+        if versions is None:
+            versions = self.versions[package_name] = self.fetcher.get_versions(package_name)
+        return versions
+
+
+class InstrumentedFetcher:
+
+    # Замер каждого обращения к источнику: задержка, число зависимостей, ошибки
+    def __init__(self, fetcher: Any, hooks: Hooks):
+        self.fetcher = fetcher
+        self.hooks = hooks
+
+        # Список версий доступен, только если его умеет отдавать исходный источник
+        if hasattr(fetcher, 'get_versions'):
+            self.get_versions = self.get_timed_versions
 
     def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
-        crate_data = self.get_crate_data(package_name)
-        if not crate_data:
-            return []
+        start = time.perf_counter()
+        try:
+            dependencies = self.fetcher.get_dependencies(package_name, version)
+        except Exception as e:
+            self.hooks.fetch(package_name, version, start, time.perf_counter(), 0, e)
+            raise
+        self.hooks.fetch(package_name, version, start, time.perf_counter(), len(dependencies))
+        return dependencies
+
+    def get_timed_versions(self, package_name: str) -> List[str]:
+        start = time.perf_counter()
+        versions = self.fetcher.get_versions(package_name)
+        self.hooks.phase('список версий', start, time.perf_counter(), package=package_name,
+                         versions=len(versions))
+        return versions
+
+
+class SnapshotFetcher:
+
+    # Источник поверх сохраненного снимка: данные неизменившихся пакетов берутся из снимка,
+    # в репозиторий уходят только изменившиеся и новые пакеты
+    def __init__(self, fetcher: Any, snapshot: Optional[Dict[str, Any]] = None):
+        self.fetcher = fetcher
+        self.previous = snapshot or {}
+        self.changed: Set[str] = set()
+        self.dependencies: Dict[str, List[Dict[str, str]]] = {}
+        self.versions: Dict[str, List[str]] = {}
+        self.live_dependencies: Dict[str, List[Dict[str, str]]] = {}
+        self.live_versions: Dict[str, List[str]] = {}
+        # Счетчики списков зависимостей: загружено при обходе, перепроверено при поиске
+        # изменений (запрос к источнику все равно был) и взято из снимка без запроса
+        self.fetched = 0
+        self.revalidated = 0
+        self.reused = 0
+        # Пакет -> его записи в снимке: проверка пакета не просматривает все записи
+        self.previous_keys = self.keys_by_package(self.previous.get('dependencies', {}))
+
+        # Список версий доступен, только если его умеет отдавать исходный источник
+        if hasattr(fetcher, 'get_versions'):
+            self.get_versions = self.get_versions_from_snapshot
+
+    def record_key(self, package_name: str, version: str) -> str:
+        return f"{package_name}\t{version}"
+
+    def keys_by_package(self, dependencies: Dict[str, List[Dict[str, str]]]) -> Dict[str, List[str]]:
+        keys: Dict[str, List[str]] = {}
+        for key in dependencies:
+            keys.setdefault(key.split("\t", 1)[0], []).append(key)
+        return keys
+
+    def is_versioned(self) -> bool:
+        return hasattr(self.fetcher, 'get_versions')
+
+    def fingerprint(self, package_name: str, dependencies: Dict[str, List[Dict[str, str]]],
+                    versions: Dict[str, List[str]]) -> str:
+        # Опубликованные версии неизменны, поэтому у версионированных источников
+        # достаточно отпечатка списка версий, у остальных - самих зависимостей;
+        # dependencies содержит записи только этого пакета
+        if self.is_versioned():
+            data: Any = versions.get(package_name, [])
+        else:
+            data = [[key, dependencies[key]] for key in sorted(dependencies)]
+        return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def check_package(self, package_name: str):
+        if self.is_versioned():
+            live_versions = {package_name: self.fetcher.get_versions(package_name)}
+            self.live_versions.update(live_versions)
+            fingerprint = self.fingerprint(package_name, {}, live_versions)
+        else:
+            prefix_length = len(package_name) + 1
+            live = {key: self.fetcher.get_dependencies(package_name, key[prefix_length:])
+                    for key in self.previous_keys.get(package_name, [])}
+            self.live_dependencies.update(live)
+            fingerprint = self.fingerprint(package_name, live, {})
+
+        if fingerprint != self.previous.get('fingerprints', {}).get(package_name):
+            self.changed.add(package_name)
+
+    def detect_changes(self, jobs: int = 1) -> Set[str]:
+        packages = list(self.previous.get('fingerprints', {}))
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            list(pool.map(self.check_package, packages))
+        return self.changed
+
+    def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
+        key = self.record_key(package_name, version)
+        previous = self.previous.get('dependencies', {})
+
+        if key in self.live_dependencies:
+            # Уже получено при проверке изменений
+            dependencies = self.live_dependencies[key]
+            self.revalidated += 1
+        elif package_name not in self.changed and key in previous:
+            dependencies = previous[key]
+            self.reused += 1
+        else:
+            dependencies = self.fetcher.get_dependencies(package_name, version)
+            self.fetched += 1
+
+        self.dependencies[key] = dependencies
+        return dependencies
+
+    def get_versions_from_snapshot(self, package_name: str) -> List[str]:
+        previous = self.previous.get('versions', {})
+
+        if package_name in self.live_versions:
+            versions = self.live_versions[package_name]
+        elif package_name not in self.changed and package_name in previous:
+            versions = previous[package_name]
+        else:
+            versions = self.fetcher.get_versions(package_name)
+
+        self.versions[package_name] = versions
+        return versions
+
+    def snapshot_data(self) -> Dict[str, Any]:
+        keys = self.keys_by_package(self.dependencies)
+        packages = set(self.versions) | set(keys)
+        return {
+            'dependencies': self.dependencies,
+            'versions': self.versions,
+            'fingerprints': {
+                package_name: self.fingerprint(
+                    package_name, {key: self.dependencies[key] for key in keys.get(package_name, [])},
+                    self.versions)
+                for package_name in sorted(packages)
+            }
+        }
 
+
+class CargoDependencyFetcher:
+
+    def __init__(self, http_client: Optional[HttpClient] = None,
+                 api_url: str = "https://crates.io/api/v1/crates"):
+        self.api_url = api_url.rstrip('/')
+        self.http_client = http_client or HttpClient()
+        # Имя пакета -> номер последней версии
+        self.latest_versions: Dict[str, Optional[str]] = {}
+        # Имя пакета -> таблица "номер версии -> запись о версии"
+        self.version_indexes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Имя пакета -> ошибка загрузки его данных: повторы уже исчерпаны планировщиком
+        # запросов, поэтому до очистки кэша пакет не запрашивается снова
+        self.failures: Dict[str, Exception] = {}
+
+    def clear_memory_cache(self):
+        self.latest_versions.clear()
+        self.version_indexes.clear()
+        self.failures.clear()
+
+    def get_crate_data(self, package_name: str, all_versions: bool = False) -> Optional[Dict[str, Any]]:
+        # None - только для отсутствующего пакета; 429 после всех повторов, таймауты
+        # и прочие сбои передаются выше и попадают в ошибки обхода, а не в пустой список
+        try:
+            if all_versions:
+                # Полный документ со всеми релизами нужен только для разрешения требований
+                return self.http_client.get_json(f"{self.api_url}/{package_name}", package_name)
+
+            # include=default_version убирает из ответа историю всех релизов
+            url = f"{self.api_url}/{package_name}?include=default_version"
+            return self.http_client.get_json(url, f"{package_name}@latest")
+
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def get_version_dependencies_data(self, package_name: str, version: str) -> Optional[Dict[str, Any]]:
         try:
+            url = f"{self.api_url}/{package_name}/{version}/dependencies"
+            return self.http_client.get_json(url, f"{package_name}@{version}")
+
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def get_version_index(self, package_name: str) -> Dict[str, Dict[str, Any]]:
+        if package_name not in self.version_indexes:
+            failure = self.failures.get(package_name)
+            if failure is not None:
+                raise failure
+            try:
+                crate_data = self.get_crate_data(package_name, all_versions=True) or {}
+            except Exception as e:
+                self.failures[package_name] = e
+                raise
             versions = crate_data.get('versions', [])
-            version_data = versions[0] if versions else {}
 
-            deps = version_data.get('dependencies', [])
+            index = {}
+            for version_data in versions:
+                index.setdefault(version_data.get('num'), version_data)
+            if versions:
+                index['latest'] = versions[0]
+
+            self.version_indexes[package_name] = index
+        return self.version_indexes[package_name]
+
+    def get_latest_version(self, package_name: str) -> Optional[str]:
+        if package_name not in self.latest_versions:
+            latest = self.version_indexes.get(package_name, {}).get('latest')
+            if latest:
+                # Полный документ уже загружен при разрешении требований
+                self.latest_versions[package_name] = latest.get('num')
+            else:
+                failure = self.failures.get(package_name)
+                if failure is not None:
+                    raise failure
+                try:
+                    crate = (self.get_crate_data(package_name) or {}).get('crate') or {}
+                except Exception as e:
+                    self.failures[package_name] = e
+                    raise
+                self.latest_versions[package_name] = (crate.get('default_version') or
+                                                      crate.get('max_stable_version') or
+                                                      crate.get('max_version'))
+        return self.latest_versions[package_name]
+
+    def get_versions(self, package_name: str) -> List[str]:
+        return [num for num, version_data in self.get_version_index(package_name).items()
+                if num != "latest" and not version_data.get('yanked')]
+
+    def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
+        if version == "latest":
+            version = self.get_latest_version(package_name)
+            if version is None:
+                return []
+
+        dependencies_data = self.get_version_dependencies_data(package_name, version)
+        if dependencies_data is None:
+            raise ValueError(f"Версия '{version}' пакета '{package_name}' не найдена")
+
+        try:
+            deps = dependencies_data.get('dependencies', [])
             dependencies = []
 
             for dep in deps:
@@ -144,32 +1100,190 @@ class CargoDependencyFetcher:
             return []
 
 
+class SparseIndexFetcher:
+
+    def __init__(self, index_url: str = "https://index.crates.io", http_client: Optional[HttpClient] = None):
+        if index_url.startswith('sparse+'):
+            index_url = index_url[len('sparse+'):]
+        self.index_url = index_url.rstrip('/')
+        self.http_client = http_client or HttpClient()
+        # Последние загруженные файлы индекса: за выбором версии сразу следует чтение зависимостей
+        self.recent_bodies: "OrderedDict[str, bytes]" = OrderedDict()
+        self.recent_limit = 64
+        # Пакет -> ошибка загрузки файла индекса (после всех повторов) до очистки кэша
+        self.failures: Dict[str, Exception] = {}
+        self.hooks: Hooks = NO_HOOKS
+
+        # Локальное зеркало индекса: путь к каталогу или file:// URL
+        self.local_path: Optional[str] = None
+        if self.index_url.startswith('file://'):
+            self.local_path = self.index_url[len('file://'):]
+        elif not self.index_url.startswith(('http://', 'https://')):
+            self.local_path = self.index_url
+
+    def index_path(self, package_name: str) -> str:
+        name = package_name.lower()
+        if len(name) <= 2:
+            return f"{len(name)}/{name}"
+        if len(name) == 3:
+            return f"3/{name[0]}/{name}"
+        return f"{name[0:2]}/{name[2:4]}/{name}"
+
+    def clear_memory_cache(self):
+        self.recent_bodies.clear()
+        self.failures.clear()
+
+    def is_missing(self, error: Exception) -> bool:
+        # Пакета нет в индексе - пустой результат; остальные сбои передаются выше
+        return isinstance(error, FileNotFoundError) or error.code in (403, 404, 410)
+
+    def open_index(self, package_name: str) -> IO[bytes]:
+        if self.local_path is not None:
+            return open(os.path.join(self.local_path, self.index_path(package_name)), 'rb')
+
+        body = self.recent_bodies.get(package_name)
+        if body is None:
+            failure = self.failures.get(package_name)
+            if failure is not None:
+                raise failure
+            url = f"{self.index_url}/{self.index_path(package_name)}"
+            try:
+                body = self.http_client.get(url, f"{package_name.lower()}.index")
+            except Exception as e:
+                self.failures[package_name] = e
+                raise
+            self.recent_bodies[package_name] = body
+            if len(self.recent_bodies) > self.recent_limit:
+                self.recent_bodies.popitem(last=False)
+        return io.BytesIO(body)
+
+    def get_versions(self, package_name: str) -> List[str]:
+        versions = []
+        try:
+            with self.open_index(package_name) as lines:
+                start = time.perf_counter()
+                size = 0
+                for line in lines:
+                    size += len(line)
+                    line = line.strip()
+                    if line:
+                        record = json.loads(line)
+                        if not record.get('yanked'):
+                            versions.append(record.get('vers', ''))
+                self.hooks.decode(f"{package_name}.index", start, time.perf_counter(), size)
+        except (FileNotFoundError, urllib.error.HTTPError) as e:
+            if self.is_missing(e):
+                return []
+            raise
+        return versions
+
+    def find_version_record(self, package_name: str, version: str = "latest") -> Optional[Dict[str, Any]]:
+        latest = None
+        last = None
+
+        try:
+            with self.open_index(package_name) as lines:
+                start = time.perf_counter()
+                size = 0
+                # Одна строка - одна версия; разбор прекращается на найденной версии
+                for line in lines:
+                    size += len(line)
+                    line = line.strip()
+                    if not line:
+                        continue
+
+                    record = json.loads(line)
+                    if record.get('vers') == version:
+                        self.hooks.decode(f"{package_name}.index", start, time.perf_counter(), size)
+                        return record
+
+                    last = record
+                    if not record.get('yanked'):
+                        latest = record
+                self.hooks.decode(f"{package_name}.index", start, time.perf_counter(), size)
+
+        except (FileNotFoundError, urllib.error.HTTPError) as e:
+            if self.is_missing(e):
+                return None
+            raise
+
+        if version != "latest":
+            raise ValueError(f"Версия '{version}' пакета '{package_name}' не найдена")
+        return latest or last
+
+    def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
+        record = self.find_version_record(package_name, version)
+        if not record:
+            return []
+
+        dependencies = []
+        for dep in record.get('deps', []):
+            # При переименовании зависимости настоящее имя пакета лежит в 'package'
+            dep_name = dep.get('package') or dep.get('name', '')
+            if dep_name:
+                dependencies.append({
+                    'name': dep_name,
+                    'version': dep.get('req', '*'),
+                    'kind': dep.get('kind') or 'normal'
+                })
+
+        return dependencies
+
+
 class TestRepositoryFetcher:
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, lazy: bool = False):
         self.file_path = file_path
+        self.lazy = lazy
         self.repository_data: Dict[str, List[str]] = {}
+        # Ленивая загрузка: имя пакета -> (смещение в файле, формат {"packages": [...]})
+        self.offsets: Dict[str, Tuple[int, bool]] = {}
+        self.lazy_file: Optional[IO[bytes]] = None
+        self.lock = threading.Lock()
         self.load_repository()
 
     def load_repository(self):
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            if isinstance(data, dict):
-                if 'packages' in data:
-                    for pkg_info in data['packages']:
-                        pkg_name = pkg_info['name']
-                        dependencies = pkg_info.get('dependencies', [])
-                        self.repository_data[pkg_name] = dependencies
-                else:
-                    self.repository_data = data
-
-            print(f"Загружен тестовый репозиторий: {len(self.repository_data)} пакетов")
-
-        except Exception as e:
-            print(f"Ошибка загрузки тестового репозитория: {e}", file=sys.stderr)
+            stream = open(self.file_path, 'rb')
+        except FileNotFoundError:
+            # Индекс смещений имеет смысл только для настоящего файла
+            if self.lazy:
+                raise ValueError(f"Файл тестового репозитория не найден: {self.file_path}") from None
+            print(f"Файл тестового репозитория не найден: {self.file_path}", file=sys.stderr)
             self.repository_data = self.create_sample_repository()
+            return
+
+        # Пакеты читаются потоково по одному; ошибка формата (JsonFormatError) не подменяется
+        # примерным репозиторием, а сообщается с указанием строки и столбца
+        if self.lazy:
+            for package_name, _, offset, packaged in iter_repository(stream):
+                self.offsets[package_name] = (offset, packaged)
+            self.lazy_file = stream
+            print(f"Проиндексирован тестовый репозиторий: {len(self.offsets)} пакетов "
+                  f"(зависимости загружаются по требованию)")
+            return
+
+        with stream:
+            for package_name, dependencies, _, _ in iter_repository(stream):
+                self.repository_data[package_name] = dependencies
+
+        print(f"Загружен тестовый репозиторий: {len(self.repository_data)} пакетов")
+
+    def package_dependencies(self, package_name: str) -> List[str]:
+        dependencies = self.repository_data.get(package_name)
+        if dependencies is not None or package_name not in self.offsets:
+            return dependencies or []
+
+        with self.lock:
+            offset, packaged = self.offsets[package_name]
+            dependencies = read_entry(self.lazy_file, package_name, offset, packaged)
+            self.repository_data[package_name] = dependencies
+        return dependencies
+
+    def close(self):
+        if self.lazy_file is not None:
+            self.lazy_file.close()
+            self.lazy_file = None
 
     def create_sample_repository(self) -> Dict[str, List[str]]:
         print("Создан примерный тестовый репозиторий")
@@ -201,17 +1315,33 @@ class TestRepositoryFetcher:
     def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
         dependencies = []
 
-        if package_name in self.repository_data:
-            for dep_name in self.repository_data[package_name]:
-                dependencies.append({
-                    'name': dep_name,
-                    'version': '1.0',
-                    'kind': 'normal'
-                })
+        for dep_name in self.package_dependencies(package_name):
+            dependencies.append({
+                'name': dep_name,
+                'version': '1.0',
+                'kind': 'normal'
+            })
 
         return dependencies
 
 
+class BinaryRepositoryFetcher:
+
+    # Тестовый репозиторий в бинарном формате: файл отображается в память,
+    # зависимости читаются по запросу без разбора всего репозитория
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.graph_file = GraphFile(file_path)
+        print(f"Загружен бинарный тестовый репозиторий: {len(self.graph_file)} пакетов")
+
+    def close(self):
+        self.graph_file.close()
+
+    def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
+        return [{'name': dep_name, 'version': '1.0', 'kind': 'normal'}
+                for dep_name in self.graph_file.dependencies(package_name)]
+
+
 class TestDependencyFetcher:
 
     def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
@@ -254,6 +1384,8 @@ class DependencyGraphVisualizer:
         self.cargo_fetcher = CargoDependencyFetcher()
         self.test_fetcher = TestDependencyFetcher()
         self.graph_analyzer = DependencyGraph()
+        # Источник данных текущего запуска; файлы репозитория закрываются по завершении
+        self.source: Any = None
 
     def parse_arguments(self) -> argparse.Namespace:
         parser = argparse.ArgumentParser(
@@ -261,18 +1393,30 @@ class DependencyGraphVisualizer:
             formatter_class=argparse.RawDescriptionHelpFormatter,
         )
 
-        parser.add_argument(
+        package_group = parser.add_mutually_exclusive_group(required=True)
+        package_group.add_argument(
             '--package',
             type=str,
-            required=True,
-            help='Имя анализируемого пакета (обязательно)'
+            help='Имя анализируемого пакета'
+        )
+        package_group.add_argument(
+            '--packages',
+            type=str,
+            nargs='+',
+            help='Несколько анализируемых пакетов: граф строится один раз для всех корней'
+        )
+        package_group.add_argument(
+            '--packages-file',
+            type=str,
+            help='Файл со списком анализируемых пакетов (по одному имени в строке, # - комментарий)'
         )
 
         source_group = parser.add_mutually_exclusive_group()
         source_group.add_argument(
             '--repository',
             type=str,
-            help='URL-адрес репозитория пакетов (только https://crates.io)'
+            help='URL-адрес репозитория пакетов (https://crates.io), '
+                 'sparse-индекса (sparse+https://index.crates.io) или путь к зеркалу индекса'
         )
         source_group.add_argument(
             '--file-repo',
@@ -295,8 +1439,70 @@ class DependencyGraphVisualizer:
         parser.add_argument(
             '--exclude',
             type=str,
+            action='append',
             dest='exclude_filter',
-            help='Подстрока для исключения пакетов из анализа'
+            help='Шаблон для исключения пакетов из анализа: подстрока, маска (glob:serde_*) '
+                 'или регулярное выражение (re:^tokio-); можно указать несколько раз'
+        )
+        parser.add_argument(
+            '--impact',
+            type=str,
+            action='append',
+            metavar='CRATE',
+            help='Показать пакеты, прямо и транзитивно зависящие от CRATE; можно указать несколько раз'
+        )
+        parser.add_argument(
+            '--path',
+            type=str,
+            action='append',
+            dest='path_targets',
+            metavar='CRATE',
+            help='Показать кратчайшую цепочку зависимостей от корневого пакета до CRATE; '
+                 'можно указать несколько раз'
+        )
+        parser.add_argument(
+            '--top-paths',
+            type=int,
+            default=1,
+            help='Число кратчайших цепочек для --path (по умолчанию: 1)'
+        )
+        parser.add_argument(
+            '--export',
+            type=str,
+            metavar='FILE',
+            help='Выгрузить граф в файл; формат определяется по расширению '
+                 '(.dot/.gv, .mmd, .puml, .svg, .html) или задается --export-format'
+        )
+        parser.add_argument(
+            '--export-format',
+            choices=EXPORT_FORMATS,
+            help='Формат выгрузки графа: dot (Graphviz), mermaid, plantuml или готовое изображение '
+                 'svg/html с собственной послойной укладкой'
+        )
+        parser.add_argument(
+            '--layout-iterations',
+            type=int,
+            default=8,
+            help='Число проходов уменьшения пересечений ребер для svg/html (по умолчанию: 8)'
+        )
+        parser.add_argument(
+            '--cluster',
+            choices=CLUSTER_MODES,
+            default='none',
+            help='Группировка узлов при выгрузке: none, scc (компоненты с циклами) '
+                 'или prefix (семейство пакета, tokio-* -> tokio) (по умолчанию: none)'
+        )
+        parser.add_argument(
+            '--no-cycle-highlight',
+            action='store_true',
+            help='Не выделять цветом циклические зависимости при выгрузке'
+        )
+        parser.add_argument(
+            '--profile',
+            type=str,
+            metavar='TRACE.json',
+            help='Замерить загрузку, разбор и обход: вывести сводку и сохранить трассу '
+                 'в формате Chrome trace event (chrome://tracing, speedscope)'
         )
         parser.add_argument(
             '--max-depth',
@@ -304,16 +1510,125 @@ class DependencyGraphVisualizer:
             default=10,
             help='Максимальная глубина обхода графа (по умолчанию: 10)'
         )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=1,
+            help='Число параллельных запросов к репозиторию (по умолчанию: 1)'
+        )
+        parser.add_argument(
+            '--engine',
+            choices=['dfs', 'bfs'],
+            default='dfs',
+            help='Алгоритм построения графа: dfs или bfs по уровням (по умолчанию: dfs)'
+        )
+        parser.add_argument(
+            '--lazy-load',
+            action='store_true',
+            help='Загружать зависимости из файла репозитория только для достижимых пакетов'
+        )
+        parser.add_argument(
+            '--snapshot',
+            type=str,
+            help='Файл снимка графа: сохраняется после построения'
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Обновить граф по снимку: загружаются только изменившиеся пакеты'
+        )
+        parser.add_argument(
+            '--cycle-limit',
+            type=int,
+            default=0,
+            help='Перечислить до N элементарных циклов (по умолчанию: 0 - по одному циклу на компоненту)'
+        )
+        parser.add_argument(
+            '--cache-dir',
+            type=str,
+            help='Каталог локального кэша ответов crates.io'
+        )
+        parser.add_argument(
+            '--cache-ttl',
+            type=int,
+            default=3600,
+            help='Время жизни записи кэша в секундах (по умолчанию: 3600)'
+        )
+        parser.add_argument(
+            '--cache-size',
+            type=int,
+            default=256,
+            help='Наибольший размер кэша в мегабайтах, сверх него удаляются '
+                 'давно использованные записи (по умолчанию: 256)'
+        )
+        parser.add_argument(
+            '--offline',
+            action='store_true',
+            help='Работать только с локальным кэшем, без обращений к сети'
+        )
+        parser.add_argument(
+            '--pool-size',
+            type=int,
+            default=4,
+            help='Число keep-alive соединений на хост (по умолчанию: 4)'
+        )
+        parser.add_argument(
+            '--rate-limit',
+            type=float,
+            default=0.0,
+            help='Не более N запросов в секунду к реестру (по умолчанию: без ограничения)'
+        )
+        parser.add_argument(
+            '--retries',
+            type=int,
+            default=4,
+            help='Повторов запроса при 429, 5xx и обрыве соединения (по умолчанию: 4)'
+        )
+        parser.add_argument(
+            '--serve',
+            type=str,
+            metavar='[HOST:]PORT',
+            help='Запустить локальный сервер запросов к графу вместо однократного вывода'
+        )
+        parser.add_argument(
+            '--refresh-interval',
+            type=int,
+            default=0,
+            help='Период фонового обновления графа сервера в секундах (по умолчанию: 0 - только по /refresh)'
+        )
 
         return parser.parse_args()
 
+    def read_packages_file(self, path: str) -> List[str]:
+        packages = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    packages.append(line)
+        return packages
+
+    def root_packages(self, args: argparse.Namespace) -> List[str]:
+        if args.packages_file:
+            packages = self.read_packages_file(args.packages_file)
+        elif args.packages:
+            packages = args.packages
+        else:
+            packages = [args.package]
+        return list(dict.fromkeys(package.strip() for package in packages))
+
     def validate_arguments(self, args: argparse.Namespace) -> bool:
         try:
-            if not args.package or not args.package.strip():
-                raise ValueError("Имя пакета не может быть пустым")
+            try:
+                args.roots = self.root_packages(args)
+            except OSError as e:
+                raise ValueError(f"Не удалось прочитать список пакетов: {e}")
 
-            if len(args.package.strip()) < 1:
-                raise ValueError("Имя пакета должно содержать хотя бы 1 символ")
+            if not args.roots:
+                raise ValueError("Список анализируемых пакетов пуст")
+
+            if any(not package for package in args.roots):
+                raise ValueError("Имя пакета не может быть пустым")
 
             if args.file_repo and not args.test_mode:
                 raise ValueError("Файловый репозиторий требует включения --test-mode")
@@ -322,9 +1637,63 @@ class DependencyGraphVisualizer:
                 if not args.test_mode:
                     raise ValueError("Необходимо указать источник данных или использовать --test-mode")
 
+            NameFilter.from_value(args.exclude_filter)
+
             if args.max_depth < 1:
                 raise ValueError("Максимальная глубина должна быть положительным числом")
 
+            if args.jobs < 1:
+                raise ValueError("Число параллельных запросов должно быть положительным числом")
+
+            if args.lazy_load and not args.file_repo:
+                raise ValueError("Режим --lazy-load требует указания --file-repo")
+
+            if args.lazy_load and is_graph_file(args.file_repo):
+                # Бинарный файл графа и так читается по требованию через отображение в память
+                raise ValueError("Режим --lazy-load применяется только к JSON-репозиторию, "
+                                 "бинарный файл графа всегда читается по требованию")
+
+            if args.incremental and not args.snapshot:
+                raise ValueError("Режим --incremental требует указания --snapshot")
+
+            if args.cycle_limit < 0:
+                raise ValueError("Ограничение числа циклов не может быть отрицательным")
+
+            if args.offline and not args.cache_dir:
+                raise ValueError("Режим --offline требует указания --cache-dir")
+
+            if args.cache_ttl < 0:
+                raise ValueError("Время жизни кэша не может быть отрицательным")
+
+            if args.cache_size < 1:
+                raise ValueError("Размер кэша должен быть положительным числом мегабайт")
+
+            if args.pool_size < 1:
+                raise ValueError("Размер пула соединений должен быть положительным числом")
+
+            if args.rate_limit < 0 or args.retries < 0:
+                raise ValueError("Ограничение частоты запросов и число повторов не могут быть отрицательными")
+
+            if args.serve:
+                parse_address(args.serve)
+                if args.snapshot or args.profile:
+                    raise ValueError("Режим --serve не поддерживает --snapshot и --profile")
+
+            if args.layout_iterations < 0:
+                raise ValueError("Число проходов укладки не может быть отрицательным")
+
+            if args.export:
+                export_format = args.export_format or guess_format(args.export)
+                if export_format in LAYOUT_FORMATS and (args.cluster != 'none' or args.no_cycle_highlight):
+                    raise ValueError("Параметры --cluster и --no-cycle-highlight не применяются "
+                                     "к выгрузке svg/html")
+
+            if args.top_paths < 1:
+                raise ValueError("Число цепочек для --path должно быть положительным числом")
+
+            if args.refresh_interval < 0:
+                raise ValueError("Период обновления не может быть отрицательным")
+
             return True
 
         except ValueError as e:
@@ -336,13 +1705,29 @@ class DependencyGraphVisualizer:
         print("=" * 50)
 
         config_items = [
-            ("Имя пакета", args.package),
+            ("Имя пакета", self.describe_roots(args.roots)),
             ("URL репозитория", args.repository or "Не указан"),
             ("Файл репозитория", args.file_repo or "Не указан"),
             ("Режим тестирования", "Да" if args.test_mode else "Нет"),
             ("Версия пакета", args.version),
-            ("Фильтр исключения", args.exclude_filter or "Не указан"),
-            ("Максимальная глубина", args.max_depth)
+            ("Фильтр исключения", ", ".join(args.exclude_filter or []) or "Не указан"),
+            ("Анализ влияния", ", ".join(args.impact or []) or "Не указан"),
+            ("Поиск цепочек до", ", ".join(args.path_targets or []) or "Не указан"),
+            ("Выгрузка графа", args.export or "Не указана"),
+            ("Файл профиля", args.profile or "Не указан"),
+            ("Максимальная глубина", args.max_depth),
+            ("Алгоритм обхода", args.engine.upper()),
+            ("Параллельные запросы", args.jobs),
+            ("Ленивая загрузка", "Да" if args.lazy_load else "Нет"),
+            ("Файл снимка", args.snapshot or "Не указан"),
+            ("Инкрементальный режим", "Да" if args.incremental else "Нет"),
+            ("Ограничение циклов", args.cycle_limit or "Один цикл на компоненту"),
+            ("Каталог кэша", args.cache_dir or "Не указан"),
+            ("Режим offline", "Да" if args.offline else "Нет"),
+            ("Соединений на хост", args.pool_size),
+            ("Запросов в секунду", args.rate_limit or "Без ограничения"),
+            ("Повторов запроса", args.retries),
+            ("Сервер запросов", args.serve or "Не запущен")
         ]
 
         for key, value in config_items:
@@ -350,6 +1735,63 @@ class DependencyGraphVisualizer:
 
         print("=" * 50)
 
+    def describe_roots(self, roots: List[str], limit: int = 5) -> str:
+        if len(roots) == 1:
+            return roots[0]
+        shown = ", ".join(roots[:limit])
+        if len(roots) > limit:
+            shown += f", ... (еще {len(roots) - limit})"
+        return f"{len(roots)} пакетов: {shown}"
+
+    def display_batch_summary(self, results: Dict[str, Dict[str, Any]], shared_fetcher: CachingDependencyFetcher):
+        print(f"\nСводка пакетного режима:")
+        print("=" * 60)
+        print(f"Корневых пакетов: {len(results)}")
+        print(f"Узлов в общем графе: {len(self.graph_analyzer.names)}")
+        print(f"Сумма пакетов по корням: {sum(result['packages_count'] for result in results.values())}")
+        print(f"Запросов к источнику: {shared_fetcher.fetched}, ответов из общего кэша: {shared_fetcher.hits}")
+        print("-" * 40)
+        for package, result in results.items():
+            print(f"  {package}: пакетов {result['packages_count']}, "
+                  f"транзитивных зависимостей {len(result['transitive_dependencies'])}, "
+                  f"циклов {len(result['cycles'])}")
+        print("=" * 60)
+
+    def display_impact(self, crate: str, roots: List[str]):
+        graph = self.graph_analyzer
+        nodes = graph.nodes_for(crate)
+
+        direct: Set[str] = set()
+        dependents: Set[str] = set()
+        for node in nodes:
+            direct.update(graph.reverse_dependencies(node))
+            dependents |= graph.transitive_dependents(node)
+        affected_packages = {graph.node_versions.get(node, (node,))[0] for node in dependents.union(nodes)}
+        affected_roots = [root for root in roots if root in affected_packages]
+
+        print(f"\nАнализ влияния: {crate}")
+        print("-" * 40)
+        if not nodes:
+            print("  Пакет не встречается в графе")
+            return
+        if len(nodes) > 1 or nodes[0] != crate:
+            print(f"  Узлы графа: {', '.join(nodes)}")
+        print(f"  Прямые зависимые ({len(direct)}): {', '.join(sorted(direct)) or '-'}")
+        print(f"  Все зависимые ({len(dependents)}): {', '.join(sorted(dependents)) or '-'}")
+        print(f"  Затронутые корневые пакеты: {', '.join(affected_roots) or '-'}")
+
+    def display_paths(self, root_node: str, crate: str, limit: int):
+        start = time.perf_counter()
+        paths = self.graph_analyzer.k_shortest_paths(root_node, crate, limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        print(f"\nЦепочки зависимостей {root_node} -> {crate} ({elapsed_ms:.3f} мс):")
+        print("-" * 40)
+        if not paths:
+            print("  Пакет не достижим из корневого пакета")
+        for i, path in enumerate(paths, 1):
+            print(f"  {i}. {' -> '.join(path)} (длина {len(path) - 1})")
+
     def display_graph_results(self, result: Dict[str, Any], start_package: str):
         graph = result['graph']
         cycles = result['cycles']
@@ -362,6 +1804,10 @@ class DependencyGraphVisualizer:
         print(f"Всего пакетов в графе: {packages_count}")
         print(f"Максимальная глубина зависимостей: {max_depth}")
         print(f"Найдено циклов: {len(cycles)}")
+        print(f"Компонент с циклами: {len(result['cyclic_components'])}")
+        print(f"Транзитивных зависимостей: {len(result['transitive_dependencies'])}")
+        if result.get('errors'):
+            print(f"Пакетов с ошибкой загрузки: {len(result['errors'])} ({', '.join(sorted(result['errors']))})")
 
         if cycles:
             print(f"\nОбнаруженные циклические зависимости:")
@@ -380,6 +1826,93 @@ class DependencyGraphVisualizer:
 
         print("=" * 60)
 
+    def is_sparse_index(self, repository: str) -> bool:
+        return (repository.startswith('sparse+')
+                or 'index.crates.io' in repository
+                or repository.startswith('file://')
+                or os.path.isdir(repository))
+
+    def is_local_registry(self, repository: str) -> bool:
+        # Локальная замена crates.io (cargo_mock_registry) с тем же API
+        return urlsplit(repository).hostname in ('127.0.0.1', 'localhost', '::1')
+
+    def create_fetcher(self, args: argparse.Namespace) -> Any:
+        if args.test_mode and args.file_repo and is_graph_file(args.file_repo):
+            dependency_fetcher = BinaryRepositoryFetcher(args.file_repo)
+            print(f"\nИспользуется тестовый репозиторий из файла: {args.file_repo}")
+        elif args.test_mode and args.file_repo:
+            dependency_fetcher = TestRepositoryFetcher(args.file_repo, args.lazy_load)
+            print(f"\nИспользуется тестовый репозиторий из файла: {args.file_repo}")
+        elif args.test_mode:
+            dependency_fetcher = self.test_fetcher
+            print(f"\nИспользуется встроенный тестовый репозиторий")
+        elif args.repository and self.is_sparse_index(args.repository):
+            dependency_fetcher = SparseIndexFetcher(
+                args.repository,
+                create_http_client(args.cache_dir, args.offline, args.cache_ttl, args.pool_size,
+                                   args.rate_limit, args.retries,
+                                   max_size=args.cache_size * 1024 * 1024)
+            )
+            print(f"\nИспользуется sparse-индекс: {args.repository}")
+        elif args.repository and "crates.io" in args.repository:
+            self.cargo_fetcher = CargoDependencyFetcher(
+                create_http_client(args.cache_dir, args.offline, args.cache_ttl, args.pool_size,
+                                   args.rate_limit, args.retries,
+                                   max_size=args.cache_size * 1024 * 1024)
+            )
+            dependency_fetcher = self.cargo_fetcher
+            print(f"\nИспользуется Cargo репозиторий (crates.io)")
+        elif args.repository and self.is_local_registry(args.repository):
+            self.cargo_fetcher = CargoDependencyFetcher(
+                create_http_client(args.cache_dir, args.offline, args.cache_ttl, args.pool_size,
+                                   args.rate_limit, args.retries,
+                                   max_size=args.cache_size * 1024 * 1024),
+                f"{args.repository.rstrip('/')}/api/v1/crates"
+            )
+            dependency_fetcher = self.cargo_fetcher
+            print(f"\nИспользуется локальный Cargo реестр: {args.repository}")
+        else:
+            dependency_fetcher = self.test_fetcher
+            print(f"\nИспользуется встроенный тестовый репозиторий")
+
+        return dependency_fetcher
+
+    def snapshot_params(self, args: argparse.Namespace) -> Dict[str, Any]:
+        return {
+            'package': args.roots[0] if len(args.roots) == 1 else args.roots,
+            'version': args.version,
+            'source': args.file_repo or args.repository or 'test',
+            'exclude': args.exclude_filter or [],
+            'max_depth': args.max_depth,
+            'engine': args.engine
+        }
+
+    def serve(self, args: argparse.Namespace, dependency_fetcher: Any):
+        exclude_filter = NameFilter.from_value(args.exclude_filter)
+
+        def build() -> Tuple[DependencyGraph, Dict[str, Dict[str, Any]]]:
+            # Источник и его HTTP-пул живут все время работы сервера; каждое обновление
+            # строит новый граф и заново спрашивает источник о данных пакетов
+            clear_memory_cache = getattr(dependency_fetcher, 'clear_memory_cache', None)
+            if clear_memory_cache:
+                clear_memory_cache()
+
+            graph = DependencyGraph()
+            results = graph.build_graph_batch(
+                start_packages=args.roots,
+                dependency_fetcher=CachingDependencyFetcher(dependency_fetcher),
+                version=args.version,
+                exclude_filter=exclude_filter,
+                max_depth=args.max_depth,
+                jobs=args.jobs,
+                cycle_limit=args.cycle_limit,
+                engine=args.engine
+            )
+            return graph, results
+
+        host, port = parse_address(args.serve)
+        GraphService(build, args.refresh_interval).serve(host, port)
+
     def run(self):
         try:
             args = self.parse_arguments()
@@ -390,39 +1923,110 @@ class DependencyGraphVisualizer:
 
             self.display_configuration(args)
 
-            dependency_fetcher = None
-
-            if args.test_mode and args.file_repo:
-                dependency_fetcher = TestRepositoryFetcher(args.file_repo)
-                print(f"\nИспользуется тестовый репозиторий из файла: {args.file_repo}")
-            elif args.test_mode:
-                dependency_fetcher = self.test_fetcher
-                print(f"\nИспользуется встроенный тестовый репозиторий")
-            elif args.repository and "crates.io" in args.repository:
-                dependency_fetcher = self.cargo_fetcher
-                print(f"\nИспользуется Cargo репозиторий (crates.io)")
+            profiler = Profiler() if args.profile else None
+            start = time.perf_counter()
+            dependency_fetcher = self.source = self.create_fetcher(args)
+            if profiler:
+                profiler.phase('открытие источника', start, time.perf_counter())
+                dependency_fetcher = InstrumentedFetcher(dependency_fetcher, profiler)
+                install_hooks(dependency_fetcher, profiler)
+                self.graph_analyzer.hooks = profiler
+
+            if args.serve:
+                self.serve(args, dependency_fetcher)
+                return
+
+            snapshot_fetcher = None
+            if args.snapshot:
+                snapshot = None
+                if args.incremental:
+                    snapshot = DependencyGraph.load_snapshot(args.snapshot)
+                    if snapshot and snapshot.get('params') != self.snapshot_params(args):
+                        print("Параметры снимка отличаются, выполняется полное построение")
+                        snapshot = None
+
+                snapshot_fetcher = SnapshotFetcher(dependency_fetcher, snapshot)
+                if snapshot:
+                    changed = snapshot_fetcher.detect_changes(args.jobs)
+                    print(f"Снимок загружен: {args.snapshot}, изменившихся пакетов: {len(changed)}")
+                dependency_fetcher = snapshot_fetcher
+
+            print(f"\nПостроение графа зависимостей ({args.engine.upper()})...")
+            exclude_filter = NameFilter.from_value(args.exclude_filter)
+            if exclude_filter:
+                print(f"Исключаются пакеты, содержащие: '{exclude_filter.describe()}'")
+
+            if len(args.roots) > 1:
+                shared_fetcher = CachingDependencyFetcher(dependency_fetcher)
+                results = self.graph_analyzer.build_graph_batch(
+                    start_packages=args.roots,
+                    dependency_fetcher=shared_fetcher,
+                    version=args.version,
+                    exclude_filter=exclude_filter,
+                    max_depth=args.max_depth,
+                    jobs=args.jobs,
+                    cycle_limit=args.cycle_limit,
+                    engine=args.engine
+                )
+
+                for package, result in results.items():
+                    self.display_graph_results(result, package)
+                self.display_batch_summary(results, shared_fetcher)
             else:
-                dependency_fetcher = self.test_fetcher
-                print(f"\nИспользуется встроенный тестовый репозиторий")
-
-            print(f"\nПостроение графа зависимостей (DFS)...")
-            if args.exclude_filter:
-                print(f"Исключаются пакеты, содержащие: '{args.exclude_filter}'")
-
-            result = self.graph_analyzer.build_graph_dfs(
-                start_package=args.package,
-                dependency_fetcher=dependency_fetcher,
-                version=args.version,
-                exclude_filter=args.exclude_filter,
-                max_depth=args.max_depth
-            )
-
-            self.display_graph_results(result, args.package)
+                build_graph = (self.graph_analyzer.build_graph_bfs if args.engine == 'bfs'
+                               else self.graph_analyzer.build_graph_dfs)
+                result = build_graph(
+                    start_package=args.roots[0],
+                    dependency_fetcher=dependency_fetcher,
+                    version=args.version,
+                    exclude_filter=exclude_filter,
+                    max_depth=args.max_depth,
+                    jobs=args.jobs,
+                    cycle_limit=args.cycle_limit
+                )
+
+                self.display_graph_results(result, args.roots[0])
+
+            if args.export:
+                start = time.perf_counter()
+                export_graph(self.graph_analyzer, args.export, args.export_format,
+                             args.cluster, not args.no_cycle_highlight, args.layout_iterations)
+                if profiler:
+                    profiler.phase('выгрузка графа', start, time.perf_counter(), path=args.export)
+                print(f"Граф выгружен: {args.export}")
+
+            for crate in args.path_targets or []:
+                for root in args.roots:
+                    self.display_paths(root, crate, args.top_paths)
+
+            for crate in args.impact or []:
+                self.display_impact(crate, args.roots)
+
+            if snapshot_fetcher:
+                self.graph_analyzer.save_snapshot(args.snapshot, self.snapshot_params(args), snapshot_fetcher)
+                print(f"Снимок графа сохранен: {args.snapshot} "
+                      f"(загружено из источника: {snapshot_fetcher.fetched}, "
+                      f"перепроверено: {snapshot_fetcher.revalidated}, "
+                      f"взято из снимка без запроса: {snapshot_fetcher.reused})")
+
+            if profiler:
+                profiler.print_summary()
+                profiler.write_trace(args.profile)
+                print(f"Трасса профиля сохранена: {args.profile}")
+
+        except JsonFormatError as e:
+            print(f"Ошибка разбора тестового репозитория: {e}", file=sys.stderr)
+            sys.exit(1)
 
         except Exception as e:
             print(f"Неожиданная ошибка: {e}", file=sys.stderr)
             sys.exit(1)
 
+        finally:
+            close = getattr(self.source, 'close', None)
+            if close:
+                close()
+
 
 def create_test_repository_file():
     test_data = {
@@ -0,0 +1,459 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from KONF2_3 import BinaryRepositoryFetcher, DependencyGraph, TestRepositoryFetcher
+from cargo_export import export_graph
+from cargo_filter import NameFilter
+from cargo_graphfile import write_graph_file
+from cargo_profile import Profiler
+from cargo_synth import generate_synthetic, write_repository
+
+
+# Сценарии набора замеров: (имя, пакетов, уровней, среднее число зависимостей, распределение, доля циклов)
+SUITE_SCENARIOS = [
+    ('small', 2000, 8, 3.0, 'uniform', 0.01),
+    ('powerlaw', 20000, 12, 3.0, 'powerlaw', 0.01),
+    ('deep', 20000, 2000, 1.0, 'fixed', 0.001),
+    ('cyclic', 10000, 10, 4.0, 'uniform', 0.1),
+]
+
+
+def generate_edges(nodes: int, edges: int, seed: int = 18) -> List[Tuple[int, int]]:
+    rng = random.Random(seed)
+    # Смещенное распределение источников дает несколько пакетов с очень большим числом зависимостей
+    return [(int(nodes * rng.random() ** 3), rng.randrange(nodes)) for _ in range(edges)]
+
+
+class ListAdjacency:
+
+    # Исходное хранение смежности: Dict[str, List[str]] с проверкой "not in" по списку
+    def __init__(self):
+        self.graph: Dict[str, List[str]] = {}
+
+    def add_dependency(self, package: str, dependency: str):
+        if package not in self.graph:
+            self.graph[package] = []
+        if dependency not in self.graph[package]:
+            self.graph[package].append(dependency)
+
+
+class JsonLoadFetcher(TestRepositoryFetcher):
+
+    # Исходная загрузка: json.load всего файла и копия в repository_data
+    def load_repository(self):
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.repository_data = dict(data)
+
+
+def build_graph_recursive(start_package: str, dependency_fetcher: Any,
+                          version: str = "latest", exclude_filter: Optional[str] = None,
+                          max_depth: int = 10) -> Dict[str, Any]:
+    # Исходная рекурсивная реализация build_graph_dfs для сравнения
+    graph: Dict[str, List[str]] = {}
+    visited: Set[str] = set()
+    recursion_stack: Set[str] = set()
+    cycles: List[List[str]] = []
+    result = {'graph': graph, 'cycles': cycles, 'packages_count': 0, 'max_depth': 0}
+
+    def dfs(current_package: str, depth: int = 0, path: List[str] = None) -> Set[str]:
+        if path is None:
+            path = []
+
+        result['max_depth'] = max(result['max_depth'], depth)
+
+        if current_package in recursion_stack:
+            cycle_start = path.index(current_package)
+            cycle = path[cycle_start:] + [current_package]
+            if cycle not in cycles:
+                cycles.append(cycle)
+            return set()
+
+        if current_package in visited:
+            return set([current_package])
+
+        visited.add(current_package)
+        recursion_stack.add(current_package)
+        path.append(current_package)
+
+        all_dependencies: Set[str] = set()
+
+        for dep in dependency_fetcher.get_dependencies(current_package, version):
+            dep_name = dep['name']
+            if exclude_filter and exclude_filter.lower() in dep_name.lower():
+                continue
+            if dep_name not in graph.setdefault(current_package, []):
+                graph[current_package].append(dep_name)
+            all_dependencies.add(dep_name)
+            if depth < max_depth:
+                all_dependencies.update(dfs(dep_name, depth + 1, path.copy()))
+
+        recursion_stack.remove(current_package)
+        path.pop()
+        return all_dependencies
+
+    dfs(start_package)
+    result['packages_count'] = len(visited)
+    return result
+
+
+def build_graph_iterative(start_package: str, dependency_fetcher: Any,
+                          max_depth: int = 10) -> Dict[str, Any]:
+    return DependencyGraph().build_graph_dfs(start_package, dependency_fetcher, max_depth=max_depth)
+
+
+def measure(func: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    outcome: Dict[str, Any] = {}
+
+    def target():
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            outcome['result'] = func()
+        except RecursionError as e:
+            outcome['error'] = f"RecursionError: {e}"
+        outcome['seconds'] = time.perf_counter() - start
+        outcome['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    # Рекурсивной версии нужен большой стек потока, чтобы дойти до конца
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    return outcome
+
+
+def load_fetcher(repository: Dict[str, List[str]]) -> TestRepositoryFetcher:
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump(repository, f)
+    try:
+        return TestRepositoryFetcher(f.name)
+    finally:
+        os.remove(f.name)
+
+
+def run_ingest(args: argparse.Namespace):
+    pairs = generate_edges(args.nodes, args.edges)
+    hub_fanout = sum(1 for source, _ in pairs if source == 0)
+
+    def ingest(graph_factory: Callable[[], Any]) -> Callable[[], Any]:
+        def run():
+            graph = graph_factory()
+            # Как при разборе ответов репозитория, каждое имя приходит новой строкой
+            for source, target in pairs:
+                graph.add_dependency(f"crate-{source}", f"crate-{target}")
+            return graph
+        return run
+
+    runs = [("DependencyGraph (интернирование)", ingest(DependencyGraph))]
+    if not args.skip_reference:
+        runs.insert(0, ("Dict[str, List[str]] (исходный)", ingest(ListAdjacency)))
+
+    print(f"Пакетов: {args.nodes}, ребер: {args.edges}, ребер у самого крупного узла: {hub_fanout}")
+    print("-" * 70)
+    print(f"{'Хранение':<34}{'время, с':>10}{'ребер/с':>12}{'пик памяти, МБ':>16}")
+
+    graphs = []
+    for name, func in runs:
+        outcome = measure(func)
+        graphs.append(outcome['result'])
+        rate = args.edges / outcome['seconds']
+        print(f"{name:<34}{outcome['seconds']:>10.2f}{rate:>12.0f}{outcome['peak_mb']:>16.1f}")
+
+    if len(graphs) == 2:
+        same = graphs[0].graph == dict(graphs[1].graph.items())
+        print(f"\nСмежность совпадает: {'да' if same else 'НЕТ'}")
+
+
+def run_filter(args: argparse.Namespace):
+    rng = random.Random(18)
+    syllables = ['ser', 'de', 'to', 'kio', 'hy', 'per', 'rand', 'core', 'log', 'sync', 'macro', 'util', 'num']
+    names = ['-'.join(rng.choice(syllables) + rng.choice(syllables) for _ in range(rng.randint(1, 3)))
+             for _ in range(args.nodes)]
+    edges = [names[rng.randrange(args.nodes)] for _ in range(args.edges)]
+
+    print(f"Имен пакетов: {args.nodes}, проверок (ребер): {args.edges}")
+    print("-" * 70)
+    print(f"{'Шаблонов':>10}{'подстроки в цикле, нс/ребро':>32}{'NameFilter, нс/ребро':>24}")
+
+    for count in (1, 10, 100, 500):
+        patterns = [f"zz{i}{rng.choice(syllables)}" for i in range(count - 1)] + ['macro']
+
+        # Исходный подход, расширенный на несколько подстрок: lower() на каждом ребре
+        start = time.perf_counter()
+        naive = [any(pattern.lower() in name.lower() for pattern in patterns) for name in edges]
+        naive_ns = (time.perf_counter() - start) / args.edges * 1e9
+
+        start = time.perf_counter()
+        name_filter = NameFilter(patterns)
+        compiled = [name_filter.matches(name) for name in edges]
+        compiled_ns = (time.perf_counter() - start) / args.edges * 1e9
+
+        assert naive == compiled
+        print(f"{count:>10}{naive_ns:>32.0f}{compiled_ns:>24.0f}")
+
+
+def run_load(args: argparse.Namespace):
+    repository: Dict[str, List[str]] = {}
+    for source, target in generate_edges(args.nodes, args.edges):
+        repository.setdefault(f"crate-{source}", []).append(f"crate-{target}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, 'repo.json')
+        graph_path = os.path.join(tmp_dir, 'repo.cgraph')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(repository, f)
+        write_graph_file(graph_path, repository)
+        del repository
+
+        print(f"Пакетов: {args.nodes}, ребер: {args.edges}")
+        print(f"Размер файла: JSON {os.path.getsize(json_path) / 1024 / 1024:.1f} МБ, "
+              f"бинарный {os.path.getsize(graph_path) / 1024 / 1024:.1f} МБ")
+        print("-" * 70)
+        print(f"{'Формат':<22}{'открытие, мс':>14}{'запрос корня, мс':>18}{'пик памяти, МБ':>16}")
+
+        runs: List[Tuple[str, Callable[[], Any]]] = [
+            ("JSON (потоковый)", lambda: TestRepositoryFetcher(json_path)),
+            ("JSON (ленивый)", lambda: TestRepositoryFetcher(json_path, lazy=True)),
+            ("бинарный (mmap)", lambda: BinaryRepositoryFetcher(graph_path)),
+        ]
+        if not args.skip_reference:
+            runs.insert(0, ("JSON (json.load)", lambda: JsonLoadFetcher(json_path)))
+
+        answers = []
+        for name, open_fetcher in runs:
+            timings: Dict[str, float] = {}
+
+            def open_and_query():
+                start = time.perf_counter()
+                fetcher = open_fetcher()
+                timings['open'] = time.perf_counter() - start
+                start = time.perf_counter()
+                dependencies = fetcher.get_dependencies("crate-0")
+                timings['query'] = time.perf_counter() - start
+                return dependencies
+
+            # Время - без tracemalloc, который сильно замедляет срезы файла; память - отдельным запуском
+            answers.append(open_and_query())
+            open_ms, query_ms = timings['open'] * 1000, timings['query'] * 1000
+            outcome = measure(open_and_query)
+            print(f"{name:<22}{open_ms:>14.1f}{query_ms:>18.1f}"
+                  f"{outcome['peak_mb']:>16.1f}")
+
+        print(f"\nЗависимостей у корня: {len(answers[0])}, "
+              f"ответы совпадают: {'да' if all(answer == answers[0] for answer in answers) else 'НЕТ'}")
+
+
+def run_dfs(args: argparse.Namespace):
+    # Без ребер через уровень обход доходит до глубины --depth по любому пути
+    repository = generate_synthetic(args.nodes, args.depth + 1, fanout=2.0, skip_rate=0.0)
+    fetcher = load_fetcher(repository)
+    max_depth = args.nodes + 1
+
+    runs = [("итеративный DFS", lambda: build_graph_iterative("P0", fetcher, max_depth))]
+    if not args.skip_reference:
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), max_depth + 1000))
+        threading.stack_size(1024 * 1024 * 1024)
+        runs.insert(0, ("рекурсивный DFS (исходный)",
+                        lambda: build_graph_recursive("P0", fetcher, max_depth=max_depth)))
+
+    print(f"Пакетов: {args.nodes}, длина цепочки: {args.depth}")
+    print("-" * 70)
+    print(f"{'Реализация':<30}{'время, с':>10}{'пик памяти, МБ':>16}{'глубина':>10}")
+
+    results = []
+    for name, func in runs:
+        outcome = measure(func)
+        if 'error' in outcome:
+            print(f"{name:<30}{outcome['seconds']:>10.2f}{outcome['peak_mb']:>16.1f}  {outcome['error']}")
+            continue
+        result = outcome['result']
+        results.append(result)
+        print(f"{name:<30}{outcome['seconds']:>10.2f}{outcome['peak_mb']:>16.1f}{result['max_depth']:>10}")
+
+    if len(results) == 2:
+        # Циклы теперь считаются по компонентам сильной связности, сравниваем сам граф
+        same = all(results[0][key] == results[1][key]
+                   for key in ('graph', 'packages_count', 'max_depth'))
+        print(f"\nГраф совпадает: {'да' if same else 'НЕТ'}")
+        print(f"Циклов при обходе (исходный): {len(results[0]['cycles'])}, "
+              f"компонент с циклами (Тарьян): {len(results[1]['cyclic_components'])}")
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def run_scenario(repo_path: str, tmp_dir: str, repeat: int) -> Dict[str, float]:
+    timings: Dict[str, List[float]] = {}
+
+    def record(metric: str, seconds: float):
+        timings.setdefault(metric, []).append(seconds)
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fetcher = TestRepositoryFetcher(repo_path)
+        record('load', time.perf_counter() - start)
+
+        for engine in ('dfs', 'bfs'):
+            # Обход и поиск циклов разделяются фазами инструментирования графа
+            graph = DependencyGraph()
+            profiler = Profiler()
+            graph.hooks = profiler
+            build_graph = graph.build_graph_bfs if engine == 'bfs' else graph.build_graph_dfs
+            build_graph('P0', fetcher, max_depth=1000000)
+            record(f'build_{engine}', profiler.phases['обход графа'])
+            record(f'cycles_{engine}', profiler.phases['циклы и замыкание'])
+
+        for export_format in ('dot', 'svg'):
+            start = time.perf_counter()
+            export_graph(graph, os.path.join(tmp_dir, f'graph.{export_format}'), export_format)
+            record(f'render_{export_format}', time.perf_counter() - start)
+
+    # Лучшее из повторов меньше всего зависит от фоновой нагрузки
+    return {metric: min(values) for metric, values in timings.items()}
+
+
+def run_suite(args: argparse.Namespace):
+    previous = load_records(args.record)
+    commit = current_commit()
+    regressions = []
+
+    print(f"Коммит: {commit}, повторов: {args.repeat}, масштаб: {args.scale}, порог регрессии: "
+          f"{args.threshold:.0%}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, nodes, depth, fanout, distribution, cycle_density in SUITE_SCENARIOS:
+            if args.scenario and name not in args.scenario:
+                continue
+
+            nodes = max(1, int(nodes * args.scale))
+            params = {'nodes': nodes, 'depth': depth, 'fanout': fanout,
+                      'distribution': distribution, 'cycle_density': cycle_density, 'seed': args.seed}
+            repository = generate_synthetic(nodes, depth, fanout, distribution, cycle_density, args.seed)
+            edges = sum(len(dependencies) for dependencies in repository.values())
+            repo_path = os.path.join(tmp_dir, f'{name}.json')
+            write_repository(repo_path, repository)
+            del repository
+
+            metrics = run_scenario(repo_path, tmp_dir, args.repeat)
+            # Сравнение с последним замером того же сценария с теми же параметрами
+            baseline = next((record for record in reversed(previous)
+                             if record.get('scenario') == name and record.get('params') == params), None)
+
+            print(f"\nСценарий {name}: пакетов {nodes}, ребер {edges}, уровней {depth}, "
+                  f"распределение {distribution}, доля циклов {cycle_density}")
+            header = f"(база: {baseline['commit']})" if baseline else "(нет базы)"
+            print(f"{'Метрика':<16}{'время, мс':>12}{'база, мс':>12}{'изменение':>12}  {header}")
+            for metric, seconds in metrics.items():
+                base = baseline['metrics'].get(metric) if baseline else None
+                line = f"{metric:<16}{seconds * 1000:>12.1f}"
+                if base:
+                    change = seconds / base - 1
+                    flag = ''
+                    if change > args.threshold and seconds - base > 0.005:
+                        flag = '  РЕГРЕССИЯ'
+                        regressions.append(f"{name}/{metric}: {base * 1000:.1f} -> {seconds * 1000:.1f} мс")
+                    line += f"{base * 1000:>12.1f}{change:>+12.0%}{flag}"
+                print(line)
+
+            entry = {
+                'commit': commit,
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'scenario': name,
+                'params': params,
+                'edges': edges,
+                'metrics': {metric: round(seconds, 6) for metric, seconds in metrics.items()},
+            }
+            if not args.no_record:
+                with open(args.record, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    if not args.no_record:
+        print(f"\nРезультаты добавлены в {args.record}")
+    if regressions:
+        print("\nОбнаружены регрессии:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замеры производительности DependencyGraph')
+    parser.add_argument('--mode', choices=['dfs', 'ingest', 'filter', 'load', 'suite'], default='dfs',
+                        help='dfs - обход графа, ingest - скорость добавления ребер, '
+                             'filter - фильтр исключения, load - запуск на большом '
+                             'репозитории, suite - набор сценариев на синтетических '
+                             'репозиториях с записью результатов (по умолчанию: dfs)')
+    parser.add_argument('--nodes', type=int, default=None,
+                        help='Число пакетов (по умолчанию: 100000 для dfs, 150000 для ingest, filter и load)')
+    parser.add_argument('--depth', type=int, default=6000, help='Длина цепочки для dfs (по умолчанию: 6000)')
+    parser.add_argument('--edges', type=int, default=1000000, help='Число ребер для ingest, filter и load (по умолчанию: 1000000)')
+    parser.add_argument('--skip-reference', '--skip-recursive', dest='skip_reference', action='store_true',
+                        help='Не запускать исходную (в режиме dfs - рекурсивную) реализацию')
+    parser.add_argument('--scenario', action='append',
+                        choices=[scenario[0] for scenario in SUITE_SCENARIOS],
+                        help='Сценарий suite; можно указать несколько раз (по умолчанию: все)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Множитель числа пакетов в сценариях suite (по умолчанию: 1.0)')
+    parser.add_argument('--repeat', type=int, default=3, help='Повторов каждого замера suite (по умолчанию: 3)')
+    parser.add_argument('--seed', type=int, default=18, help='Начальное значение генератора (по умолчанию: 18)')
+    parser.add_argument('--record', default='bench_results.jsonl',
+                        help='Файл истории замеров suite (по умолчанию: bench_results.jsonl)')
+    parser.add_argument('--no-record', action='store_true', help='Не дописывать результаты в историю')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Относительное замедление, считающееся регрессией (по умолчанию: 0.2)')
+    args = parser.parse_args()
+
+    if args.mode == 'ingest':
+        args.nodes = args.nodes or 150000
+        run_ingest(args)
+    elif args.mode == 'filter':
+        args.nodes = args.nodes or 150000
+        run_filter(args)
+    elif args.mode == 'load':
+        args.nodes = args.nodes or 150000
+        run_load(args)
+    elif args.mode == 'suite':
+        run_suite(args)
+    else:
+        args.nodes = args.nodes or 100000
+        run_dfs(args)
+
+
+if __name__ == "__main__":
+    main()
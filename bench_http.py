@@ -0,0 +1,188 @@
+import argparse
+import gzip
+import http.server
+import json
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Callable, List, Optional, Tuple
+
+from KONF2_3 import CargoDependencyFetcher, DependencyGraph, SparseIndexFetcher
+from cargo_http import ConnectionPool, HttpClient, create_http_client
+from cargo_mock_registry import MockRegistry, dataset_from_repository
+from cargo_synth import generate_synthetic
+
+
+def make_crate_document(package_name: str, versions: int = 50) -> bytes:
+    data = {
+        'crate': {'id': package_name, 'name': package_name},
+        'versions': [
+            {
+                'num': f"1.0.{versions - i}",
+                'dependencies': [
+                    {'crate_id': f"dep-{j}", 'req': '^1.0', 'kind': 'normal'} for j in range(5)
+                ]
+            }
+            for i in range(versions)
+        ]
+    }
+    return json.dumps(data).encode('utf-8')
+
+
+def start_server(connect_delay: float) -> http.server.ThreadingHTTPServer:
+
+    class CrateHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            # Имитация стоимости установки TCP/TLS соединения
+            time.sleep(connect_delay)
+            super().setup()
+
+        def do_GET(self):
+            body = make_crate_document(self.path.rsplit('/', 1)[-1])
+            gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+            if gzipped:
+                body = gzip.compress(body)
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            if gzipped:
+                self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), CrateHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def urlopen_get(url: str) -> bytes:
+    req = urllib.request.Request(url, headers={'User-Agent': 'DependencyGraphVisualizer/1.0'})
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return response.read()
+
+
+def measure(get: Callable[[str], bytes], base_url: str, requests: int) -> List[float]:
+    timings = []
+    for i in range(requests):
+        start = time.perf_counter()
+        json.loads(get(f"{base_url}/crate-{i}"))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+# Конфигурации замера пути загрузки: (название, источник, потоков, размер пула, кэш)
+# кэш: None - без дискового кэша, 'cold' - пустой, 'stale' - заполнен, но устарел
+# (запросы с If-None-Match), 'fresh' - заполнен и свеж
+FETCH_CONFIGS: List[Tuple[str, str, int, int, Optional[str]]] = [
+    ("API, 1 поток, пул 1", 'api', 1, 1, None),
+    ("API, 8 потоков, пул 1", 'api', 8, 1, None),
+    ("API, 8 потоков, пул 8", 'api', 8, 8, None),
+    ("API, 8 потоков, кэш пустой", 'api', 8, 8, 'cold'),
+    ("API, 8 потоков, кэш устарел", 'api', 8, 8, 'stale'),
+    ("API, 8 потоков, кэш свежий", 'api', 8, 8, 'fresh'),
+    ("sparse, 1 поток, пул 1", 'sparse', 1, 1, None),
+    ("sparse, 8 потоков, пул 8", 'sparse', 8, 8, None),
+]
+
+
+def run_fetch(registry: MockRegistry, base_url: str, source: str, jobs: int, pool_size: int,
+              cache_dir: Optional[str], ttl: int) -> Tuple[float, int]:
+    http_client = create_http_client(cache_dir, ttl=ttl, pool_size=pool_size)
+    if source == 'sparse':
+        fetcher = SparseIndexFetcher(f"sparse+{base_url}/index/", http_client)
+    else:
+        fetcher = CargoDependencyFetcher(http_client, f"{base_url}/api/v1/crates")
+
+    start = time.perf_counter()
+    result = DependencyGraph().build_graph_bfs('P0', fetcher, max_depth=1000, jobs=jobs)
+    elapsed = time.perf_counter() - start
+    http_client.pool.close()
+    return elapsed, result['packages_count']
+
+
+def fetch_benchmark(args: argparse.Namespace):
+    # Путь загрузки целиком (источник, HTTP-клиент, пул, кэш, обход) против локального
+    # реестра с заданной задержкой: одинаковые данные и условия при каждом запуске
+    dataset = dataset_from_repository(generate_synthetic(args.nodes, 8, 3.0, 'uniform', 0.0, args.seed))
+    registry = MockRegistry(dataset, args.latency / 1000, 0.0, args.connect_delay / 1000,
+                            args.bandwidth * 1024, seed=args.seed)
+    base_url = registry.start()
+
+    print(f"Пакетов: {args.nodes}, задержка ответа: {args.latency} мс, "
+          f"задержка соединения: {args.connect_delay} мс")
+    print("-" * 86)
+    print(f"{'Конфигурация':<32}{'время, с':>10}{'пакетов':>9}{'запросов':>10}"
+          f"{'соединений':>12}{'304':>6}{'байт':>9}")
+
+    for name, source, jobs, pool_size, cache in FETCH_CONFIGS:
+        cache_dir = tempfile.mkdtemp(prefix='bench_http_') if cache else None
+        try:
+            if cache in ('stale', 'fresh'):
+                # Прогрев кэша, в замер не входит
+                run_fetch(registry, base_url, source, jobs, pool_size, cache_dir, 3600)
+            registry.reset_stats()
+            elapsed, packages = run_fetch(registry, base_url, source, jobs, pool_size, cache_dir,
+                                          0 if cache == 'stale' else 3600)
+            stats = registry.reset_stats()
+        finally:
+            if cache_dir:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+        print(f"{name:<32}{elapsed:>10.3f}{packages:>9}{stats['requests']:>10}"
+              f"{stats['connections']:>12}{stats['not_modified']:>6}{stats['bytes']:>9}")
+
+    registry.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замеры HTTP: urlopen против keep-alive пула '
+                                                 'и путь загрузки против локального реестра')
+    parser.add_argument('--mode', choices=['transport', 'fetch'], default='transport',
+                        help='transport - сравнение транспорта, fetch - загрузка графа из локального '
+                             'реестра (по умолчанию: transport)')
+    parser.add_argument('--requests', type=int, default=200, help='Число запросов (по умолчанию: 200)')
+    parser.add_argument('--connect-delay', type=float, default=20.0,
+                        help='Задержка установки соединения в мс (по умолчанию: 20)')
+    parser.add_argument('--latency', type=float, default=10.0,
+                        help='Задержка ответа реестра в мс для fetch (по умолчанию: 10)')
+    parser.add_argument('--bandwidth', type=float, default=0.0,
+                        help='Полоса на соединение в КБ/с для fetch (по умолчанию: без ограничения)')
+    parser.add_argument('--nodes', type=int, default=300, help='Пакетов в реестре для fetch (по умолчанию: 300)')
+    parser.add_argument('--seed', type=int, default=18, help='Начальное значение генератора (по умолчанию: 18)')
+    args = parser.parse_args()
+
+    if args.mode == 'fetch':
+        fetch_benchmark(args)
+        return
+
+    server = start_server(args.connect_delay / 1000)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1/crates"
+
+    client = HttpClient(pool=ConnectionPool(pool_size=4))
+    results = [
+        ("urlopen (новое соединение)", measure(urlopen_get, base_url, args.requests)),
+        ("ConnectionPool (keep-alive, gzip)", measure(client.get, base_url, args.requests)),
+    ]
+
+    print(f"Запросов: {args.requests}, задержка соединения: {args.connect_delay} мс")
+    print("-" * 70)
+    print(f"{'Транспорт':<36}{'среднее, мс':>12}{'медиана, мс':>12}{'p95, мс':>10}")
+    for name, timings in results:
+        p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+        print(f"{name:<36}{statistics.mean(timings):>12.2f}{statistics.median(timings):>12.2f}{p95:>10.2f}")
+
+    client.pool.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
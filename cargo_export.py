@@ -0,0 +1,198 @@
+import os
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Set, Tuple
+
+from cargo_layout import render_layout
+
+
+EXPORT_FORMATS = ('dot', 'mermaid', 'plantuml', 'svg', 'html')
+# Форматы с собственной послойной укладкой (cargo_layout)
+LAYOUT_FORMATS = ('svg', 'html')
+CLUSTER_MODES = ('none', 'scc', 'prefix')
+
+FORMAT_EXTENSIONS = {
+    '.dot': 'dot',
+    '.gv': 'dot',
+    '.mmd': 'mermaid',
+    '.mermaid': 'mermaid',
+    '.puml': 'plantuml',
+    '.plantuml': 'plantuml',
+    '.svg': 'svg',
+    '.html': 'html',
+    '.htm': 'html',
+}
+
+CYCLE_COLOR = '#d62728'
+
+
+def guess_format(path: str) -> Optional[str]:
+    return FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def family(name: str) -> str:
+    # Семейство пакетов: часть имени до версии и первого разделителя (tokio-macros -> tokio)
+    base = name.split('@', 1)[0]
+    for separator in ('-', '_'):
+        base = base.split(separator, 1)[0]
+    return base
+
+
+class GraphExporter:
+
+    # Строки выгрузки порождаются генераторами и сразу пишутся в файл: в памяти
+    # держатся только целочисленные компоненты и группы узлов, но не текст графа
+    def __init__(self, graph: Any, cluster: str = 'none', highlight_cycles: bool = True):
+        self.graph = graph
+        self.cluster = cluster
+        self.highlight_cycles = highlight_cycles
+        self.cyclic: Set[int] = set()
+
+        if highlight_cycles or cluster == 'scc':
+            components = graph.compute_components()
+            self.cyclic = {index for index, component in enumerate(components)
+                           if len(component) > 1 or component[0] in graph.successors(component[0])}
+
+    def node_count(self) -> int:
+        return len(self.graph.names)
+
+    def is_cycle_edge(self, package_id: int, dependency_id: int) -> bool:
+        component_of = self.graph.component_of
+        component = component_of.get(package_id)
+        return component in self.cyclic and component == component_of.get(dependency_id)
+
+    def iter_edges(self) -> Iterator[Tuple[int, int, bool]]:
+        highlight = self.highlight_cycles and bool(self.cyclic)
+        for package_id, dependencies in self.graph.adjacency.items():
+            for dependency_id in dependencies:
+                yield package_id, dependency_id, highlight and self.is_cycle_edge(package_id, dependency_id)
+
+    def clusters(self) -> Tuple[Dict[str, List[int]], List[int]]:
+        # Группы узлов и узлы вне групп; группы из одного узла не выделяются
+        groups: Dict[str, List[int]] = {}
+        if self.cluster == 'scc':
+            for index in sorted(self.cyclic):
+                groups[f"цикл {len(groups) + 1}"] = self.graph.components[index]
+        elif self.cluster == 'prefix':
+            for package_id, name in enumerate(self.graph.names):
+                groups.setdefault(family(name), []).append(package_id)
+            groups = {label: members for label, members in groups.items() if len(members) > 1}
+
+        grouped = {member for members in groups.values() for member in members}
+        loose = [package_id for package_id in range(self.node_count()) if package_id not in grouped]
+        return groups, loose
+
+    def is_cycle_node(self, package_id: int) -> bool:
+        return self.highlight_cycles and self.graph.component_of.get(package_id) in self.cyclic
+
+    def quote(self, text: str) -> str:
+        return text.replace('\\', '\\\\').replace('"', '\\"')
+
+    def dot_lines(self) -> Iterator[str]:
+        names = self.graph.names
+        yield 'digraph dependencies {\n'
+        yield '  rankdir=LR;\n'
+        yield '  node [shape=box, fontname="Helvetica"];\n'
+
+        def node_line(package_id: int, indent: str) -> str:
+            style = f' [color="{CYCLE_COLOR}", fontcolor="{CYCLE_COLOR}"]' if self.is_cycle_node(package_id) else ''
+            return f'{indent}"{self.quote(names[package_id])}"{style};\n'
+
+        groups, loose = self.clusters()
+        for index, (label, members) in enumerate(groups.items()):
+            yield f'  subgraph cluster_{index} {{\n'
+            yield f'    label="{self.quote(label)}";\n'
+            for package_id in members:
+                yield node_line(package_id, '    ')
+            yield '  }\n'
+        for package_id in loose:
+            yield node_line(package_id, '  ')
+
+        for package_id, dependency_id, in_cycle in self.iter_edges():
+            style = f' [color="{CYCLE_COLOR}", penwidth=2]' if in_cycle else ''
+            yield f'  "{self.quote(names[package_id])}" -> "{self.quote(names[dependency_id])}"{style};\n'
+        yield '}\n'
+
+    def mermaid_label(self, text: str) -> str:
+        return text.replace('"', '#quot;')
+
+    def mermaid_lines(self) -> Iterator[str]:
+        names = self.graph.names
+        yield 'graph LR\n'
+
+        groups, loose = self.clusters()
+        for index, (label, members) in enumerate(groups.items()):
+            yield f'  subgraph g{index} ["{self.mermaid_label(label)}"]\n'
+            for package_id in members:
+                yield f'    n{package_id}["{self.mermaid_label(names[package_id])}"]\n'
+            yield '  end\n'
+        for package_id in loose:
+            yield f'  n{package_id}["{self.mermaid_label(names[package_id])}"]\n'
+
+        # Стиль ребер в Mermaid задается по порядковому номеру, запоминаются только номера
+        cycle_links: List[int] = []
+        for index, (package_id, dependency_id, in_cycle) in enumerate(self.iter_edges()):
+            if in_cycle:
+                cycle_links.append(index)
+            yield f'  n{package_id} --> n{dependency_id}\n'
+
+        if self.highlight_cycles and self.cyclic:
+            yield f'  classDef cycle stroke:{CYCLE_COLOR},stroke-width:2px,color:{CYCLE_COLOR};\n'
+            for package_id in range(self.node_count()):
+                if self.is_cycle_node(package_id):
+                    yield f'  class n{package_id} cycle;\n'
+            for start in range(0, len(cycle_links), 200):
+                links = ','.join(str(index) for index in cycle_links[start:start + 200])
+                yield f'  linkStyle {links} stroke:{CYCLE_COLOR},stroke-width:2px;\n'
+
+    def plantuml_lines(self) -> Iterator[str]:
+        names = self.graph.names
+        yield '@startuml\n'
+        yield 'left to right direction\n'
+
+        def node_line(package_id: int, indent: str) -> str:
+            color = f' {CYCLE_COLOR}' if self.is_cycle_node(package_id) else ''
+            return f'{indent}rectangle "{self.quote(names[package_id])}" as n{package_id}{color}\n'
+
+        groups, loose = self.clusters()
+        for label, members in groups.items():
+            yield f'package "{self.quote(label)}" {{\n'
+            for package_id in members:
+                yield node_line(package_id, '  ')
+            yield '}\n'
+        for package_id in loose:
+            yield node_line(package_id, '')
+
+        for package_id, dependency_id, in_cycle in self.iter_edges():
+            arrow = f'-[{CYCLE_COLOR},bold]->' if in_cycle else '-->'
+            yield f'n{package_id} {arrow} n{dependency_id}\n'
+        yield '@enduml\n'
+
+    def lines(self, export_format: str) -> Iterable[str]:
+        if export_format == 'dot':
+            return self.dot_lines()
+        if export_format == 'mermaid':
+            return self.mermaid_lines()
+        if export_format == 'plantuml':
+            return self.plantuml_lines()
+        raise ValueError(f"Неизвестный формат выгрузки: {export_format}")
+
+    def write(self, out: IO[str], export_format: str):
+        out.writelines(self.lines(export_format))
+
+
+def export_graph(graph: Any, path: str, export_format: Optional[str] = None,
+                 cluster: str = 'none', highlight_cycles: bool = True, layout_iterations: int = 8):
+    export_format = export_format or guess_format(path) or 'dot'
+
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+            if export_format in LAYOUT_FORMATS:
+                render_layout(graph, f, export_format, layout_iterations)
+            else:
+                GraphExporter(graph, cluster, highlight_cycles).write(f, export_format)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Недописанный файл, в том числе после Ctrl+C, не остается рядом с результатом
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
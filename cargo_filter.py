@@ -0,0 +1,114 @@
+import fnmatch
+import re
+from typing import Dict, Iterable, List, Optional, Union
+
+
+class SubstringAutomaton:
+
+    # Автомат Ахо-Корасик: проверка имени за один проход независимо от числа подстрок
+    def __init__(self, substrings: Iterable[str]):
+        goto: List[Dict[str, int]] = [{}]
+        terminal = [False]
+
+        for substring in substrings:
+            state = 0
+            for char in substring:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = goto[state][char] = len(goto)
+                    goto.append({})
+                    terminal.append(False)
+                state = next_state
+            terminal[state] = True
+
+        # Достраиваем полную таблицу переходов, чтобы при проверке не ходить по ссылкам неудач
+        alphabet = {char for edges in goto for char in edges}
+        fail = [0] * len(goto)
+        self.transitions: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = list(goto[0].values())
+
+        for state in queue:
+            terminal[state] = terminal[state] or terminal[fail[state]]
+            for char in alphabet:
+                child = goto[state].get(char)
+                if child is None:
+                    next_state = self.transitions[fail[state]].get(char, 0)
+                    if next_state:
+                        self.transitions[state][char] = next_state
+                else:
+                    fail[child] = self.transitions[fail[state]].get(char, 0) if state else 0
+                    self.transitions[state][char] = child
+                    queue.append(child)
+
+        self.terminal = terminal
+
+    def search(self, text: str) -> bool:
+        transitions = self.transitions
+        terminal = self.terminal
+        state = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
+
+class NameFilter:
+
+    # Шаблоны: "re:<выражение>", "glob:<маска>" или маска с *?[, иначе подстрока.
+    # Подстроки объединяются в один автомат, маски и выражения - в одно регулярное
+    # выражение; сравнение без учета регистра
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.patterns: List[str] = [pattern for pattern in patterns if pattern]
+        self.verdicts: Dict[str, bool] = {}
+        self.regex = None
+        self.automaton = None
+
+        substrings = [pattern.lower() for pattern in self.patterns if self.is_substring(pattern)]
+        expressions = [self.pattern_to_regex(pattern) for pattern in self.patterns
+                       if not self.is_substring(pattern)]
+
+        if substrings:
+            self.automaton = SubstringAutomaton(substrings)
+        if expressions:
+            self.regex = re.compile('|'.join(expressions), re.IGNORECASE)
+
+    @classmethod
+    def from_value(cls, value: Union[None, str, Iterable[str], "NameFilter"]) -> "NameFilter":
+        if isinstance(value, NameFilter):
+            return value
+        if value is None:
+            return cls()
+        if isinstance(value, str):
+            return cls([value])
+        return cls(value)
+
+    def is_substring(self, pattern: str) -> bool:
+        return not pattern.startswith(('re:', 'glob:')) and not any(c in pattern for c in '*?[')
+
+    def pattern_to_regex(self, pattern: str) -> str:
+        if pattern.startswith('re:'):
+            expression = pattern[len('re:'):]
+            try:
+                re.compile(expression)
+            except re.error as e:
+                raise ValueError(f"Некорректное регулярное выражение '{expression}': {e}")
+            return f"(?:{expression})"
+
+        if pattern.startswith('glob:'):
+            pattern = pattern[len('glob:'):]
+        return r'\A' + fnmatch.translate(pattern)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def describe(self) -> Optional[str]:
+        return ", ".join(self.patterns) if self.patterns else None
+
+    def matches(self, name: str) -> bool:
+        verdict = self.verdicts.get(name)
+        if verdict is None:
+            verdict = ((self.automaton is not None and self.automaton.search(name.lower()))
+                       or (self.regex is not None and self.regex.search(name) is not None))
+            self.verdicts[name] = verdict
+        return verdict
@@ -0,0 +1,184 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cargo_jsonstream import iter_repository
+
+
+# Заголовок: сигнатура, версия формата, число пакетов, число ребер, размер таблицы строк
+MAGIC = b'CGRF'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHIIQ')
+
+
+def is_graph_file(path: str) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def read_json_repository(path: str) -> Dict[str, List[str]]:
+    # Оба формата тестового репозитория: {"packages": [...]} и {"пакет": [зависимости]}
+    with open(path, 'rb') as f:
+        return {package_name: dependencies for package_name, dependencies, _, _ in iter_repository(f)}
+
+
+def little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def padding(size: int) -> bytes:
+    return b'\0' * (-size % 8)
+
+
+def write_graph_file(path: str, repository: Dict[str, Iterable[str]]):
+    # Пакеты, встречающиеся только как зависимости, тоже получают номер
+    names = set(repository)
+    for dependencies in repository.values():
+        names.update(dependencies)
+
+    # Имена отсортированы по байтам UTF-8: поиск номера пакета - двоичный поиск прямо по файлу
+    encoded = sorted(name.encode('utf-8') for name in names)
+    ids = {name.decode('utf-8'): i for i, name in enumerate(encoded)}
+
+    string_offsets = array('Q', [0])
+    for name in encoded:
+        string_offsets.append(string_offsets[-1] + len(name))
+    blob = b''.join(encoded)
+
+    offsets = array('I', [0])
+    edges = array('I')
+    for name in encoded:
+        edges.extend(ids[dep_name] for dep_name in repository.get(name.decode('utf-8'), ()))
+        offsets.append(len(edges))
+
+    if len(encoded) >= 2 ** 32 or len(edges) >= 2 ** 32:
+        raise ValueError("граф слишком велик для формата")
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(encoded), len(edges), len(blob)))
+        for section in (little_endian(string_offsets), little_endian(offsets), little_endian(edges), blob):
+            f.write(section)
+            f.write(padding(len(section)))
+    os.replace(tmp_path, path)
+
+
+def convert_json_repository(json_path: str, graph_path: str) -> Tuple[int, int]:
+    repository = read_json_repository(json_path)
+    write_graph_file(graph_path, repository)
+    return len(repository), sum(len(dependencies) for dependencies in repository.values())
+
+
+class GraphFile:
+
+    # Граф в формате CSR поверх отображенного в память файла: offsets[i]..offsets[i+1]
+    # задают срез edges с номерами зависимостей пакета i, имена берутся из таблицы строк
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self.read_header()
+        except ValueError:
+            self.mm.close()
+            raise
+
+        position = HEADER.size
+        self.string_offsets, position = self.section('Q', position, self.node_count + 1)
+        self.offsets, position = self.section('I', position, self.node_count + 1)
+        self.edges, position = self.section('I', position, self.edge_count)
+        self.blob_start = position
+
+    def read_header(self):
+        if len(self.mm) < HEADER.size:
+            raise ValueError(f"файл '{self.path}' слишком короткий")
+        magic, version, _, self.node_count, self.edge_count, blob_size = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            raise ValueError(f"файл '{self.path}' не является бинарным графом")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"неподдерживаемая версия формата: {version}")
+
+        # Размер проверяется до создания представлений секций: обрезанный файл не должен
+        # давать укороченные массивы
+        sizes = [(self.node_count + 1) * 8, (self.node_count + 1) * 4, self.edge_count * 4]
+        if HEADER.size + sum(size + len(padding(size)) for size in sizes) + blob_size > len(self.mm):
+            raise ValueError(f"файл '{self.path}' поврежден")
+
+    def section(self, typecode: str, position: int, count: int):
+        size = count * array(typecode).itemsize
+        if sys.byteorder == 'little':
+            values = memoryview(self.mm)[position:position + size].cast(typecode)
+        else:
+            values = array(typecode, self.mm[position:position + size])
+            values.byteswap()
+        return values, position + size + len(padding(size))
+
+    def __len__(self) -> int:
+        return self.node_count
+
+    def name_bytes(self, node: int) -> bytes:
+        start = self.blob_start + self.string_offsets[node]
+        return self.mm[start:self.blob_start + self.string_offsets[node + 1]]
+
+    def name(self, node: int) -> str:
+        return self.name_bytes(node).decode('utf-8')
+
+    def find(self, package_name: str) -> Optional[int]:
+        key = package_name.encode('utf-8')
+        low, high = 0, self.node_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.name_bytes(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.node_count and self.name_bytes(low) == key:
+            return low
+        return None
+
+    def successors(self, node: int) -> List[int]:
+        return list(self.edges[self.offsets[node]:self.offsets[node + 1]])
+
+    def dependencies(self, package_name: str) -> List[str]:
+        node = self.find(package_name)
+        if node is None:
+            return []
+        mm, blob_start, string_offsets = self.mm, self.blob_start, self.string_offsets
+        return [mm[blob_start + string_offsets[dep]:blob_start + string_offsets[dep + 1]].decode('utf-8')
+                for dep in self.edges[self.offsets[node]:self.offsets[node + 1]]]
+
+    def close(self):
+        for values in (self.string_offsets, self.offsets, self.edges):
+            if isinstance(values, memoryview):
+                values.release()
+        self.mm.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Преобразование JSON-репозитория в бинарный формат графа')
+    parser.add_argument('source', help='JSON-файл тестового репозитория')
+    parser.add_argument('target', help='Файл бинарного графа')
+    args = parser.parse_args()
+
+    try:
+        packages, edges = convert_json_repository(args.source, args.target)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Ошибка преобразования репозитория: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Записан бинарный граф: {args.target} (пакетов: {packages}, ребер: {edges})")
+
+
+if __name__ == "__main__":
+    main()
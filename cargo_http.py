@@ -0,0 +1,437 @@
+import gzip
+import http.client
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Any, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from cargo_profile import NO_HOOKS, Hooks
+
+
+USER_AGENT = 'DependencyGraphVisualizer/1.0'
+# Ответы, после которых запрос имеет смысл повторить: лимит запросов и временные сбои сервера
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpCache:
+
+    def __init__(self, cache_dir: str, ttl: int = 3600, max_size: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        # Ключ -> размер записи; порядок от давно использованных к недавним (LRU)
+        self.entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total_size = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.load_index()
+
+    def load_index(self):
+        found = []
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith('.meta'):
+                continue
+            key = file_name[:-len('.meta')]
+            meta_path = os.path.join(self.cache_dir, file_name)
+            body_path = os.path.join(self.cache_dir, key + '.body')
+            if not os.path.exists(body_path):
+                continue
+            size = os.path.getsize(body_path) + os.path.getsize(meta_path)
+            found.append((os.path.getmtime(meta_path), key, size))
+
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.total_size += size
+
+    def file_key(self, key: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+
+    def paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, self.file_key(key))
+        return base + '.body', base + '.meta'
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        body_path, meta_path = self.paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+
+        with self.lock:
+            file_key = self.file_key(key)
+            if file_key in self.entries:
+                self.entries.move_to_end(file_key)
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+        return body, meta
+
+    def is_fresh(self, meta: Dict[str, Any]) -> bool:
+        return time.time() - meta.get('fetched_at', 0) < self.ttl
+
+    def write_meta(self, meta_path: str, meta: Dict[str, Any]):
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def store(self, key: str, body: bytes, etag: Optional[str] = None,
+              last_modified: Optional[str] = None):
+        body_path, meta_path = self.paths(key)
+        meta = {
+            'key': key,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time()
+        }
+
+        tmp_path = body_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, body_path)
+        self.write_meta(meta_path, meta)
+
+        size = os.path.getsize(body_path) + os.path.getsize(meta_path)
+        with self.lock:
+            file_key = self.file_key(key)
+            self.total_size -= self.entries.pop(file_key, 0)
+            self.entries[file_key] = size
+            self.total_size += size
+            self.evict()
+
+    def refresh(self, key: str, meta: Dict[str, Any]):
+        # Ответ 304: тело не изменилось, продлеваем срок жизни записи
+        _, meta_path = self.paths(key)
+        meta['fetched_at'] = time.time()
+        self.write_meta(meta_path, meta)
+
+    def evict(self):
+        while self.total_size > self.max_size and len(self.entries) > 1:
+            file_key, size = self.entries.popitem(last=False)
+            self.total_size -= size
+            base = os.path.join(self.cache_dir, file_key)
+            for path in (base + '.body', base + '.meta'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class ConnectionPool:
+
+    def __init__(self, pool_size: int = 4, timeout: int = 10, max_redirects: int = 5):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.hooks: Hooks = NO_HOOKS
+        self.lock = threading.Lock()
+        # (схема, хост, порт) -> простаивающие keep-alive соединения
+        self.idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+
+    def acquire(self, key: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+        with self.lock:
+            connections = self.idle.get(key)
+            if connections:
+                return connections.pop(), True
+
+        scheme, host, port = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def release(self, key: Tuple[str, str, int], connection: http.client.HTTPConnection):
+        with self.lock:
+            connections = self.idle.setdefault(key, [])
+            if len(connections) < self.pool_size:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle.clear()
+
+    def request(self, url: str, headers: Dict[str, str]) -> Tuple[int, str, http.client.HTTPMessage, bytes]:
+        for _ in range(self.max_redirects + 1):
+            status, reason, response_headers, body = self.request_once(url, headers)
+            location = response_headers.get('Location')
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return status, reason, response_headers, body
+
+        raise urllib.error.URLError(f"слишком много перенаправлений для {url}")
+
+    def request_once(self, url: str, headers: Dict[str, str]) -> Tuple[int, str, http.client.HTTPMessage, bytes]:
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        headers = dict(headers)
+        headers.setdefault('Accept-Encoding', 'gzip')
+
+        while True:
+            connection, reused = self.acquire(key)
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                connection.close()
+                # Сервер мог закрыть простаивающее соединение - повторяем на новом
+                if reused:
+                    self.hooks.retry(url, e)
+                    continue
+                raise urllib.error.URLError(e)
+            break
+
+        if response.will_close:
+            connection.close()
+        else:
+            self.release(key, connection)
+
+        if response.getheader('Content-Encoding', '').lower() == 'gzip':
+            body = gzip.decompress(body)
+
+        return response.status, response.reason, response.headers, body
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After задается числом секунд или HTTP-датой
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+
+    # Маркерная корзина: rate запросов в секунду в среднем и до burst подряд;
+    # rate = 0 - без ограничения, но пауза по Retry-After действует всегда
+    def __init__(self, rate: float = 0.0, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if self.paused_until > now:
+                    wait = self.paused_until - now
+                elif self.rate <= 0:
+                    return
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        # Ответ 429 относится ко всем запросам к реестру, а не только к повторяемому
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = max(self.updated, self.paused_until)
+
+
+class InFlight:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class RequestScheduler:
+
+    # Планировщик запросов под HttpClient: ограничение частоты, повторы с
+    # экспоненциальной задержкой и случайным разбросом, объединение одинаковых
+    # одновременных запросов в один сетевой вызов
+    def __init__(self, pool: ConnectionPool, rate_limit: float = 0.0, burst: int = 10,
+                 max_retries: int = 4, backoff: float = 0.5, max_backoff: float = 30.0,
+                 max_wait: float = 120.0, seed: Optional[int] = None):
+        self.pool = pool
+        self.limiter = RateLimiter(rate_limit, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Ожидание дольше max_wait (например, Retry-After на час) не выполняется - запрос завершается ошибкой
+        self.max_wait = max_wait
+        self.rng = random.Random(seed)
+        self.hooks: Hooks = NO_HOOKS
+        self.lock = threading.Lock()
+        self.in_flight: Dict[str, InFlight] = {}
+        self.stats: Dict[str, int] = {'requests': 0, 'retries': 0, 'coalesced': 0, 'throttled': 0}
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def coalesce(self, key: str, load: Callable[[], Any]) -> Any:
+        # Первый поток выполняет load, остальные с тем же ключом ждут его результат
+        with self.lock:
+            entry = self.in_flight.get(key)
+            leader = entry is None
+            if leader:
+                entry = self.in_flight[key] = InFlight()
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            entry.done.wait()
+            if entry.error is not None:
+                raise entry.error
+            return entry.result
+
+        try:
+            entry.result = load()
+            return entry.result
+        except BaseException as e:
+            entry.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            entry.done.set()
+
+    def retry_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        # "Полный" разброс: случайная задержка от 0 до экспоненциального предела,
+        # чтобы потоки, получившие отказ одновременно, не повторяли запросы разом
+        with self.lock:
+            jitter = self.rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if retry_after is not None:
+            return retry_after + jitter * 0.1
+        return jitter
+
+    def request(self, url: str, headers: Dict[str, str]) -> Tuple[int, str, http.client.HTTPMessage, bytes]:
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            self.count('requests')
+            retry_after = None
+            try:
+                status, reason, response_headers, body = self.pool.request(url, headers)
+            except urllib.error.URLError as e:
+                # Обрыв соединения или таймаут
+                error: BaseException = e
+            else:
+                if status not in RETRY_STATUSES:
+                    return status, reason, response_headers, body
+                error = urllib.error.HTTPError(url, status, reason, response_headers, None)
+                retry_after = parse_retry_after(response_headers.get('Retry-After'))
+                if status == 429:
+                    self.count('throttled')
+
+            delay = self.retry_delay(attempt, retry_after)
+            if attempt >= self.max_retries or delay > self.max_wait:
+                raise error
+            if retry_after is not None and isinstance(error, urllib.error.HTTPError) and error.code == 429:
+                self.limiter.pause(retry_after)
+
+            self.hooks.retry(url, error)
+            self.count('retries')
+            time.sleep(delay)
+            attempt += 1
+
+
+class HttpClient:
+
+    def __init__(self, cache: Optional[HttpCache] = None, offline: bool = False, timeout: int = 10,
+                 pool: Optional[ConnectionPool] = None, scheduler: Optional[RequestScheduler] = None):
+        self.cache = cache
+        self.offline = offline
+        self.timeout = timeout
+        self.pool = pool or ConnectionPool(timeout=timeout)
+        self.scheduler = scheduler or RequestScheduler(self.pool)
+        self.hooks: Hooks = NO_HOOKS
+
+    def get_json(self, url: str, cache_key: Optional[str] = None) -> Any:
+        body = self.get(url, cache_key)
+        start = time.perf_counter()
+        data = json.loads(body.decode('utf-8'))
+        self.hooks.decode(cache_key or url, start, time.perf_counter(), len(body))
+        return data
+
+    def get(self, url: str, cache_key: Optional[str] = None) -> bytes:
+        # Одновременные запросы одного ресурса (например, список версий и зависимости
+        # пакета из разных потоков) разделяют один сетевой вызов и одну запись в кэш
+        key = cache_key or url
+        return self.scheduler.coalesce(key, lambda: self.load(url, key))
+
+    def load(self, url: str, key: str) -> bytes:
+        start = time.perf_counter()
+        cached = self.cache.get(key) if self.cache else None
+
+        if cached:
+            body, meta = cached
+            if self.offline or self.cache.is_fresh(meta):
+                self.hooks.http(key, url, start, time.perf_counter(), len(body), 'hit')
+                return body
+        elif self.offline:
+            raise urllib.error.URLError(f"нет данных в кэше для '{key}' (режим offline)")
+
+        headers = {'User-Agent': USER_AGENT}
+        if cached:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        status, reason, response_headers, response_body = self.scheduler.request(url, headers)
+
+        if status == 304 and cached:
+            self.cache.refresh(key, meta)
+            self.hooks.http(key, url, start, time.perf_counter(), len(body), 'revalidated', status)
+            return body
+
+        self.hooks.http(key, url, start, time.perf_counter(), len(response_body), 'miss', status)
+        if status != 200:
+            raise urllib.error.HTTPError(url, status, reason, response_headers, None)
+
+        if self.cache:
+            self.cache.store(key, response_body,
+                             response_headers.get('ETag'),
+                             response_headers.get('Last-Modified'))
+        return response_body
+
+
+def create_http_client(cache_dir: Optional[str] = None, offline: bool = False,
+                       ttl: int = 3600, pool_size: int = 4, rate_limit: float = 0.0,
+                       max_retries: int = 4, max_size: int = 256 * 1024 * 1024) -> HttpClient:
+    cache = HttpCache(cache_dir, ttl=ttl, max_size=max_size) if cache_dir else None
+    pool = ConnectionPool(pool_size)
+    # Всплеск не больше числа соединений: корзина выравнивает поток запросов, а не копит их
+    scheduler = RequestScheduler(pool, rate_limit, burst=max(1, pool_size), max_retries=max_retries)
+    return HttpClient(cache, offline=offline, pool=pool, scheduler=scheduler)
@@ -0,0 +1,238 @@
+import codecs
+import json
+import re
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple
+
+
+WHITESPACE = ' \t\n\r'
+NON_WHITESPACE_RE = re.compile(r'[^ \t\n\r]')
+# Ключ без экранирования вместе с двоеточием - частый случай, разбирается одним регулярным выражением
+SIMPLE_KEY_RE = re.compile(r'"([^"\\]*)"[ \t\n\r]*:')
+# Символы, которыми может продолжаться число после уже разобранного префикса
+NUMBER_TAIL_RE = re.compile(r'[0-9eE.+-]*')
+
+
+class JsonFormatError(ValueError):
+
+    def __init__(self, message: str, line: int, column: int):
+        super().__init__(f"{message} (строка {line}, столбец {column})")
+        self.line = line
+        self.column = column
+
+
+class JsonStreamReader:
+
+    # Потоковый разбор JSON: в памяти только непрочитанный хвост буфера и одно текущее значение.
+    # Структура верхнего уровня разбирается вручную, отдельные значения - json.raw_decode
+    def __init__(self, stream: BinaryIO, chunk_size: int = 64 * 1024):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        # Позиция начала буфера в файле: байты, символы, строки и начало текущей строки
+        self.base_bytes = stream.tell()
+        self.base_chars = 0
+        self.base_line = 1
+        self.base_line_start = 0
+        # Байты до позиции mark_pos уже посчитаны, чтобы смещение находилось за линейное время
+        self.mark_pos = 0
+        self.mark_bytes = 0
+        # Начало последнего прочитанного значения в буфере - для сообщений об ошибках
+        self.value_start = 0
+
+    def fill(self, size: Optional[int] = None) -> bool:
+        if self.eof:
+            return False
+        data = self.stream.read(size or self.chunk_size)
+        try:
+            self.buffer += self.decoder.decode(data, final=not data)
+        except UnicodeDecodeError as e:
+            raise self.error(f"Некорректная кодировка UTF-8: {e.reason}", len(self.buffer))
+        if not data:
+            self.eof = True
+        return bool(data)
+
+    def count_bytes(self, pos: int) -> int:
+        text = self.buffer[self.mark_pos:pos]
+        self.mark_bytes += len(text) if text.isascii() else len(text.encode('utf-8'))
+        self.mark_pos = pos
+        return self.mark_bytes
+
+    def compact(self):
+        # Отбрасываем разобранную часть буфера, сохраняя счетчики позиции
+        if not self.pos:
+            return
+        consumed = self.buffer[:self.pos]
+        newlines = consumed.count('\n')
+        if newlines:
+            self.base_line += newlines
+            self.base_line_start = self.base_chars + consumed.rfind('\n') + 1
+        self.base_chars += len(consumed)
+        self.base_bytes += self.count_bytes(self.pos)
+        self.value_start -= self.pos
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        self.mark_pos = 0
+        self.mark_bytes = 0
+
+    def location(self, pos: int) -> Tuple[int, int]:
+        line = self.base_line + self.buffer.count('\n', 0, pos)
+        last_newline = self.buffer.rfind('\n', 0, pos)
+        line_start = self.base_chars + last_newline + 1 if last_newline >= 0 else self.base_line_start
+        return line, self.base_chars + pos - line_start + 1
+
+    def error(self, message: str, pos: Optional[int] = None) -> JsonFormatError:
+        line, column = self.location(self.pos if pos is None else pos)
+        return JsonFormatError(message, line, column)
+
+    def offset(self) -> int:
+        # Смещение текущей позиции в файле в байтах
+        return self.base_bytes + self.count_bytes(self.pos)
+
+    def peek(self) -> str:
+        while True:
+            match = NON_WHITESPACE_RE.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buffer[self.pos]
+            self.pos = len(self.buffer)
+            self.compact()
+            if not self.fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char:
+            raise self.error("Неожиданный конец файла")
+        if char not in chars:
+            expected = " или ".join(f"'{c}'" for c in chars)
+            raise self.error(f"Ожидается {expected}, найдено '{char}'")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        if not self.peek():
+            raise self.error("Неожиданный конец файла")
+        self.value_start = self.pos
+
+        read_size = self.chunk_size
+        while True:
+            try:
+                result, end = self.json_decoder.raw_decode(self.buffer, self.value_start)
+            except json.JSONDecodeError as e:
+                # Значение могло не поместиться в буфер - дочитываем с растущим шагом
+                error_pos = e.pos - self.value_start
+                if self.more(read_size):
+                    read_size *= 2
+                    continue
+                raise self.error(f"Некорректный JSON: {e.msg}", self.value_start + error_pos)
+
+            # Число на границе буфера может продолжаться в следующем блоке, в том числе
+            # дробной частью или порядком: "-1.5" из "-1.5e10" разбирается без ошибки
+            if NUMBER_TAIL_RE.match(self.buffer, end).end() == len(self.buffer) and self.more(read_size):
+                continue
+            self.pos = end
+            return result
+
+    def more(self, size: int) -> bool:
+        # Перед дочитыванием отбрасываем все, что предшествует текущему значению
+        self.pos = self.value_start
+        self.compact()
+        return self.fill(size)
+
+    def string(self) -> str:
+        result = self.value()
+        if not isinstance(result, str):
+            raise self.error("Ожидается строка", self.value_start)
+        return result
+
+    def iter_object(self) -> Iterator[str]:
+        # Перебор ключей объекта; значение каждого ключа читает вызывающий код
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            self.peek()
+            match = SIMPLE_KEY_RE.match(self.buffer, self.pos)
+            if match:
+                self.pos = match.end()
+                key = match.group(1)
+            else:
+                key = self.string()
+                self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def iter_array(self) -> Iterator[None]:
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield None
+            if self.expect(',]') == ']':
+                return
+
+    def finish(self):
+        if self.peek():
+            raise self.error("Лишние данные после JSON")
+
+
+# Имя пакета, зависимости, смещение значения в файле и признак формата {"packages": [...]}
+RepositoryEntry = Tuple[str, List[str], int, bool]
+
+
+def check_dependencies(reader: JsonStreamReader, package_name: str, dependencies: Any) -> List[str]:
+    if not isinstance(dependencies, list) or not set(map(type, dependencies)) <= {str}:
+        raise reader.error(f"Зависимости пакета '{package_name}' должны быть списком строк",
+                           reader.value_start)
+    return dependencies
+
+
+def package_entry(reader: JsonStreamReader, pkg_info: Any) -> Tuple[str, List[str]]:
+    if not isinstance(pkg_info, dict) or not isinstance(pkg_info.get('name'), str):
+        raise reader.error("Описание пакета должно быть объектом с полем 'name'", reader.value_start)
+    return pkg_info['name'], check_dependencies(reader, pkg_info['name'], pkg_info.get('dependencies', []))
+
+
+def iter_repository(stream: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[RepositoryEntry]:
+    # Оба формата тестового репозитория: {"packages": [{"name", "dependencies"}]}
+    # и {"пакет": [зависимости]}; пакеты выдаются вместе со смещением в файле.
+    # Формат определяется по первому ключу: только "packages" со списком означает
+    # первый формат, иначе записи выдаются сразу, без накопления
+    reader = JsonStreamReader(stream, chunk_size)
+    packaged: Optional[bool] = None
+
+    for key in reader.iter_object():
+        if packaged is None:
+            packaged = key == 'packages' and reader.peek() == '['
+            if packaged:
+                for _ in reader.iter_array():
+                    reader.peek()
+                    offset = reader.offset()
+                    name, dependencies = package_entry(reader, reader.value())
+                    yield name, dependencies, offset, True
+                continue
+
+        if packaged:
+            # Прочие ключи формата {"packages": [...]} (например, "version") - не пакеты
+            reader.value()
+        else:
+            reader.peek()
+            offset = reader.offset()
+            yield key, check_dependencies(reader, key, reader.value()), offset, False
+
+    reader.finish()
+
+
+def read_entry(stream: BinaryIO, package_name: str, offset: int, packaged: bool) -> List[str]:
+    stream.seek(offset)
+    reader = JsonStreamReader(stream, 4096)
+    if packaged:
+        return package_entry(reader, reader.value())[1]
+    return check_dependencies(reader, package_name, reader.value())
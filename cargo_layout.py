@@ -0,0 +1,282 @@
+from html import escape
+from typing import Any, IO, Iterator, List, Optional, Tuple
+
+
+CHAR_WIDTH = 7
+NODE_HEIGHT = 22
+NODE_PADDING = 12
+DUMMY_WIDTH = 6
+# Число фиктивных узлов ограничено: при слоях по самому длинному пути суммарная длина
+# ребер растет квадратично от размера графа. Ребра разбиваются от коротких к длинным,
+# пока укладываются в бюджет; остальные обходят слои по каналу слева от рисунка
+DUMMY_BUDGET_MIN = 10000
+DUMMY_BUDGET_PER_NODE = 4
+ROUTE_LANES = 8
+ROUTE_GAP = 4
+H_GAP = 16
+LAYER_GAP = 70
+MARGIN = 20
+CYCLE_COLOR = '#d62728'
+EDGE_COLOR = '#8c8c8c'
+
+
+class LayeredLayout:
+
+    # Послойная укладка в стиле Сугиямы: конденсация компонент сильной связности,
+    # слои по самому длинному пути, фиктивные узлы на длинных ребрах и
+    # ограниченное число проходов барицентрического упорядочивания
+    def __init__(self, graph: Any, iterations: int = 8):
+        self.graph = graph
+        self.iterations = iterations
+        self.node_count = len(graph.names)
+        self.layer: List[int] = [0] * self.node_count
+        self.layers: List[List[int]] = []
+        # Узел (в том числе фиктивный) -> соседи в предыдущем и следующем слое
+        self.up: List[List[int]] = []
+        self.down: List[List[int]] = []
+        # Ребра графа в виде цепочек узлов для отрисовки: (цепочка, ребро цикла), и
+        # длинные ребра сверх бюджета фиктивных узлов, которые рисуются через канал
+        self.chains: List[Tuple[List[int], bool]] = []
+        self.routed: List[Tuple[int, int, bool]] = []
+        self.max_span = 0
+        self.channel_width = 0
+        self.x: List[float] = []
+        self.width: List[float] = []
+        self.cyclic: List[bool] = []
+
+    def assign_layers(self):
+        graph = self.graph
+        components = graph.compute_components()
+        component_of = graph.component_of
+        # Узлы без ребер тоже нужно разместить: у них своя компонента из одного узла
+        extra = [[package_id] for package_id in range(self.node_count) if package_id not in component_of]
+
+        # Внутри компоненты узлы раскладываются по расстоянию BFS от ее первого узла,
+        # так что большая компонента занимает несколько слоев, а не один широкий
+        offset = [0] * self.node_count
+        height: List[int] = []
+        self.cyclic = [False] * self.node_count
+        for component in components:
+            members = set(component)
+            start = component[0]
+            offset[start] = 0
+            queue = [start]
+            seen = {start}
+            for node in queue:
+                for child in graph.successors(node):
+                    if child in members and child not in seen:
+                        seen.add(child)
+                        offset[child] = offset[node] + 1
+                        queue.append(child)
+            height.append(max(offset[member] for member in component) + 1)
+            is_cyclic = len(component) > 1 or start in graph.successors(start)
+            for member in component:
+                self.cyclic[member] = is_cyclic
+
+        # Компоненты выданы в обратном топологическом порядке: обход с конца дает
+        # топологический порядок, и самый длинный путь считается за один проход
+        component_layer = [0] * len(components)
+        for index in range(len(components) - 1, -1, -1):
+            bottom = component_layer[index] + height[index]
+            for member in components[index]:
+                for child in graph.successors(member):
+                    child_component = component_of[child]
+                    if child_component != index and component_layer[child_component] < bottom:
+                        component_layer[child_component] = bottom
+
+        for index, component in enumerate(components):
+            for member in component:
+                self.layer[member] = component_layer[index] + offset[member]
+        for component in extra:
+            self.layer[component[0]] = 0
+
+    def span_limit(self) -> int:
+        # Наибольшая длина ребра, при которой все ребра не длиннее нее помещаются в бюджет
+        spans = sorted(self.layer[dependency_id] - self.layer[package_id]
+                       for package_id, dependencies in self.graph.adjacency.items()
+                       for dependency_id in dependencies
+                       if self.layer[dependency_id] - self.layer[package_id] > 1)
+        budget = max(DUMMY_BUDGET_MIN, DUMMY_BUDGET_PER_NODE * self.node_count)
+        limit = 1
+        for span in spans:
+            budget -= span - 1
+            if budget < 0:
+                break
+            limit = span
+        return limit
+
+    def build_layers(self):
+        graph = self.graph
+        layer = self.layer
+        self.up = [[] for _ in range(self.node_count)]
+        self.down = [[] for _ in range(self.node_count)]
+        self.max_span = self.span_limit()
+
+        for package_id, dependencies in graph.adjacency.items():
+            for dependency_id in dependencies:
+                in_cycle = self.cyclic[package_id] and graph.component_of.get(package_id) == \
+                    graph.component_of.get(dependency_id)
+                if layer[dependency_id] <= layer[package_id]:
+                    # Обратное ребро внутри компоненты: рисуется напрямую, в порядок не входит
+                    self.chains.append(([package_id, dependency_id], in_cycle))
+                    continue
+
+                if layer[dependency_id] - layer[package_id] > self.max_span:
+                    # Ребро сверх бюджета идет по каналу, но участвует в упорядочивании
+                    self.down[package_id].append(dependency_id)
+                    self.up[dependency_id].append(package_id)
+                    self.routed.append((package_id, dependency_id, in_cycle))
+                    continue
+
+                chain = [package_id]
+                previous = package_id
+                for level in range(layer[package_id] + 1, layer[dependency_id]):
+                    dummy = len(layer)
+                    layer.append(level)
+                    self.up.append([previous])
+                    self.down.append([])
+                    self.down[previous].append(dummy)
+                    chain.append(dummy)
+                    previous = dummy
+                self.down[previous].append(dependency_id)
+                self.up[dependency_id].append(previous)
+                chain.append(dependency_id)
+                self.chains.append((chain, in_cycle))
+
+        self.layers = [[] for _ in range(max(layer, default=-1) + 1)]
+        for node, level in enumerate(layer):
+            self.layers[level].append(node)
+
+    def reduce_crossings(self):
+        # Позиция - относительное место в слое, чтобы длинные ребра сравнивали
+        # узлы слоев разной ширины
+        position = [0.0] * len(self.layer)
+
+        def place(nodes: List[int]):
+            for index, node in enumerate(nodes):
+                position[node] = (index + 0.5) / len(nodes)
+
+        for nodes in self.layers:
+            place(nodes)
+
+        def sweep(order: range, neighbors: List[List[int]]):
+            for level in order:
+                nodes = self.layers[level]
+                keys = {}
+                for node in nodes:
+                    adjacent = neighbors[node]
+                    # Узел без соседей сохраняет свою текущую позицию
+                    keys[node] = sum(position[other] for other in adjacent) / len(adjacent) if adjacent \
+                        else position[node]
+                nodes.sort(key=keys.__getitem__)
+                place(nodes)
+
+        for iteration in range(self.iterations):
+            if iteration % 2 == 0:
+                sweep(range(1, len(self.layers)), self.up)
+            else:
+                sweep(range(len(self.layers) - 2, -1, -1), self.down)
+
+    def assign_coordinates(self):
+        names = self.graph.names
+        self.width = [len(names[node]) * CHAR_WIDTH + NODE_PADDING if node < self.node_count else DUMMY_WIDTH
+                      for node in range(len(self.layer))]
+        self.x = [0.0] * len(self.layer)
+
+        layer_widths = [sum(self.width[node] for node in nodes) + H_GAP * max(0, len(nodes) - 1)
+                        for nodes in self.layers]
+        self.channel_width = ROUTE_LANES * ROUTE_GAP + H_GAP if self.routed else 0
+        content_width = max(layer_widths, default=0)
+        self.total_width = content_width + self.channel_width + 2 * MARGIN
+        self.total_height = len(self.layers) * (NODE_HEIGHT + LAYER_GAP) - LAYER_GAP + 2 * MARGIN
+
+        # Слои центрируются по самому широкому, канал обходных ребер - слева от них
+        for nodes, layer_width in zip(self.layers, layer_widths):
+            x = MARGIN + self.channel_width + (content_width - layer_width) / 2
+            for node in nodes:
+                self.x[node] = x + self.width[node] / 2
+                x += self.width[node] + H_GAP
+
+    def y(self, node: int) -> float:
+        return MARGIN + self.layer[node] * (NODE_HEIGHT + LAYER_GAP) + NODE_HEIGHT / 2
+
+    def run(self) -> "LayeredLayout":
+        self.assign_layers()
+        self.build_layers()
+        self.reduce_crossings()
+        self.assign_coordinates()
+        return self
+
+    def svg_lines(self) -> Iterator[str]:
+        names = self.graph.names
+        yield (f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.total_width:.0f}" '
+               f'height="{self.total_height:.0f}" viewBox="0 0 {self.total_width:.0f} {self.total_height:.0f}" '
+               f'font-family="Helvetica, Arial, sans-serif" font-size="12">\n')
+        yield ('<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" '
+               'markerHeight="6" orient="auto"><path d="M0,0 L10,5 L0,10 z" fill="context-stroke"/></marker></defs>\n')
+
+        yield f'<g fill="none" stroke="{EDGE_COLOR}" marker-end="url(#arrow)">\n'
+        half = NODE_HEIGHT / 2
+        for chain, in_cycle in self.chains:
+            points = []
+            for index, node in enumerate(chain):
+                y = self.y(node)
+                # Ребро выходит снизу начального узла и входит сверху конечного
+                if index == 0 and len(chain) > 1 and self.layer[chain[-1]] > self.layer[node]:
+                    y += half
+                elif index == len(chain) - 1 and self.layer[node] > self.layer[chain[0]]:
+                    y -= half
+                points.append(f"{self.x[node]:.1f},{y:.1f}")
+            stroke = f' stroke="{CYCLE_COLOR}"' if in_cycle else ''
+            yield f'<polyline points="{" ".join(points)}"{stroke}/>\n'
+
+        # Обходное ребро: вниз в промежуток под начальным слоем, влево в канал, вдоль
+        # канала до промежутка над конечным слоем и к узлу; узлы слоев не пересекаются
+        for index, (package_id, dependency_id, in_cycle) in enumerate(self.routed):
+            lane = MARGIN + (index % ROUTE_LANES) * ROUTE_GAP
+            shift = (index % ROUTE_LANES - ROUTE_LANES / 2) * ROUTE_GAP / 2
+            top = self.y(package_id) + half + LAYER_GAP / 2 + shift
+            bottom = self.y(dependency_id) - half - LAYER_GAP / 2 + shift
+            points = [(self.x[package_id], self.y(package_id) + half), (self.x[package_id], top), (lane, top),
+                      (lane, bottom), (self.x[dependency_id], bottom),
+                      (self.x[dependency_id], self.y(dependency_id) - half)]
+            stroke = f' stroke="{CYCLE_COLOR}"' if in_cycle else ''
+            yield f'<polyline points="{" ".join(f"{x:.1f},{y:.1f}" for x, y in points)}"{stroke}/>\n'
+        yield '</g>\n'
+
+        yield '<g>\n'
+        for node in range(self.node_count):
+            x, y, width = self.x[node], self.y(node), self.width[node]
+            stroke = CYCLE_COLOR if self.cyclic[node] else '#4a4a4a'
+            yield (f'<g><title>{escape(names[node])}</title>'
+                   f'<rect x="{x - width / 2:.1f}" y="{y - half:.1f}" width="{width:.0f}" height="{NODE_HEIGHT}" '
+                   f'rx="4" fill="#ffffff" stroke="{stroke}"/>'
+                   f'<text x="{x:.1f}" y="{y + 4:.1f}" text-anchor="middle">{escape(names[node])}</text></g>\n')
+        yield '</g>\n'
+        yield '</svg>\n'
+
+    def html_lines(self, title: str = 'Граф зависимостей') -> Iterator[str]:
+        yield '<!DOCTYPE html>\n<html lang="ru">\n<head>\n<meta charset="utf-8">\n'
+        yield f'<title>{escape(title)}</title>\n'
+        yield ('<style>body{margin:0;font-family:Helvetica,Arial,sans-serif}'
+               'header{padding:8px 12px;background:#f4f4f4;border-bottom:1px solid #ddd}'
+               '#view{overflow:auto;height:calc(100vh - 40px)}svg{transform-origin:0 0}</style>\n')
+        yield '</head>\n<body>\n'
+        yield (f'<header>{escape(title)}: {self.node_count} пакетов, '
+               f'{len(self.chains) + len(self.routed)} зависимостей, '
+               f'{len(self.layers)} слоев (колесо мыши с Ctrl - масштаб)</header>\n')
+        yield '<div id="view">\n'
+        yield from self.svg_lines()
+        yield '</div>\n'
+        yield ('<script>let s=1;const v=document.getElementById("view"),g=v.querySelector("svg");'
+               'v.addEventListener("wheel",e=>{if(!e.ctrlKey)return;e.preventDefault();'
+               's=Math.min(4,Math.max(0.05,s*(e.deltaY<0?1.1:0.9)));g.style.transform="scale("+s+")";},'
+               '{passive:false});</script>\n')
+        yield '</body>\n</html>\n'
+
+
+def render_layout(graph: Any, out: IO[str], export_format: str = 'svg', iterations: int = 8,
+                  title: Optional[str] = None):
+    layout = LayeredLayout(graph, iterations).run()
+    lines = layout.html_lines(title or 'Граф зависимостей') if export_format == 'html' else layout.svg_lines()
+    out.writelines(lines)
@@ -0,0 +1,332 @@
+import argparse
+import gzip
+import hashlib
+import http.server
+import json
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from cargo_semver import parse_version
+from cargo_synth import FANOUT_DISTRIBUTIONS, generate_synthetic
+
+
+# Набор данных: имя пакета -> номер версии -> список зависимостей {'name', 'req', 'kind'};
+# версии перечислены от старых к новым
+Dataset = Dict[str, Dict[str, List[Dict[str, str]]]]
+
+
+def dataset_from_repository(repository: Dict[str, Any]) -> Dataset:
+    # Формат тестового репозитория ({"A": ["B", ...]}) дает одну версию 1.0.0 на пакет;
+    # версионированный формат: {"A": {"1.0.0": ["B", {"name": "C", "req": "^2"}]}}
+    dataset: Dataset = {}
+    for package, value in repository.items():
+        versions = value if isinstance(value, dict) else {'1.0.0': value}
+        dataset[package] = {}
+        for version, dependencies in versions.items():
+            dataset[package][version] = [
+                {'name': dep, 'req': '^1', 'kind': 'normal'} if isinstance(dep, str)
+                else {'name': dep['name'], 'req': dep.get('req', '*'), 'kind': dep.get('kind', 'normal')}
+                for dep in dependencies
+            ]
+    return dataset
+
+
+def dataset_from_snapshot(snapshot: Dict[str, Any]) -> Dataset:
+    # Снимок графа (--snapshot) - запись реального обхода: "имя\tверсия" -> зависимости;
+    # запрос без версии ("latest") становится самой новой из известных версий пакета
+    recorded: Dict[str, Dict[str, List[Dict[str, str]]]] = {}
+    for key, dependencies in snapshot.get('dependencies', {}).items():
+        package, version = key.split('\t', 1)
+        recorded.setdefault(package, {})[version] = [
+            {'name': dep['name'], 'req': dep.get('version', '*'), 'kind': dep.get('kind', 'normal')}
+            for dep in dependencies
+        ]
+
+    dataset: Dataset = {}
+    for package, versions in recorded.items():
+        known = {version for version in [*snapshot.get('versions', {}).get(package, []), *versions]
+                 if parse_version(version)}
+        ordered = sorted(known, key=parse_version) or ['1.0.0']
+        latest = versions.pop('latest', None)
+        if latest is not None and ordered[-1] not in versions:
+            versions[ordered[-1]] = latest
+        # Версии без записанных зависимостей отдаются с пустым списком
+        dataset[package] = {version: versions.get(version, []) for version in ordered}
+    return dataset
+
+
+def load_dataset(path: str) -> Dataset:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and data.get('format') == 1 and 'dependencies' in data:
+        return dataset_from_snapshot(data)
+    if isinstance(data, dict) and isinstance(data.get('packages'), list):
+        data = {package['name']: package.get('dependencies', []) for package in data['packages']}
+    return dataset_from_repository(data)
+
+
+def index_path(package_name: str) -> str:
+    name = package_name.lower()
+    if len(name) <= 2:
+        return f"{len(name)}/{name}"
+    if len(name) == 3:
+        return f"3/{name[0]}/{name}"
+    return f"{name[0:2]}/{name[2:4]}/{name}"
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> Optional[float]:
+        # None - запрос разрешен, иначе - через сколько секунд появится маркер
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return None
+            return (1 - self.tokens) / self.rate
+
+
+class MockRegistry:
+
+    # Локальная замена crates.io: API /api/v1/crates/<имя>[/<версия>/dependencies]
+    # и sparse-индекс /index/... с настраиваемыми задержкой, полосой, ошибками и лимитом запросов
+    def __init__(self, dataset: Dataset, latency: float = 0.0, jitter: float = 0.0,
+                 connect_delay: float = 0.0, bandwidth: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: float = 0.0, burst: int = 10, seed: int = 18):
+        self.dataset = {package.lower(): versions for package, versions in dataset.items()}
+        self.latency = latency
+        self.jitter = jitter
+        self.connect_delay = connect_delay
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit > 0 else None
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats: Dict[str, int] = {'requests': 0, 'connections': 0, 'ok': 0, 'not_modified': 0,
+                                      'not_found': 0, 'errors': 0, 'rate_limited': 0, 'bytes': 0}
+        self.server: Optional[http.server.ThreadingHTTPServer] = None
+
+    def reset_stats(self) -> Dict[str, int]:
+        with self.lock:
+            stats = dict(self.stats)
+            for key in self.stats:
+                self.stats[key] = 0
+        return stats
+
+    def count(self, key: str, amount: int = 1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def random(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+    def crate_document(self, package: str) -> Optional[Dict[str, Any]]:
+        versions = self.dataset.get(package)
+        if versions is None:
+            return None
+        # Как в crates.io: версии от новых к старым, зависимости - отдельным запросом
+        return {
+            'crate': {'id': package, 'name': package, 'max_version': list(versions)[-1]},
+            'versions': [{'crate': package, 'num': version, 'yanked': False}
+                         for version in reversed(list(versions))],
+        }
+
+    def dependencies_document(self, package: str, version: str) -> Optional[Dict[str, Any]]:
+        dependencies = self.dataset.get(package, {}).get(version)
+        if dependencies is None:
+            return None
+        return {'dependencies': [{'crate_id': dep['name'], 'req': dep['req'], 'kind': dep['kind'],
+                                  'optional': False} for dep in dependencies]}
+
+    def index_file(self, package: str) -> Optional[bytes]:
+        versions = self.dataset.get(package)
+        if versions is None:
+            return None
+        lines = [json.dumps({'name': package, 'vers': version,
+                             'deps': [{'name': dep['name'], 'req': dep['req'], 'kind': dep['kind']}
+                                      for dep in dependencies],
+                             'yanked': False})
+                 for version, dependencies in versions.items()]
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def route(self, path: str, base_url: str) -> Tuple[int, Optional[bytes], str]:
+        parts = [part for part in path.split('/') if part]
+
+        if parts[:3] == ['api', 'v1', 'crates'] and len(parts) == 4:
+            document = self.crate_document(parts[3].lower())
+        elif parts[:3] == ['api', 'v1', 'crates'] and len(parts) == 6 and parts[5] == 'dependencies':
+            document = self.dependencies_document(parts[3].lower(), parts[4])
+        elif parts == ['index', 'config.json']:
+            document = {'dl': f"{base_url}/api/v1/crates", 'api': base_url}
+        elif parts[:1] == ['index'] and len(parts) > 1:
+            body = self.index_file(parts[-1].lower())
+            return (200, body, 'text/plain') if body is not None else (404, None, 'text/plain')
+        elif parts == ['__stats']:
+            with self.lock:
+                document = dict(self.stats)
+        else:
+            document = None
+
+        if document is None:
+            return 404, json.dumps({'errors': [{'detail': 'Not Found'}]}).encode('utf-8'), 'application/json'
+        return 200, json.dumps(document).encode('utf-8'), 'application/json'
+
+    def create_server(self, host: str = '127.0.0.1', port: int = 0) -> http.server.ThreadingHTTPServer:
+        registry = self
+
+        class RegistryHandler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                # Имитация стоимости установки TCP/TLS соединения
+                registry.count('connections')
+                if registry.connect_delay:
+                    time.sleep(registry.connect_delay)
+                super().setup()
+
+            def send_body(self, status: int, body: bytes, content_type: str, headers: Dict[str, str]):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+
+                if registry.bandwidth and body:
+                    # Ограничение полосы: тело отдается частями с паузами
+                    chunk = max(1024, int(registry.bandwidth / 20))
+                    for start in range(0, len(body), chunk):
+                        self.wfile.write(body[start:start + chunk])
+                        time.sleep(min(chunk, len(body) - start) / registry.bandwidth)
+                else:
+                    self.wfile.write(body)
+                registry.count('bytes', len(body))
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                internal = path == '/__stats'
+                if not internal:
+                    registry.count('requests')
+
+                if not internal and registry.bucket is not None:
+                    wait = registry.bucket.take()
+                    if wait is not None:
+                        registry.count('rate_limited')
+                        self.send_body(429, b'{"errors":[{"detail":"rate limited"}]}', 'application/json',
+                                       {'Retry-After': str(max(1, round(wait)))})
+                        return
+
+                if not internal and (registry.latency or registry.jitter):
+                    time.sleep(registry.latency + registry.jitter * registry.random())
+
+                if not internal and registry.error_rate and registry.random() < registry.error_rate:
+                    registry.count('errors')
+                    self.send_body(500, b'{"errors":[{"detail":"injected error"}]}', 'application/json', {})
+                    return
+
+                host = self.headers.get('Host') or f"{self.server.server_address[0]}:{self.server.server_address[1]}"
+                status, body, content_type = registry.route(path, f"http://{host}")
+                if status == 404:
+                    registry.count('not_found')
+                    self.send_body(404, body or b'', content_type, {})
+                    return
+
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    registry.count('not_modified')
+                    self.send_body(304, b'', content_type, {'ETag': etag})
+                    return
+
+                headers = {'ETag': etag}
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body, compresslevel=5)
+                    headers['Content-Encoding'] = 'gzip'
+                registry.count('ok')
+                self.send_body(200, body, content_type, headers)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((host, port), RegistryHandler)
+        self.server.daemon_threads = True
+        return self.server
+
+    def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        server = self.create_server(host, port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return f"http://{host}:{server.server_address[1]}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Локальная замена crates.io для воспроизводимых замеров')
+    parser.add_argument('--dataset', help='JSON-файл с пакетами: тестовый репозиторий, '
+                                          '{"пакет": {"версия": [зависимости]}} или снимок графа (--snapshot)')
+    parser.add_argument('--nodes', type=int, default=1000,
+                        help='Число пакетов синтетического набора, если --dataset не указан (по умолчанию: 1000)')
+    parser.add_argument('--depth', type=int, default=10, help='Уровней синтетического набора (по умолчанию: 10)')
+    parser.add_argument('--fanout', type=float, default=3.0, help='Среднее число зависимостей (по умолчанию: 3)')
+    parser.add_argument('--distribution', choices=FANOUT_DISTRIBUTIONS, default='uniform',
+                        help='Распределение числа зависимостей (по умолчанию: uniform)')
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес сервера (по умолчанию: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8019, help='Порт сервера (по умолчанию: 8019)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка ответа, мс (по умолчанию: 0)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Случайная добавка к задержке, мс (по умолчанию: 0)')
+    parser.add_argument('--connect-delay', type=float, default=0.0,
+                        help='Задержка установки соединения, мс (по умолчанию: 0)')
+    parser.add_argument('--bandwidth', type=float, default=0.0,
+                        help='Полоса на соединение, КБ/с (по умолчанию: 0 - без ограничения)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 500 (по умолчанию: 0)')
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help='Разрешенных запросов в секунду, сверх - 429 с Retry-After (по умолчанию: без лимита)')
+    parser.add_argument('--burst', type=int, default=10, help='Допустимый всплеск запросов (по умолчанию: 10)')
+    parser.add_argument('--seed', type=int, default=18, help='Начальное значение генератора (по умолчанию: 18)')
+    args = parser.parse_args()
+
+    try:
+        if args.dataset:
+            dataset = load_dataset(args.dataset)
+        else:
+            dataset = dataset_from_repository(generate_synthetic(args.nodes, args.depth, args.fanout,
+                                                                 args.distribution, 0.0, args.seed))
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Ошибка загрузки набора данных: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    registry = MockRegistry(dataset, args.latency / 1000, args.jitter / 1000, args.connect_delay / 1000,
+                            args.bandwidth * 1024, args.error_rate, args.rate_limit, args.burst, args.seed)
+    server = registry.create_server(args.host, args.port)
+    base_url = f"http://{args.host}:{server.server_address[1]}"
+    print(f"Локальный реестр: {base_url} (пакетов: {len(dataset)})")
+    print(f"  API:          --repository {base_url}")
+    print(f"  sparse-индекс: --repository sparse+{base_url}/index/")
+    print(f"  статистика:   {base_url}/__stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class Hooks:
+
+    # Интерфейс инструментирования: источники, HTTP-клиент и DependencyGraph вызывают
+    # эти методы с моментами time.perf_counter(); базовая реализация ничего не делает
+    enabled = False
+
+    def fetch(self, package_name: str, version: str, start: float, end: float,
+              dependencies: int, error: Optional[BaseException] = None):
+        pass
+
+    def http(self, key: str, url: str, start: float, end: float, size: int, cache: str,
+             status: Optional[int] = None):
+        pass
+
+    def decode(self, key: str, start: float, end: float, size: int):
+        pass
+
+    def retry(self, url: str, error: BaseException):
+        pass
+
+    def phase(self, name: str, start: float, end: float, **details: Any):
+        pass
+
+    def total(self, name: str, seconds: float, count: int):
+        # Суммарное время мелких операций, которые невыгодно записывать по одной
+        pass
+
+
+NO_HOOKS = Hooks()
+
+
+def install_hooks(fetcher: Any, hooks: Hooks):
+    # Хуки ставятся на источник и на все, что под ним: обертки, HTTP-клиент и пул соединений
+    seen = set()
+    while fetcher is not None and id(fetcher) not in seen:
+        seen.add(id(fetcher))
+        if hasattr(fetcher, 'hooks'):
+            fetcher.hooks = hooks
+        http_client = getattr(fetcher, 'http_client', None)
+        if http_client is not None:
+            http_client.hooks = hooks
+            http_client.pool.hooks = hooks
+            http_client.scheduler.hooks = hooks
+        fetcher = getattr(fetcher, 'fetcher', None)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Profiler(Hooks):
+
+    enabled = True
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+        # События в формате Chrome trace event (ph="X" - интервал с длительностью)
+        self.events: List[Dict[str, Any]] = []
+        self.fetches: List[Dict[str, Any]] = []
+        self.http_requests: List[Dict[str, Any]] = []
+        self.decodes: List[float] = []
+        self.decoded_bytes = 0
+        self.retries = 0
+        self.phases: Dict[str, float] = {}
+        self.totals: Dict[str, Dict[str, float]] = {}
+
+    def add_event(self, name: str, category: str, start: float, end: float, args: Dict[str, Any]):
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((start - self.origin) * 1e6, 1),
+            'dur': round((end - start) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def fetch(self, package_name: str, version: str, start: float, end: float,
+              dependencies: int, error: Optional[BaseException] = None):
+        record = {'package': package_name, 'version': version, 'seconds': end - start,
+                  'dependencies': dependencies, 'error': str(error) if error else None}
+        with self.lock:
+            self.fetches.append(record)
+        self.add_event(f"{package_name}@{version}", 'fetch', start, end, record)
+
+    def http(self, key: str, url: str, start: float, end: float, size: int, cache: str,
+             status: Optional[int] = None):
+        record = {'key': key, 'url': url, 'seconds': end - start, 'bytes': size, 'cache': cache,
+                  'status': status}
+        with self.lock:
+            self.http_requests.append(record)
+        self.add_event(key, 'http', start, end, record)
+
+    def decode(self, key: str, start: float, end: float, size: int):
+        with self.lock:
+            self.decodes.append(end - start)
+            self.decoded_bytes += size
+        self.add_event(key, 'decode', start, end, {'bytes': size})
+
+    def retry(self, url: str, error: BaseException):
+        with self.lock:
+            self.retries += 1
+        now = time.perf_counter()
+        self.add_event(url, 'retry', now, now, {'error': str(error)})
+
+    def phase(self, name: str, start: float, end: float, **details: Any):
+        with self.lock:
+            self.phases[name] = self.phases.get(name, 0.0) + (end - start)
+        self.add_event(name, 'phase', start, end, details)
+
+    def total(self, name: str, seconds: float, count: int):
+        with self.lock:
+            record = self.totals.setdefault(name, {'seconds': 0.0, 'count': 0})
+            record['seconds'] += seconds
+            record['count'] += count
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = [record['seconds'] for record in self.fetches]
+        cache_states: Dict[str, int] = {}
+        for record in self.http_requests:
+            cache_states[record['cache']] = cache_states.get(record['cache'], 0) + 1
+
+        return {
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'totals': {name: {'seconds': round(record['seconds'], 6), 'count': record['count']}
+                       for name, record in self.totals.items()},
+            'fetch': {
+                'count': len(latencies),
+                'errors': sum(1 for record in self.fetches if record['error']),
+                'total_seconds': round(sum(latencies), 6),
+                'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+                'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+                'max_ms': round(max(latencies, default=0.0) * 1000, 3),
+                'slowest': [{'package': record['package'], 'version': record['version'],
+                             'ms': round(record['seconds'] * 1000, 3)}
+                            for record in sorted(self.fetches, key=lambda record: -record['seconds'])[:10]],
+            },
+            'http': {
+                'requests': len(self.http_requests),
+                'bytes': sum(record['bytes'] for record in self.http_requests),
+                'total_seconds': round(sum(record['seconds'] for record in self.http_requests), 6),
+                'cache': cache_states,
+                'retries': self.retries,
+            },
+            'decode': {
+                'count': len(self.decodes),
+                'bytes': self.decoded_bytes,
+                'total_seconds': round(sum(self.decodes), 6),
+            },
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        fetch, http, decode = summary['fetch'], summary['http'], summary['decode']
+
+        print(f"\nПрофиль выполнения:")
+        print("=" * 60)
+        print(f"{'Этап':<32}{'время, с':>12}")
+        print("-" * 44)
+        for name, seconds in summary['phases'].items():
+            print(f"{name:<32}{seconds:>12.4f}")
+        for name, record in summary['totals'].items():
+            print(f"{name + ' (сумма)':<32}{record['seconds']:>12.4f}   вызовов: {record['count']}")
+        print(f"{'загрузка пакетов (сумма)':<32}{fetch['total_seconds']:>12.4f}")
+        print(f"{'HTTP (сумма)':<32}{http['total_seconds']:>12.4f}")
+        print(f"{'разбор JSON (сумма)':<32}{decode['total_seconds']:>12.4f}")
+
+        print(f"\nЗагрузок пакетов: {fetch['count']}, ошибок: {fetch['errors']}")
+        print(f"Задержка, мс: среднее {fetch['mean_ms']}, p50 {fetch['p50_ms']}, "
+              f"p95 {fetch['p95_ms']}, максимум {fetch['max_ms']}")
+        cache = ", ".join(f"{state} {count}" for state, count in sorted(http['cache'].items())) or "-"
+        print(f"HTTP-запросов: {http['requests']}, получено байт: {http['bytes']}, "
+              f"кэш: {cache}, повторов: {http['retries']}")
+        print(f"Разборов JSON: {decode['count']}, байт: {decode['bytes']}")
+
+        if fetch['slowest']:
+            print(f"\nСамые медленные пакеты:")
+            for record in fetch['slowest']:
+                print(f"  {record['package']}@{record['version']}: {record['ms']} мс")
+        print("=" * 60)
+
+    def write_trace(self, path: str):
+        # Формат Chrome trace event: открывается в chrome://tracing, Perfetto и speedscope
+        with self.lock:
+            trace = {'traceEvents': list(self.events), 'displayTimeUnit': 'ms',
+                     'otherData': {'summary': self.summary()}}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
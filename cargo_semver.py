@@ -0,0 +1,216 @@
+import bisect
+import re
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+# (major, minor, patch, 1 для релиза / 0 для pre-release, идентификаторы pre-release)
+VersionKey = Tuple[int, int, int, int, Tuple[Tuple[int, Any], ...]]
+
+VERSION_RE = re.compile(
+    r'^v?(\d+|\*|x|X)(?:\.(\d+|\*|x|X))?(?:\.(\d+|\*|x|X))?'
+    r'(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$'
+)
+COMPARATOR_RE = re.compile(r'^(\^|~|=|>=|<=|>|<)?\s*(.+)$')
+
+
+def prerelease_key(prerelease: Optional[str]) -> Tuple[Tuple[int, Any], ...]:
+    if not prerelease:
+        return ()
+    # Числовые идентификаторы меньше буквенных и сравниваются как числа
+    return tuple((0, int(part)) if part.isdigit() else (1, part) for part in prerelease.split('.'))
+
+
+def version_key(major: int, minor: int, patch: int, prerelease: Optional[str] = None) -> VersionKey:
+    if prerelease:
+        return major, minor, patch, 0, prerelease_key(prerelease)
+    return major, minor, patch, 1, ()
+
+
+def lowest_key(major: int, minor: int = 0, patch: int = 0) -> VersionKey:
+    # Меньше любой версии major.minor.patch, включая pre-release
+    return major, minor, patch, 0, ()
+
+
+def parse_partial(text: str) -> Optional[Tuple[Optional[int], Optional[int], Optional[int], Optional[str]]]:
+    match = VERSION_RE.match(text.strip())
+    if not match:
+        return None
+
+    parts = [None if part is None or part in '*xX' else int(part) for part in match.groups()[:3]]
+    # После подстановочного знака все младшие части тоже считаются подстановочными
+    for i in range(1, 3):
+        if parts[i - 1] is None:
+            parts[i] = None
+    return parts[0], parts[1], parts[2], match.group(4)
+
+
+def has_wildcard(text: str) -> bool:
+    # Подстановочный знак ищется только в major.minor.patch: в pre-release (1.0.0-x.1) это обычный символ
+    match = VERSION_RE.match(text.strip())
+    return bool(match) and any(part in ('*', 'x', 'X') for part in match.groups()[:3])
+
+
+def parse_version(text: str) -> Optional[VersionKey]:
+    parsed = parse_partial(text)
+    if not parsed or parsed[2] is None:
+        return None
+    major, minor, patch, prerelease = parsed
+    return version_key(major, minor, patch, prerelease)
+
+
+def comparator_bounds(op: str, major: Optional[int], minor: Optional[int], patch: Optional[int],
+                      prerelease: Optional[str]) -> List[Tuple[str, VersionKey]]:
+    if major is None:
+        return []
+
+    exact = version_key(major, minor or 0, patch or 0, prerelease)
+
+    if op in ('', '^'):
+        if minor is None or major > 0:
+            upper = lowest_key(major + 1)
+        elif patch is None or minor > 0:
+            upper = lowest_key(0, minor + 1)
+        else:
+            upper = lowest_key(0, 0, patch + 1)
+        return [('>=', exact), ('<', upper)]
+
+    if op == '~':
+        upper = lowest_key(major + 1) if minor is None else lowest_key(major, minor + 1)
+        return [('>=', exact), ('<', upper)]
+
+    if op == '=':
+        if minor is None:
+            return [('>=', exact), ('<', lowest_key(major + 1))]
+        if patch is None:
+            return [('>=', exact), ('<', lowest_key(major, minor + 1))]
+        return [('>=', exact), ('<=', exact)]
+
+    if op == '>':
+        if minor is None:
+            return [('>=', lowest_key(major + 1))]
+        if patch is None:
+            return [('>=', lowest_key(major, minor + 1))]
+        return [('>', exact)]
+
+    if op == '>=':
+        return [('>=', exact)]
+
+    if op == '<':
+        if patch is None:
+            return [('<', lowest_key(major, minor or 0))]
+        return [('<', exact)]
+
+    if op == '<=':
+        if minor is None:
+            return [('<', lowest_key(major + 1))]
+        if patch is None:
+            return [('<', lowest_key(major, minor + 1))]
+        return [('<=', exact)]
+
+    return []
+
+
+# Версии major.minor.patch, pre-release которых допускает требование, и границы диапазона
+CompiledRequirement = Tuple[FrozenSet[Tuple[int, int, int]], Tuple[Tuple[str, VersionKey], ...]]
+
+
+@lru_cache(maxsize=4096)
+def compile_requirement(requirement: str) -> Optional[CompiledRequirement]:
+    bounds: List[Tuple[str, VersionKey]] = []
+    prerelease_versions = set()
+
+    for comparator in requirement.split(','):
+        comparator = comparator.strip()
+        if not comparator:
+            continue
+
+        match = COMPARATOR_RE.match(comparator)
+        parsed = parse_partial(match.group(2)) if match else None
+        if not parsed:
+            return None
+
+        op = match.group(1) or ''
+        # Версия без оператора в Cargo означает ^, а с подстановочным знаком - диапазон
+        if op == '' and has_wildcard(match.group(2)):
+            op = '='
+        if parsed[3]:
+            # Как в Cargo: pre-release подходит, только если сравнение указано с pre-release
+            # той же версии major.minor.patch (>=2.0.0-alpha не допускает 2.1.0-rc.1)
+            prerelease_versions.add((parsed[0] or 0, parsed[1] or 0, parsed[2] or 0))
+
+        bounds.extend(comparator_bounds(op, *parsed))
+
+    return frozenset(prerelease_versions), tuple(bounds)
+
+
+class VersionIndex:
+
+    def __init__(self, versions: Iterable[str]):
+        parsed = sorted((key, version) for version in versions
+                        for key in [parse_version(version)] if key is not None)
+
+        self.all_keys = [key for key, _ in parsed]
+        self.all_versions = [version for _, version in parsed]
+        self.stable_keys = [key for key, _ in parsed if key[3] == 1]
+        self.stable_versions = [version for key, version in parsed if key[3] == 1]
+
+    def __len__(self) -> int:
+        return len(self.all_versions)
+
+    def max_satisfying(self, requirement: str) -> Optional[str]:
+        compiled = compile_requirement(requirement.strip() or '*')
+        if compiled is None:
+            return None
+
+        prerelease_versions, bounds = compiled
+        if prerelease_versions:
+            keys, versions = self.all_keys, self.all_versions
+        else:
+            keys, versions = self.stable_keys, self.stable_versions
+
+        # Каждое ограничение сужает диапазон индексов двоичным поиском
+        low, high = 0, len(keys)
+        for op, key in bounds:
+            if op == '>=':
+                low = max(low, bisect.bisect_left(keys, key))
+            elif op == '>':
+                low = max(low, bisect.bisect_right(keys, key))
+            elif op == '<':
+                high = min(high, bisect.bisect_left(keys, key))
+            elif op == '<=':
+                high = min(high, bisect.bisect_right(keys, key))
+
+        if not prerelease_versions:
+            return versions[high - 1] if high > low else None
+
+        # Наибольшая версия диапазона - релиз или разрешенный pre-release
+        for position in range(high - 1, low - 1, -1):
+            key = keys[position]
+            if key[3] == 1 or key[:3] in prerelease_versions:
+                return versions[position]
+        return None
+
+
+class VersionResolver:
+
+    def __init__(self, fetcher: Any):
+        self.fetcher = fetcher
+        self.indexes: Dict[str, VersionIndex] = {}
+        # Пакет -> ошибка получения списка версий; такой пакет до конца обхода
+        # остается без версии, и все ребра к нему ведут в один и тот же узел
+        self.failures: Dict[str, Exception] = {}
+
+    def get_index(self, package_name: str) -> VersionIndex:
+        index = self.indexes.get(package_name)
+        if index is None:
+            try:
+                versions = self.fetcher.get_versions(package_name)
+            except Exception as e:
+                self.failures[package_name] = e
+                versions = []
+            index = self.indexes.setdefault(package_name, VersionIndex(versions))
+        return index
+
+    def resolve(self, package_name: str, requirement: str) -> Optional[str]:
+        return self.get_index(package_name).max_satisfying(requirement)
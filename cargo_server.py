@@ -0,0 +1,215 @@
+import http.server
+import json
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+class GraphState:
+
+    # Опубликованный граф не изменяется: обновление строит новый граф и подменяет
+    # ссылку на состояние, читатели продолжают работать со своим экземпляром
+    def __init__(self, graph: Any, results: Dict[str, Dict[str, Any]], build_seconds: float):
+        self.graph = graph
+        self.results = results
+        self.build_seconds = build_seconds
+        self.built_at = time.time()
+
+        # Компоненты считаются до публикации, чтобы читатели не строили их одновременно
+        graph.compute_components()
+        self.cycles = [graph.component_cycle(component) for component in graph.find_cyclic_components()]
+
+    def package_ids(self, package: str) -> List[int]:
+        # Узел пакет@версия или имя пакета - тогда все его версии в графе
+        package_ids = [self.graph.ids[node] for node in self.graph.nodes_for(package)]
+        if not package_ids:
+            raise KeyError(package)
+        return package_ids
+
+    def dependencies(self, package: str, transitive: bool = False) -> List[str]:
+        package_ids = self.package_ids(package)
+        names = self.graph.names
+        if transitive:
+            return sorted(set().union(*(self.graph.transitive_dependencies(names[package_id])
+                                        for package_id in package_ids)))
+        return list(dict.fromkeys(names[child] for package_id in package_ids
+                                  for child in self.graph.successors(package_id)))
+
+    def reverse_dependencies(self, package: str, transitive: bool = False) -> List[str]:
+        package_ids = self.package_ids(package)
+        names = self.graph.names
+        if transitive:
+            return sorted(set().union(*(self.graph.transitive_dependents(names[package_id])
+                                        for package_id in package_ids)))
+        return sorted({names[parent] for package_id in package_ids
+                       for parent in self.graph.predecessors(package_id)})
+
+    def paths(self, source: str, target: str, k: int = 1) -> List[List[str]]:
+        paths = self.graph.k_shortest_paths(source, target, k)
+        if not paths:
+            # Нет пути и нет пакета - разные ответы: для неизвестного имени 404
+            self.package_ids(source)
+            self.package_ids(target)
+        return paths
+
+
+class GraphService:
+
+    def __init__(self, build: Callable[[], Tuple[Any, Dict[str, Dict[str, Any]]]],
+                 refresh_interval: int = 0):
+        self.build = build
+        self.refresh_interval = refresh_interval
+        self.state: Optional[GraphState] = None
+        self.last_error: Optional[str] = None
+        self.refreshes = 0
+        self.refresh_requested = threading.Event()
+        self.refresh_lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def refresh(self) -> bool:
+        # Одновременно выполняется не больше одного перестроения
+        if not self.refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            start = time.perf_counter()
+            graph, results = self.build()
+            self.state = GraphState(graph, results, time.perf_counter() - start)
+            self.last_error = None
+            self.refreshes += 1
+            return True
+        except Exception as e:
+            # Ошибка обновления не отменяет ранее опубликованный граф
+            self.last_error = str(e)
+            print(f"Ошибка обновления графа: {e}", file=sys.stderr)
+            return False
+        finally:
+            self.refresh_lock.release()
+
+    def refresh_loop(self):
+        while not self.stopped.is_set():
+            timeout = self.refresh_interval if self.refresh_interval > 0 else None
+            self.refresh_requested.wait(timeout)
+            self.refresh_requested.clear()
+            if not self.stopped.is_set():
+                self.refresh()
+
+    def status(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            'ready': state is not None,
+            'roots': list(state.results) if state else [],
+            'packages': len(state.graph.names) if state else 0,
+            'build_seconds': round(state.build_seconds, 3) if state else None,
+            'built_at': state.built_at if state else None,
+            'refreshes': self.refreshes,
+            'refresh_interval': self.refresh_interval,
+            'last_error': self.last_error,
+        }
+
+    def query(self, route: str, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        if route == '/status':
+            return 200, self.status()
+        if route == '/refresh':
+            self.refresh_requested.set()
+            return 202, {'refresh': 'scheduled'}
+
+        state = self.state
+        if state is None:
+            return 503, {'error': 'граф еще строится'}
+
+        try:
+            if route == '/deps':
+                package = params['package']
+                transitive = params.get('transitive', '') in ('1', 'true', 'yes')
+                return 200, {'package': package, 'transitive': transitive,
+                             'dependencies': state.dependencies(package, transitive)}
+            if route == '/rdeps':
+                package = params['package']
+                transitive = params.get('transitive', '') in ('1', 'true', 'yes')
+                return 200, {'package': package, 'transitive': transitive,
+                             'dependents': state.reverse_dependencies(package, transitive)}
+            if route == '/cycles':
+                return 200, {'cycles': state.cycles}
+            if route == '/path':
+                source, target = params['from'], params['to']
+                paths = state.paths(source, target, max(1, int(params.get('k', '1'))))
+                return 200, {'from': source, 'to': target, 'path': paths[0] if paths else None,
+                             'paths': paths}
+        except KeyError as e:
+            return 404, {'error': f"нет в графе или не указан параметр: {e.args[0]}"}
+        except ValueError as e:
+            return 400, {'error': str(e)}
+
+        return 404, {'error': f"неизвестный запрос: {route}"}
+
+    def create_server(self, host: str, port: int) -> http.server.ThreadingHTTPServer:
+        service = self
+
+        class QueryHandler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def respond(self):
+                url = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                start = time.perf_counter()
+                status, payload = service.query(url.path.rstrip('/') or '/', params)
+                payload['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = respond
+
+            def do_POST(self):
+                # Параметры передаются в строке запроса; тело читается и отбрасывается,
+                # иначе на keep-alive соединении оно было бы разобрано как следующий запрос
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                except ValueError:
+                    self.send_error(400, 'Некорректный Content-Length')
+                    return
+                if length > 0:
+                    self.rfile.read(length)
+                if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+                    # Тело неизвестной длины не разбирается - соединение закрывается после ответа
+                    self.close_connection = True
+                self.respond()
+
+            def log_message(self, format, *args):
+                pass
+
+        return http.server.ThreadingHTTPServer((host, port), QueryHandler)
+
+    def serve(self, host: str = '127.0.0.1', port: int = 8018):
+        server = self.create_server(host, port)
+        # Первое построение идет в фоне: пока оно не закончено, запросы получают 503
+        threading.Thread(target=self.refresh_loop, daemon=True).start()
+        self.refresh_requested.set()
+
+        print(f"Сервер запросов запущен: http://{host}:{server.server_address[1]} "
+              f"(/deps, /rdeps, /cycles, /path, /status, /refresh)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stopped.set()
+            self.refresh_requested.set()
+            server.server_close()
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(':')
+    try:
+        port_number = int(port)
+    except ValueError:
+        raise ValueError(f"Некорректный адрес сервера '{value}': ожидается [HOST:]PORT")
+    if not 0 <= port_number <= 65535:
+        raise ValueError(f"Некорректный порт сервера: {port_number}")
+    return host or '127.0.0.1', port_number
@@ -0,0 +1,107 @@
+import argparse
+import json
+import random
+import sys
+from typing import Dict, List
+
+
+FANOUT_DISTRIBUTIONS = ('fixed', 'uniform', 'powerlaw')
+
+
+def draw_fanout(rng: random.Random, distribution: str, fanout: float, limit: int) -> int:
+    if distribution == 'fixed':
+        count = int(round(fanout))
+    elif distribution == 'uniform':
+        count = rng.randint(0, max(0, int(round(2 * fanout))))
+    else:
+        # Парето с показателем 2 имеет среднее 2 * xmin: xmin = fanout / 2; большинство
+        # пакетов получает мало зависимостей, немногие - очень много
+        count = int(rng.paretovariate(2.0) * fanout / 2)
+    return min(count, limit)
+
+
+def generate_synthetic(nodes: int, depth: int = 10, fanout: float = 3.0,
+                       distribution: str = 'uniform', cycle_density: float = 0.0,
+                       seed: int = 18, skip_rate: float = 0.2) -> Dict[str, List[str]]:
+    # Пакеты распределяются по depth уровням; P0 - единственный корень, каждый пакет
+    # уровня l > 0 получает родителя на уровне l - 1, поэтому весь граф достижим из
+    # корня, а длина самой длинной цепочки без циклов равна depth - 1. При skip_rate=0
+    # ребра идут только на соседний уровень, и любой пакет уровня l лежит на глубине l
+    if nodes < 1:
+        return {}
+    if distribution not in FANOUT_DISTRIBUTIONS:
+        raise ValueError(f"Неизвестное распределение числа зависимостей: {distribution}")
+
+    rng = random.Random(seed)
+    depth = max(1, min(depth, nodes))
+    names = [f"P{i}" for i in range(nodes)]
+    levels: List[List[int]] = [[0]]
+    rest = nodes - 1
+    for level in range(1, depth):
+        size = rest // (depth - level)
+        start = nodes - rest
+        levels.append(list(range(start, start + size)))
+        rest -= size
+
+    edges: List[Dict[int, None]] = [{} for _ in range(nodes)]
+    for level in range(1, depth):
+        parents = levels[level - 1]
+        for node in levels[level]:
+            edges[rng.choice(parents)][node] = None
+
+    for level in range(depth - 1):
+        below = levels[level + 1]
+        for node in levels[level]:
+            for _ in range(draw_fanout(rng, distribution, fanout, len(below))):
+                # Дополнительные зависимости - в основном на следующий уровень, иногда глубже
+                target_level = rng.randint(level + 1, depth - 1) if rng.random() < skip_rate else level + 1
+                edges[node][rng.choice(levels[target_level])] = None
+
+    # Обратные ребра на более высокий уровень создают циклы; cycle_density - доля пакетов с таким ребром
+    if cycle_density > 0:
+        for level in range(1, depth):
+            for node in levels[level]:
+                if rng.random() < cycle_density:
+                    edges[node][rng.choice(levels[rng.randint(0, level - 1)])] = None
+
+    return {names[node]: [names[child] for child in edges[node]] for node in range(nodes)}
+
+
+def write_repository(path: str, repository: Dict[str, List[str]]):
+    # Формат TestRepositoryFetcher: {"имя": ["зависимость", ...], ...}
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n')
+        for index, (package, dependencies) in enumerate(repository.items()):
+            separator = ',\n' if index + 1 < len(repository) else '\n'
+            f.write(f"  {json.dumps(package)}: {json.dumps(dependencies)}{separator}")
+        f.write('}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генератор синтетического тестового репозитория')
+    parser.add_argument('target', help='JSON-файл тестового репозитория')
+    parser.add_argument('--nodes', type=int, default=1000, help='Число пакетов (по умолчанию: 1000)')
+    parser.add_argument('--depth', type=int, default=10, help='Число уровней графа (по умолчанию: 10)')
+    parser.add_argument('--fanout', type=float, default=3.0,
+                        help='Среднее число дополнительных зависимостей пакета (по умолчанию: 3)')
+    parser.add_argument('--distribution', choices=FANOUT_DISTRIBUTIONS, default='uniform',
+                        help='Распределение числа зависимостей (по умолчанию: uniform)')
+    parser.add_argument('--cycle-density', type=float, default=0.0,
+                        help='Доля пакетов с обратным ребром, образующим цикл (по умолчанию: 0)')
+    parser.add_argument('--seed', type=int, default=18, help='Начальное значение генератора (по умолчанию: 18)')
+    args = parser.parse_args()
+
+    if args.nodes < 1 or args.depth < 1 or args.fanout < 0 or not 0 <= args.cycle_density <= 1:
+        print("Ошибка параметров: число пакетов и уровней должно быть положительным, "
+              "fanout - неотрицательным, доля циклов - от 0 до 1", file=sys.stderr)
+        sys.exit(1)
+
+    repository = generate_synthetic(args.nodes, args.depth, args.fanout, args.distribution,
+                                    args.cycle_density, args.seed)
+    write_repository(args.target, repository)
+    edges = sum(len(dependencies) for dependencies in repository.values())
+    print(f"Записан тестовый репозиторий: {args.target} (пакетов: {len(repository)}, ребер: {edges})")
+
+
+if __name__ == "__main__":
+    main()
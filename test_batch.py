@@ -0,0 +1,54 @@
+import random
+from typing import Dict, List
+
+from KONF2_3 import CachingDependencyFetcher, DependencyGraph
+from test_cycles import assert_is_cycle, random_graph
+from test_engines import DictFetcher
+
+
+class CountingFetcher(DictFetcher):
+
+    def __init__(self, adjacency: Dict[str, List[str]]):
+        super().__init__(adjacency)
+        self.requests: List[str] = []
+
+    def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
+        self.requests.append(package_name)
+        return super().get_dependencies(package_name, version)
+
+
+def normalize(result: Dict) -> Dict:
+    return {
+        'graph': {package: sorted(dependencies) for package, dependencies in result['graph'].items()},
+        # Кратчайший цикл компоненты выбирается по порядку обхода, сравнивается их число
+        'cycles': len(result['cycles']),
+        'cyclic_components': {frozenset(component) for component in result['cyclic_components']},
+        'transitive_dependencies': result['transitive_dependencies'],
+        'packages_count': result['packages_count'],
+        'max_depth': result['max_depth'],
+    }
+
+
+def test_batch_matches_single_runs():
+    rng = random.Random(16)
+    for _ in range(120):
+        adjacency = random_graph(rng, rng.randint(1, 12), rng.randint(0, 25))
+        roots = rng.sample(list(adjacency), rng.randint(1, len(adjacency)))
+        max_depth = rng.choice([1, 2, 3, len(adjacency) + 1])
+        engine = rng.choice(['dfs', 'bfs'])
+
+        fetcher = CountingFetcher(adjacency)
+        shared = CachingDependencyFetcher(fetcher)
+        batch = DependencyGraph().build_graph_batch(roots, shared, max_depth=max_depth, engine=engine)
+        assert list(batch) == roots
+
+        for root in roots:
+            graph = DependencyGraph()
+            build = graph.build_graph_bfs if engine == 'bfs' else graph.build_graph_dfs
+            single = build(root, DictFetcher(adjacency), max_depth=max_depth)
+            assert normalize(batch[root]) == normalize(single), (adjacency, roots, root, max_depth, engine)
+            for cycle in batch[root]['cycles']:
+                assert_is_cycle(adjacency, cycle)
+
+        # Общий кэш: каждый пакет загружается из источника не больше одного раза
+        assert len(fetcher.requests) == len(set(fetcher.requests)) == shared.fetched
@@ -0,0 +1,105 @@
+import json
+import urllib.error
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import pytest
+
+import KONF2_2
+import KONF2_3
+
+
+class FakeClient:
+
+    # Ответы crates.io по пути запроса; запоминает все запрошенные URL
+    def __init__(self, documents: Dict[str, Any]):
+        self.documents = documents
+        self.urls: List[str] = []
+
+    def get_json(self, url: str, cache_key: Optional[str] = None) -> Any:
+        self.urls.append(url)
+        path = urlsplit(url).path
+        if path not in self.documents:
+            raise urllib.error.HTTPError(url, 404, 'Not Found', {}, None)
+        return self.documents[path]
+
+
+def dependencies(*names: str) -> Dict[str, Any]:
+    return {'dependencies': [{'crate_id': name, 'req': '^1', 'kind': 'normal'} for name in names]}
+
+
+DOCUMENTS = {
+    '/api/v1/crates/app': {'crate': {'name': 'app', 'default_version': '2.0.0', 'max_version': '2.1.0-rc.1'},
+                           'versions': [{'num': '2.1.0-rc.1'}, {'num': '2.0.0'}, {'num': '1.0.0'}]},
+    '/api/v1/crates/app/2.0.0/dependencies': dependencies('serde', 'log'),
+    '/api/v1/crates/app/1.0.0/dependencies': dependencies('serde'),
+    '/api/v1/crates/serde': {'crate': {'name': 'serde', 'max_version': '1.0.200'},
+                             'versions': [{'num': '1.0.200'}, {'num': '1.0.0', 'yanked': True}]},
+    '/api/v1/crates/serde/1.0.200/dependencies': dependencies(),
+    '/api/v1/crates/log': {'crate': {'name': 'log', 'max_stable_version': '0.4.22'}},
+    '/api/v1/crates/log/0.4.22/dependencies': dependencies('serde'),
+}
+
+
+def test_latest_version_uses_small_documents():
+    client = FakeClient(DOCUMENTS)
+    fetcher = KONF2_3.CargoDependencyFetcher(client)
+
+    assert [dep['name'] for dep in fetcher.get_dependencies('app')] == ['serde', 'log']
+    # Номер версии берется из сведений о пакете без истории релизов
+    assert client.urls == ['https://crates.io/api/v1/crates/app?include=default_version',
+                           'https://crates.io/api/v1/crates/app/2.0.0/dependencies']
+
+    assert [dep['name'] for dep in fetcher.get_dependencies('app', '1.0.0')] == ['serde']
+    assert client.urls[-1] == 'https://crates.io/api/v1/crates/app/1.0.0/dependencies'
+    assert len(client.urls) == 3
+
+
+def test_missing_version_is_an_error():
+    fetcher = KONF2_3.CargoDependencyFetcher(FakeClient(DOCUMENTS))
+    with pytest.raises(ValueError, match="'9.9.9'"):
+        fetcher.get_dependencies('app', '9.9.9')
+    # Неизвестный пакет по-прежнему не имеет зависимостей
+    assert fetcher.get_dependencies('missing') == []
+
+
+def test_requested_version_applies_to_root_only():
+    for jobs in (1, 4):
+        client = FakeClient(DOCUMENTS)
+        result = KONF2_3.DependencyGraph().build_graph_dfs(
+            'app', KONF2_3.CargoDependencyFetcher(client), version='1.0.0', jobs=jobs)
+
+        # Узлы графа - пары пакет@версия, требование зависимости разрешено по списку версий
+        assert {package: sorted(deps) for package, deps in result['graph'].items()} == {
+            'app@1.0.0': ['serde@1.0.200']}
+        assert sorted(url for url in client.urls if url.endswith('/dependencies')) == [
+            'https://crates.io/api/v1/crates/app/1.0.0/dependencies',
+            'https://crates.io/api/v1/crates/serde/1.0.200/dependencies']
+
+
+def test_stage_two_fetcher(capsys):
+    client = FakeClient(DOCUMENTS)
+    fetcher = KONF2_2.CargoDependencyFetcher(client)
+
+    assert [dep['name'] for dep in fetcher.get_dependencies('log')] == ['serde']
+    assert client.urls == ['https://crates.io/api/v1/crates/log?include=default_version',
+                           'https://crates.io/api/v1/crates/log/0.4.22/dependencies']
+
+    assert fetcher.get_dependencies('log', '0.1.0') == []
+    assert "Версия '0.1.0' пакета 'log' не найдена" in capsys.readouterr().err
+
+
+def test_sparse_index_mirror(tmp_path):
+    lines = [{'name': 'serde', 'vers': version, 'yanked': yanked,
+              'deps': [{'name': 'derive', 'package': 'serde_derive', 'req': '=' + version, 'kind': None}]}
+             for version, yanked in [('1.0.0', False), ('1.0.1', False), ('1.0.2', True)]]
+    (tmp_path / 'se' / 'rd').mkdir(parents=True)
+    (tmp_path / 'se' / 'rd' / 'serde').write_text('\n'.join(json.dumps(line) for line in lines) + '\n')
+    fetcher = KONF2_3.SparseIndexFetcher(f"file://{tmp_path}")
+
+    # Последняя версия - последний неотозванный релиз; переименованная зависимость - по имени пакета
+    assert fetcher.get_dependencies('serde') == [{'name': 'serde_derive', 'version': '=1.0.1', 'kind': 'normal'}]
+    assert fetcher.get_dependencies('serde', '1.0.0')[0]['version'] == '=1.0.0'
+    with pytest.raises(ValueError, match="'2.0.0'"):
+        fetcher.get_dependencies('serde', '2.0.0')
+    assert fetcher.get_dependencies('missing') == []
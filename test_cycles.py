@@ -0,0 +1,157 @@
+import random
+from typing import Dict, List, Set, Tuple
+
+from KONF2_3 import DependencyGraph
+
+
+def random_graph(rng: random.Random, nodes: int, edges: int) -> Dict[str, List[str]]:
+    names = [f"n{i}" for i in range(nodes)]
+    adjacency: Dict[str, List[str]] = {name: [] for name in names}
+    for _ in range(edges):
+        source, target = rng.choice(names), rng.choice(names)
+        if target not in adjacency[source]:
+            adjacency[source].append(target)
+    return adjacency
+
+
+def build(adjacency: Dict[str, List[str]]) -> DependencyGraph:
+    graph = DependencyGraph()
+    for package, dependencies in adjacency.items():
+        for dependency in dependencies:
+            graph.add_dependency(package, dependency)
+    return graph
+
+
+def canonical(cycle: List[str]) -> Tuple[str, ...]:
+    # Цикл без повторного начального узла, повернутый к наименьшему имени
+    members = cycle[:-1] if len(cycle) > 1 and cycle[0] == cycle[-1] else cycle
+    shift = members.index(min(members))
+    return tuple(members[shift:] + members[:shift])
+
+
+def brute_force_cycles(adjacency: Dict[str, List[str]]) -> Set[Tuple[str, ...]]:
+    # Все простые пути из каждого узла; цикл засчитывается при возврате в начало
+    cycles = set()
+
+    def extend(start: str, path: List[str]):
+        for child in adjacency.get(path[-1], []):
+            if child == start:
+                cycles.add(canonical(path + [start]))
+            elif child not in path:
+                extend(start, path + [child])
+
+    for start in adjacency:
+        extend(start, [start])
+    return cycles
+
+
+def reachable(adjacency: Dict[str, List[str]], start: str) -> Set[str]:
+    seen = set()
+    stack = [start]
+    while stack:
+        for child in adjacency.get(stack.pop(), []):
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+    return seen
+
+
+def assert_is_cycle(adjacency: Dict[str, List[str]], cycle: List[str]):
+    assert cycle[0] == cycle[-1]
+    for source, target in zip(cycle, cycle[1:]):
+        assert target in adjacency[source], (source, target)
+
+
+def test_enumerate_cycles_matches_brute_force():
+    rng = random.Random(8)
+    for _ in range(200):
+        adjacency = random_graph(rng, rng.randint(1, 7), rng.randint(0, 14))
+        graph = build(adjacency)
+
+        found = graph.enumerate_cycles(10 ** 6)
+        for cycle in found:
+            assert_is_cycle(adjacency, cycle)
+        # Каждый элементарный цикл выдается ровно один раз
+        assert len(found) == len({canonical(cycle) for cycle in found})
+        assert {canonical(cycle) for cycle in found} == brute_force_cycles(adjacency)
+
+
+def test_enumerate_cycles_respects_limit():
+    # Полный граф на 5 узлах: 84 элементарных цикла
+    names = [f"n{i}" for i in range(5)]
+    adjacency = {name: [other for other in names if other != name] for name in names}
+    graph = build(adjacency)
+    assert len(graph.enumerate_cycles(10 ** 6)) == 84
+    assert len(graph.enumerate_cycles(10)) == 10
+
+
+def test_cyclic_components_match_mutual_reachability():
+    rng = random.Random(18)
+    for _ in range(200):
+        adjacency = random_graph(rng, rng.randint(1, 9), rng.randint(0, 16))
+        graph = build(adjacency)
+
+        expected = set()
+        closure = {name: reachable(adjacency, name) for name in adjacency}
+        for name in adjacency:
+            component = frozenset(other for other in adjacency
+                                  if other in closure[name] and name in closure[other])
+            if component:
+                expected.add(component)
+
+        components = graph.find_cyclic_components()
+        assert {frozenset(component) for component in components} == expected
+
+        # Для каждой компоненты - один настоящий цикл по ее узлам
+        for component in components:
+            cycle = graph.component_cycle(component)
+            assert_is_cycle(adjacency, cycle)
+            assert set(cycle) <= set(component)
+
+
+def test_self_loop_and_acyclic_graph():
+    graph = build({'a': ['a', 'b'], 'b': ['c'], 'c': []})
+    assert graph.find_cyclic_components() == [['a']]
+    assert graph.enumerate_cycles(10) == [['a', 'a']]
+
+    chain = build({name: [next_name] for name, next_name in zip('abcde', 'bcdef')})
+    assert chain.find_cyclic_components() == []
+    assert chain.enumerate_cycles(10) == []
+
+
+def test_transitive_dependencies_match_reachability():
+    rng = random.Random(10)
+    for _ in range(200):
+        adjacency = random_graph(rng, rng.randint(1, 12), rng.randint(0, 24))
+        graph = build(adjacency)
+        # Запросы в случайном порядке: замыкания компонент берутся из общего кэша
+        names = list(adjacency)
+        rng.shuffle(names)
+        for name in names:
+            assert graph.transitive_dependencies(name) == reachable(adjacency, name)
+
+        # Новое ребро сбрасывает кэш замыканий
+        source, target = rng.choice(list(adjacency)), rng.choice(list(adjacency))
+        graph.add_dependency(source, target)
+        if target not in adjacency[source]:
+            adjacency[source].append(target)
+        for name in adjacency:
+            assert graph.transitive_dependencies(name) == reachable(adjacency, name)
+
+
+def test_reverse_index_matches_inverted_graph():
+    rng = random.Random(18)
+    for _ in range(200):
+        adjacency = random_graph(rng, rng.randint(1, 12), rng.randint(0, 24))
+        graph = build(adjacency)
+        # Повторное ребро не должно попадать в обратный индекс дважды
+        for package, dependencies in adjacency.items():
+            for dependency in dependencies[:1]:
+                graph.add_dependency(package, dependency)
+
+        for name in adjacency:
+            parents = sorted(package for package, dependencies in adjacency.items() if name in dependencies)
+            assert sorted(graph.reverse_dependencies(name)) == parents
+            assert graph.transitive_dependents(name) == {
+                package for package in adjacency if name in reachable(adjacency, package)}
+        assert graph.reverse_dependencies('missing') == []
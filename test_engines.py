@@ -0,0 +1,67 @@
+import random
+from collections import deque
+from typing import Dict, List
+
+from KONF2_3 import DependencyGraph
+from test_cycles import random_graph, reachable
+
+
+class DictFetcher:
+
+    def __init__(self, adjacency: Dict[str, List[str]]):
+        self.adjacency = adjacency
+
+    def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
+        return [{'name': name, 'version': '1.0', 'kind': 'normal'} for name in self.adjacency.get(package_name, [])]
+
+
+def distances(adjacency: Dict[str, List[str]], start: str) -> Dict[str, int]:
+    depths = {start: 0}
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        for child in adjacency[current]:
+            if child not in depths:
+                depths[child] = depths[current] + 1
+                queue.append(child)
+    return depths
+
+
+def run(engine: str, adjacency: Dict[str, List[str]], max_depth: int, jobs: int = 1) -> Dict:
+    graph = DependencyGraph()
+    build = graph.build_graph_bfs if engine == 'bfs' else graph.build_graph_dfs
+    result = build('n0', DictFetcher(adjacency), max_depth=max_depth, jobs=jobs)
+    result['graph'] = {package: sorted(dependencies) for package, dependencies in result['graph'].items()}
+    result['cyclic_components'] = {frozenset(component) for component in result['cyclic_components']}
+    result['visited'] = set(graph.visited)
+    return result
+
+
+def test_bfs_matches_dfs_without_depth_limit():
+    rng = random.Random(12)
+    for _ in range(150):
+        adjacency = random_graph(rng, rng.randint(1, 15), rng.randint(0, 35))
+        unbounded = len(adjacency) + 1
+        dfs = run('dfs', adjacency, unbounded)
+        for jobs in (1, 4):
+            bfs = run('bfs', adjacency, unbounded, jobs)
+            for key in ('graph', 'visited', 'packages_count', 'cyclic_components', 'transitive_dependencies'):
+                assert bfs[key] == dfs[key], key
+            # Глубина узла в BFS - длина кратчайшего пути от корня
+            assert bfs['node_depths'] == distances(adjacency, 'n0')
+
+        assert dfs['visited'] == reachable(adjacency, 'n0') | {'n0'}
+
+
+def test_bfs_depth_limit_uses_shortest_distance():
+    rng = random.Random(13)
+    for _ in range(150):
+        adjacency = random_graph(rng, rng.randint(1, 15), rng.randint(0, 35))
+        max_depth = rng.randint(1, 4)
+        depths = distances(adjacency, 'n0')
+
+        bfs = run('bfs', adjacency, max_depth)
+        assert bfs['visited'] == {name for name, depth in depths.items() if depth <= max_depth}
+        assert bfs['graph'] == {name: sorted(adjacency[name]) for name in bfs['visited'] if adjacency[name]}
+        # DFS может дойти до узла длинным путем и отсечь его раньше, но не находит лишнего
+        assert run('dfs', adjacency, max_depth)['visited'] <= bfs['visited']
@@ -0,0 +1,61 @@
+import os
+import re
+
+import pytest
+
+from cargo_export import CYCLE_COLOR, GraphExporter, export_graph, guess_format
+from test_cycles import build
+
+
+ADJACENCY = {'tokio': ['tokio-macros', 'mio'], 'tokio-macros': ['quote'], 'quote': ['proc-macro2'],
+             'proc-macro2': ['quote'], 'mio': []}
+
+
+def dot_edges(text: str):
+    return {(source, target) for source, target in re.findall(r'^  "([^"]+)" -> "([^"]+)"', text, re.M)}
+
+
+def test_formats_contain_every_edge(tmp_path):
+    graph = build(ADJACENCY)
+    expected = {(package, dependency) for package, dependencies in ADJACENCY.items() for dependency in dependencies}
+
+    for extension, export_format in (('.dot', 'dot'), ('.gv', 'dot'), ('.mmd', 'mermaid'), ('.puml', 'plantuml')):
+        path = str(tmp_path / ('graph' + extension))
+        assert guess_format(path) == export_format
+        export_graph(graph, path)
+        text = open(path, encoding='utf-8').read()
+        assert not os.path.exists(path + '.tmp')
+
+        if export_format == 'dot':
+            assert dot_edges(text) == expected
+        else:
+            # Узлы пронумерованы, ребра задаются номерами
+            arrow = '-->' if export_format == 'mermaid' else r'(?:-->|-\[[^\]]+\]->)'
+            numbered = re.findall(rf'n(\d+) {arrow} n(\d+)', text)
+            assert {(graph.names[int(a)], graph.names[int(b)]) for a, b in numbered} == expected
+
+
+def test_cycle_highlight_and_clusters(tmp_path):
+    graph = build(ADJACENCY)
+    path = str(tmp_path / 'graph.dot')
+
+    export_graph(graph, path, cluster='scc')
+    text = open(path, encoding='utf-8').read()
+    assert text.count('subgraph cluster_') == 1
+    assert f'"quote" -> "proc-macro2" [color="{CYCLE_COLOR}", penwidth=2];' in text
+    assert '"tokio" -> "mio";' in text
+
+    export_graph(graph, path, cluster='prefix', highlight_cycles=False)
+    text = open(path, encoding='utf-8').read()
+    assert CYCLE_COLOR not in text
+    assert 'label="tokio"' in text and 'label="proc"' not in text
+
+    lines = ''.join(GraphExporter(graph).lines('mermaid'))
+    assert 'class n' in lines and 'linkStyle' in lines
+
+
+def test_failed_write_leaves_no_temporary_file(tmp_path):
+    path = str(tmp_path / 'graph.out')
+    with pytest.raises(ValueError, match='Неизвестный формат'):
+        export_graph(build(ADJACENCY), path, 'svgz')
+    assert os.listdir(tmp_path) == []
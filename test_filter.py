@@ -0,0 +1,93 @@
+import random
+import sys
+
+import pytest
+
+import KONF2_2
+import KONF2_3
+from cargo_filter import NameFilter, SubstringAutomaton
+
+
+def random_word(rng: random.Random, alphabet: str, length: int) -> str:
+    return ''.join(rng.choice(alphabet) for _ in range(length))
+
+
+def test_automaton_matches_substring_search():
+    rng = random.Random(11)
+    for _ in range(300):
+        # Маленький алфавит дает много пересекающихся и вложенных подстрок
+        patterns = [random_word(rng, 'abc-', rng.randint(1, 4)) for _ in range(rng.randint(1, 12))]
+        automaton = SubstringAutomaton(patterns)
+        for _ in range(30):
+            name = random_word(rng, 'abc-_', rng.randint(0, 15))
+            assert automaton.search(name) == any(pattern in name for pattern in patterns), (patterns, name)
+
+
+def test_name_filter_substrings_ignore_case():
+    rng = random.Random(12)
+    for _ in range(200):
+        patterns = [random_word(rng, 'aAbB', rng.randint(1, 3)) for _ in range(rng.randint(1, 6))]
+        name_filter = NameFilter(patterns)
+        for _ in range(20):
+            name = random_word(rng, 'aAbBc', rng.randint(0, 10))
+            expected = any(pattern.lower() in name.lower() for pattern in patterns)
+            assert name_filter.matches(name) == expected
+            # Повторная проверка берется из кэша и дает тот же ответ
+            assert name_filter.matches(name) == expected
+
+
+def test_glob_and_regex_patterns():
+    name_filter = NameFilter(['glob:serde_*', 're:^tokio-', 'log'])
+    assert name_filter.matches('serde_json')
+    assert name_filter.matches('SERDE_derive')
+    assert not name_filter.matches('my_serde_json')
+    assert name_filter.matches('tokio-util')
+    assert not name_filter.matches('tokio')
+    assert name_filter.matches('env_logger')
+    assert not name_filter.matches('rand')
+
+    # Маска без префикса распознается по символам *?[ и должна совпасть с именем целиком
+    assert NameFilter(['rand?']).matches('rand8')
+    assert not NameFilter(['rand?']).matches('rand')
+
+    with pytest.raises(ValueError, match='регулярное выражение'):
+        NameFilter(['re:('])
+
+
+def test_from_value_keeps_single_substring_behaviour():
+    assert NameFilter.from_value('Test').matches('my-test-crate')
+    assert not NameFilter.from_value(None)
+    assert not NameFilter.from_value(None).matches('anything')
+    name_filter = NameFilter(['a'])
+    assert NameFilter.from_value(name_filter) is name_filter
+
+
+def parse(module, monkeypatch, *options: str):
+    monkeypatch.setattr(sys, 'argv', ['prog', *options])
+    visualizer = module.DependencyGraphVisualizer()
+    args = visualizer.parse_arguments()
+    return args, visualizer.validate_arguments(args)
+
+
+def test_repeated_command_line_patterns(monkeypatch):
+    args, valid = parse(KONF2_3, monkeypatch, '--package', 'A', '--test-mode',
+                        '--exclude', 'serde', '--exclude', 're:^tok')
+    assert valid and args.exclude_filter == ['serde', 're:^tok']
+
+    args, valid = parse(KONF2_2, monkeypatch, '--package', 'app', '--repository', 'https://crates.io',
+                        '--filter', 'glob:serde*', '--filter', 'log')
+    assert valid and args.filter_substring == ['glob:serde*', 'log']
+
+    _, valid = parse(KONF2_3, monkeypatch, '--package', 'A', '--test-mode', '--exclude', 're:(')
+    assert not valid
+
+
+def test_repeated_exclude_in_traversal():
+    repository = {'A': ['serde', 'tokio-util', 'log'], 'serde': ['serde_derive'], 'log': ['cfg-if']}
+
+    class Fetcher:
+        def get_dependencies(self, package_name, version="latest"):
+            return [{'name': name, 'version': '1.0', 'kind': 'normal'} for name in repository.get(package_name, [])]
+
+    result = KONF2_3.DependencyGraph().build_graph_dfs('A', Fetcher(), exclude_filter=['serde', 're:^tokio-'])
+    assert result['graph'] == {'A': ['log'], 'log': ['cfg-if']}
@@ -0,0 +1,82 @@
+import json
+import random
+import struct
+
+import pytest
+
+from cargo_graphfile import (FORMAT_VERSION, HEADER, GraphFile, convert_json_repository, is_graph_file,
+                             write_graph_file)
+from KONF2_3 import BinaryRepositoryFetcher
+
+
+def random_repository(rng: random.Random) -> dict:
+    # Имена разной длины в UTF-8, в том числе пакеты, которые встречаются только как зависимости
+    names = [f"{rng.choice(['serde', 'tokio', 'пакет', 'z'])}-{i}" for i in range(rng.randint(1, 40))]
+    return {name: rng.sample(names, rng.randint(0, min(5, len(names))))
+            for name in names if rng.random() < 0.8}
+
+
+def test_round_trip(tmp_path):
+    rng = random.Random(14)
+    for attempt in range(30):
+        repository = random_repository(rng)
+        path = str(tmp_path / f"repo{attempt}.cgraph")
+        write_graph_file(path, repository)
+        assert is_graph_file(path)
+
+        graph_file = GraphFile(path)
+        names = set(repository) | {dep for deps in repository.values() for dep in deps}
+        assert len(graph_file) == len(names)
+        for name in names:
+            # Порядок зависимостей сохраняется
+            assert graph_file.dependencies(name) == repository.get(name, [])
+            assert graph_file.name(graph_file.find(name)) == name
+        assert graph_file.dependencies('missing') == []
+        assert graph_file.find('missing') is None
+        graph_file.close()
+
+
+def test_convert_json_layouts(tmp_path):
+    (tmp_path / 'plain.json').write_text(json.dumps({'A': ['B', 'C'], 'B': ['C']}), encoding='utf-8')
+    (tmp_path / 'packaged.json').write_text(json.dumps({'packages': [
+        {'name': 'A', 'dependencies': ['B', 'C']}, {'name': 'B', 'dependencies': ['C']}]}), encoding='utf-8')
+
+    for source in ('plain.json', 'packaged.json'):
+        target = str(tmp_path / (source + '.cgraph'))
+        assert convert_json_repository(str(tmp_path / source), target) == (2, 3)
+        fetcher = BinaryRepositoryFetcher(target)
+        assert [dep['name'] for dep in fetcher.get_dependencies('A')] == ['B', 'C']
+        assert fetcher.get_dependencies('C') == []
+        fetcher.graph_file.close()
+
+
+def test_wrong_magic_and_version(tmp_path):
+    path = tmp_path / 'repo.cgraph'
+    write_graph_file(str(path), {'A': ['B']})
+    data = path.read_bytes()
+
+    path.write_bytes(b'JSON' + data[4:])
+    assert not is_graph_file(str(path))
+    with pytest.raises(ValueError, match='не является бинарным графом'):
+        GraphFile(str(path))
+
+    path.write_bytes(data[:4] + struct.pack('<H', FORMAT_VERSION + 1) + data[6:])
+    with pytest.raises(ValueError, match='версия формата'):
+        GraphFile(str(path))
+
+
+def test_truncated_file(tmp_path):
+    path = tmp_path / 'repo.cgraph'
+    write_graph_file(str(path), {'serde': ['serde_derive', 'proc-macro2'], 'serde_derive': ['quote']})
+    data = path.read_bytes()
+
+    path.write_bytes(data[:HEADER.size - 1])
+    with pytest.raises(ValueError, match='слишком короткий'):
+        GraphFile(str(path))
+
+    # Любой обрез после заголовка, в том числе по границе секции, обнаруживается сразу;
+    # выравнивание после таблицы строк не нужно для чтения
+    for size in range(HEADER.size, len(data.rstrip(b'\0'))):
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError, match='поврежден'):
+            GraphFile(str(path))
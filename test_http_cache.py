@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+import json
+import os
+import time
+import urllib.error
+
+import pytest
+
+from cargo_http import HttpCache, HttpClient
+from cargo_mock_registry import MockRegistry
+
+
+@contextmanager
+def serve():
+    # Локальная замена crates.io отвечает с ETag и 304 на условные запросы
+    registry = MockRegistry({'serde': {'1.0.0': []}})
+    base_url = registry.start()
+    try:
+        yield registry, f"{base_url}/api/v1/crates"
+    finally:
+        registry.stop()
+
+
+def test_fresh_entry_is_served_from_disk(tmp_path):
+    with serve() as (registry, api_url):
+        client = HttpClient(HttpCache(str(tmp_path), ttl=3600))
+        first = client.get_json(f"{api_url}/serde", 'serde')
+        assert client.get_json(f"{api_url}/serde", 'serde') == first
+        assert registry.stats['requests'] == 1
+
+        # Новый процесс с тем же каталогом тоже не обращается к сети
+        assert HttpClient(HttpCache(str(tmp_path))).get_json(f"{api_url}/serde", 'serde') == first
+        assert registry.stats['requests'] == 1
+
+
+def test_expired_entry_is_revalidated(tmp_path):
+    with serve() as (registry, api_url):
+        cache = HttpCache(str(tmp_path), ttl=0)
+        client = HttpClient(cache)
+        first = client.get_json(f"{api_url}/serde", 'serde')
+        fetched_at = cache.get('serde')[1]['fetched_at']
+
+        time.sleep(0.01)
+        assert client.get_json(f"{api_url}/serde", 'serde') == first
+        assert (registry.stats['requests'], registry.stats['not_modified']) == (2, 1)
+        # Ответ 304 продлевает запись, не переписывая тело
+        assert cache.get('serde')[1]['fetched_at'] > fetched_at
+
+        # Изменившийся документ приходит целиком и заменяет запись в кэше
+        registry.dataset['serde']['1.0.1'] = []
+        assert client.get_json(f"{api_url}/serde", 'serde')['crate']['max_version'] == '1.0.1'
+        assert (registry.stats['requests'], registry.stats['not_modified']) == (3, 1)
+        assert json.loads(cache.get('serde')[0])['crate']['max_version'] == '1.0.1'
+
+
+def test_offline_mode(tmp_path):
+    with serve() as (registry, api_url):
+        HttpClient(HttpCache(str(tmp_path))).get(f"{api_url}/serde", 'serde')
+
+        # Без сети используется даже устаревшая запись, а промах - ошибка
+        client = HttpClient(HttpCache(str(tmp_path), ttl=0), offline=True)
+        assert json.loads(client.get(f"{api_url}/serde", 'serde'))['crate']['name'] == 'serde'
+        with pytest.raises(urllib.error.URLError):
+            client.get(f"{api_url}/tokio", 'tokio')
+        assert registry.stats['requests'] == 1
+
+
+def test_lru_eviction(tmp_path):
+    cache = HttpCache(str(tmp_path), max_size=3000)
+    for name in ('a', 'b', 'c'):
+        cache.store(name, b'x' * 900)
+    # Чтение переносит запись в конец очереди на удаление
+    assert cache.get('a') is not None
+
+    cache.store('d', b'x' * 900)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('d') is not None
+    assert cache.total_size <= 3000
+    assert sorted(name for name in os.listdir(tmp_path) if name.endswith('.body')) == ['a.body', 'c.body', 'd.body']
@@ -0,0 +1,68 @@
+import json
+import os
+import random
+import subprocess
+import sys
+from typing import Dict, List
+
+from KONF2_3 import DependencyGraph
+
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'KONF2_3.py')
+
+
+class DictFetcher:
+
+    def __init__(self, repository: Dict[str, List[str]]):
+        self.repository = repository
+
+    def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
+        return [{'name': name, 'version': '1.0', 'kind': 'normal'}
+                for name in self.repository.get(package_name, [])]
+
+
+def random_repository(rng: random.Random, packages: int, edges: int) -> Dict[str, List[str]]:
+    names = [f"P{i}" for i in range(packages)]
+    repository: Dict[str, List[str]] = {name: [] for name in names}
+    for _ in range(edges):
+        source, target = rng.choice(names), rng.choice(names)
+        if target not in repository[source]:
+            repository[source].append(target)
+    return repository
+
+
+def build(repository: Dict[str, List[str]], jobs: int, max_depth: int, exclude: str = None) -> Dict:
+    result = DependencyGraph().build_graph_dfs('P0', DictFetcher(repository), max_depth=max_depth,
+                                               exclude_filter=exclude, jobs=jobs)
+    result['graph'] = {package: sorted(dependencies) for package, dependencies in result['graph'].items()}
+    return result
+
+
+def test_jobs_match_sequential_traversal():
+    rng = random.Random(1)
+    for _ in range(60):
+        repository = random_repository(rng, rng.randint(1, 30), rng.randint(0, 80))
+        max_depth = rng.randint(1, 6)
+        exclude = rng.choice([None, '1', 'P2'])
+
+        expected = build(repository, 1, max_depth, exclude)
+        for jobs in (2, 8):
+            assert build(repository, jobs, max_depth, exclude) == expected
+
+
+def run_cli(tmp_path, *options: str) -> List[str]:
+    output = subprocess.run([sys.executable, SCRIPT, *options], cwd=tmp_path, capture_output=True,
+                            text=True, encoding='utf-8', timeout=60, check=True).stdout
+    # Строка конфигурации с числом потоков - единственное ожидаемое отличие
+    return [line for line in output.splitlines() if not line.startswith('Параллельные запросы')]
+
+
+def test_cli_output_does_not_depend_on_jobs(tmp_path):
+    repository = random_repository(random.Random(11), 40, 120)
+    repository['A'] = ['P0', 'P1']
+    # Скрипт создает свой test_repo.json, только если такого файла еще нет
+    (tmp_path / 'test_repo.json').write_text(json.dumps(repository), encoding='utf-8')
+
+    options = ['--package', 'A', '--file-repo', 'test_repo.json', '--test-mode', '--max-depth', '5']
+    expected = run_cli(tmp_path, *options, '--jobs', '1')
+    assert run_cli(tmp_path, *options, '--jobs', '4') == expected
@@ -0,0 +1,113 @@
+import io
+import json
+import random
+
+import pytest
+
+from cargo_jsonstream import JsonFormatError, JsonStreamReader, iter_repository, read_entry
+import KONF2_3
+
+
+def entries(text: str, chunk_size: int = 64 * 1024):
+    return list(iter_repository(io.BytesIO(text.encode('utf-8')), chunk_size))
+
+
+def random_repository(rng: random.Random) -> dict:
+    # Юникод, экранирование и длинные имена проверяют границы буфера и подсчет байтов
+    alphabet = ['a', 'б', '"', '\\', '✓', 'x' * 20, '\n']
+    names = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 6))) + str(i)
+             for i in range(rng.randint(0, 25))]
+    return {name: rng.sample(names, rng.randint(0, min(4, len(names)))) for name in names}
+
+
+def layouts(repository: dict):
+    yield json.dumps(repository, ensure_ascii=False, indent=2), False
+    yield json.dumps({'packages': [{'name': name, 'dependencies': deps} for name, deps in repository.items()],
+                      'version': 1}, ensure_ascii=False), True
+
+
+def test_both_layouts_at_every_chunk_size():
+    rng = random.Random(15)
+    for _ in range(40):
+        repository = random_repository(rng)
+        for text, packaged in layouts(repository):
+            data = text.encode('utf-8')
+            for chunk_size in (1, 2, 3, 7, 64, 4096):
+                found = list(iter_repository(io.BytesIO(data), chunk_size))
+                assert [(name, deps) for name, deps, _, _ in found] == list(repository.items())
+                assert all(flag == packaged for _, _, _, flag in found)
+
+                # Смещение в байтах указывает на значение пакета, которое читается отдельно
+                stream = io.BytesIO(data)
+                for name, deps, offset, flag in found:
+                    assert read_entry(stream, name, offset, flag) == deps
+
+
+def test_layout_is_decided_by_first_key():
+    # Пакет с именем "packages" в простом формате - обычная запись
+    assert [entry[:2] for entry in entries('{"A": ["packages"], "packages": ["A"]}')] == [
+        ('A', ['packages']), ('packages', ['A'])]
+    # Записи выдаются сразу, до конца файла: ошибка в хвосте не задерживает первые пакеты
+    stream = iter_repository(io.BytesIO(b'{"A": ["B"], "B": 1}'))
+    assert next(stream)[:2] == ('A', ['B'])
+    with pytest.raises(JsonFormatError, match="'B'"):
+        next(stream)
+
+    with pytest.raises(JsonFormatError, match="'name'"):
+        entries('{"packages": [{"dependencies": []}]}')
+    assert entries('{}') == []
+    assert entries('{"packages": []}') == []
+
+
+def test_numbers_and_strings_split_across_chunks():
+    for chunk_size in range(1, 12):
+        reader = JsonStreamReader(io.BytesIO(b'[12345678, "\\u0431\xd0\xb1", -1.5e10]'), chunk_size)
+        values = []
+        for _ in reader.iter_array():
+            values.append(reader.value())
+        reader.finish()
+        assert values == [12345678, 'бб', -1.5e10]
+
+
+@pytest.mark.parametrize('text, message, line, column', [
+    ('{\n  "A": ["B"]\n  "B": []\n}', "Ожидается ','", 3, 3),
+    ('{"A": ["B",]}', 'Некорректный JSON', 1, 12),
+    ('{"A": ["B"]', 'Неожиданный конец файла', 1, 12),
+    ('{"б": ["в"]}\n{}', 'Лишние данные', 2, 1),
+    ('{"A": ["B"],\n "C": [1]}', "'C'", 2, 7),
+    ('[]', "Ожидается '{'", 1, 1),
+])
+def test_error_location(text, message, line, column):
+    for chunk_size in (1, 5, 4096):
+        with pytest.raises(JsonFormatError, match=message) as error:
+            entries(text, chunk_size)
+        assert (error.value.line, error.value.column) == (line, column)
+        assert f"строка {line}, столбец {column}" in str(error.value)
+
+
+def test_invalid_utf8_is_reported():
+    with pytest.raises(JsonFormatError, match='UTF-8'):
+        list(iter_repository(io.BytesIO(b'{"A": ["\xff"]}')))
+
+
+def test_fetcher_modes(tmp_path):
+    path = tmp_path / 'repo.json'
+    path.write_text(json.dumps({'packages': [{'name': 'A', 'dependencies': ['B']}, {'name': 'B'}]}),
+                    encoding='utf-8')
+
+    for lazy in (False, True):
+        fetcher = KONF2_3.TestRepositoryFetcher(str(path), lazy)
+        assert [dep['name'] for dep in fetcher.get_dependencies('A')] == ['B']
+        assert fetcher.get_dependencies('B') == [] and fetcher.get_dependencies('Z') == []
+        fetcher.close()
+
+    # Ошибка формата не подменяется примерным репозиторием
+    path.write_text('{"A": ["B"', encoding='utf-8')
+    with pytest.raises(JsonFormatError):
+        KONF2_3.TestRepositoryFetcher(str(path))
+
+    # Без файла примерный репозиторий допустим только при полной загрузке
+    missing = str(tmp_path / 'missing.json')
+    assert KONF2_3.TestRepositoryFetcher(missing).get_dependencies('A')
+    with pytest.raises(ValueError, match='не найден'):
+        KONF2_3.TestRepositoryFetcher(missing, lazy=True)
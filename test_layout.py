@@ -0,0 +1,108 @@
+import io
+import random
+import sys
+import xml.etree.ElementTree as ElementTree
+
+import cargo_layout
+import KONF2_3
+from cargo_layout import LayeredLayout, render_layout
+from test_cycles import build, random_graph
+
+
+def dag(rng: random.Random, nodes: int, edges: int) -> dict:
+    # Ребра только от меньшего номера к большему, плюс несколько обратных для циклов
+    adjacency = {f"n{i}": [] for i in range(nodes)}
+    for _ in range(edges):
+        source, target = sorted(rng.sample(range(nodes), 2)) if nodes > 1 else (0, 0)
+        if rng.random() < 0.05:
+            source, target = target, source
+        if f"n{target}" not in adjacency[f"n{source}"]:
+            adjacency[f"n{source}"].append(f"n{target}")
+    return adjacency
+
+
+def check_layout(graph, layout: LayeredLayout):
+    component_of = graph.component_of
+    edges = {(package_id, dependency_id) for package_id, dependencies in graph.adjacency.items()
+             for dependency_id in dependencies}
+
+    # Ребро между разными компонентами всегда идет вниз хотя бы на один слой
+    for package_id, dependency_id in edges:
+        if component_of[package_id] != component_of[dependency_id]:
+            assert layout.layer[dependency_id] > layout.layer[package_id]
+
+    drawn = []
+    for chain, _ in layout.chains:
+        drawn.append((chain[0], chain[-1]))
+        # Фиктивные узлы стоят на каждом промежуточном слое, без пропусков
+        if len(chain) > 2 or layout.layer[chain[-1]] > layout.layer[chain[0]]:
+            assert [layout.layer[node] for node in chain] == list(
+                range(layout.layer[chain[0]], layout.layer[chain[-1]] + 1))
+        else:
+            assert component_of[chain[0]] == component_of[chain[-1]]
+    for package_id, dependency_id, _ in layout.routed:
+        drawn.append((package_id, dependency_id))
+        assert layout.layer[dependency_id] - layout.layer[package_id] > layout.max_span
+
+    # Каждое ребро нарисовано ровно один раз
+    assert sorted(drawn) == sorted(edges)
+    for nodes in layout.layers:
+        assert len({layout.layer[node] for node in nodes}) <= 1
+
+
+def test_layers_point_down():
+    rng = random.Random(21)
+    for attempt in range(100):
+        adjacency = random_graph(rng, rng.randint(1, 15), rng.randint(0, 30)) if attempt % 2 else \
+            dag(rng, rng.randint(1, 40), rng.randint(0, 80))
+        graph = build(adjacency)
+        check_layout(graph, LayeredLayout(graph, rng.randint(0, 4)).run())
+
+
+def test_long_edges_beyond_budget_are_routed(monkeypatch):
+    # Цепочка с ребрами от корня ко всем узлам: суммарная длина растет квадратично
+    chain = {f"n{i}": [f"n{i + 1}"] + ([f"n{j}" for j in range(2, 60)] if i == 0 else []) for i in range(59)}
+    graph = build(chain)
+
+    layout = LayeredLayout(graph).run()
+    assert not layout.routed and layout.max_span == 59
+
+    monkeypatch.setattr(cargo_layout, 'DUMMY_BUDGET_MIN', 100)
+    monkeypatch.setattr(cargo_layout, 'DUMMY_BUDGET_PER_NODE', 0)
+    graph = build(chain)
+    layout = LayeredLayout(graph).run()
+    assert layout.routed and len(layout.layer) - layout.node_count <= 100
+    check_layout(graph, layout)
+
+    # Обходные ребра рисуются слева от всех узлов
+    svg = io.StringIO()
+    svg.writelines(layout.svg_lines())
+    root = ElementTree.fromstring(svg.getvalue())
+    left = min(layout.x[node] - layout.width[node] / 2 for node in range(layout.node_count))
+    assert layout.channel_width and left >= cargo_layout.MARGIN + layout.channel_width
+    assert len(root.findall('.//{http://www.w3.org/2000/svg}polyline')) == sum(map(len, chain.values()))
+
+
+def test_rendered_documents_are_well_formed():
+    graph = build({'a': ['b', 'c'], 'b': ['c', 'a'], 'c': ['<d&>']})
+    for export_format in ('svg', 'html'):
+        out = io.StringIO()
+        render_layout(graph, out, export_format)
+        text = out.getvalue()
+        if export_format == 'html':
+            text = text[text.index('<svg'):text.index('</svg>') + len('</svg>')]
+        root = ElementTree.fromstring(text)
+        titles = [element.text for element in root.iter('{http://www.w3.org/2000/svg}title')]
+        assert sorted(titles) == ['<d&>', 'a', 'b', 'c']
+
+
+def test_text_export_options_are_rejected_for_layouts(monkeypatch):
+    def validate(*options: str) -> bool:
+        monkeypatch.setattr(sys, 'argv', ['prog', '--package', 'A', '--test-mode', *options])
+        visualizer = KONF2_3.DependencyGraphVisualizer()
+        return visualizer.validate_arguments(visualizer.parse_arguments())
+
+    assert validate('--export', 'graph.svg')
+    assert validate('--export', 'graph.dot', '--cluster', 'scc', '--no-cycle-highlight')
+    assert not validate('--export', 'graph.svg', '--cluster', 'scc')
+    assert not validate('--export', 'graph.out', '--export-format', 'html', '--no-cycle-highlight')
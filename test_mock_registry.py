@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+import urllib.error
+
+import pytest
+
+from KONF2_3 import CargoDependencyFetcher, DependencyGraph, SparseIndexFetcher
+from cargo_http import ConnectionPool, HttpClient, RequestScheduler
+from cargo_mock_registry import MockRegistry, dataset_from_repository
+
+
+REPOSITORY = {
+    'app': {'1.0.0': [{'name': 'serde', 'req': '^1.0'}, {'name': 'log', 'req': '^0.4'}]},
+    'serde': {'0.9.0': [], '1.0.0': [], '1.0.1': [{'name': 'serde_derive', 'req': '=1.0.1'}]},
+    'serde_derive': {'1.0.1': []},
+    'log': {'0.4.0': ['serde']},
+}
+
+
+@contextmanager
+def serve(**options):
+    registry = MockRegistry(dataset_from_repository(REPOSITORY), **options)
+    base_url = registry.start()
+    try:
+        yield registry, base_url
+    finally:
+        registry.stop()
+
+
+def direct_client() -> HttpClient:
+    # Без повторов: проверяются ответы самого реестра, а не планировщика запросов
+    pool = ConnectionPool()
+    return HttpClient(pool=pool, scheduler=RequestScheduler(pool, max_retries=0))
+
+
+def test_api_and_sparse_index_give_the_same_graph():
+    with serve() as (registry, base_url):
+        graphs = []
+        for fetcher in (CargoDependencyFetcher(HttpClient(), f"{base_url}/api/v1/crates"),
+                        SparseIndexFetcher(f"sparse+{base_url}/index/", HttpClient())):
+            graph = DependencyGraph()
+            graph.build_graph_dfs('app', fetcher)
+            graphs.append({package: sorted(dependencies) for package, dependencies in graph.graph.items()})
+        assert registry.reset_stats()['errors'] == 0
+
+    assert graphs[0] == graphs[1]
+    assert graphs[0]['app@1.0.0'] == ['log@0.4.0', 'serde@1.0.1']
+    assert graphs[0]['log@0.4.0'] == ['serde@1.0.1']
+    assert graphs[0]['serde@1.0.1'] == ['serde_derive@1.0.1']
+
+
+def test_injected_errors_are_http_500():
+    with serve(error_rate=1.0) as (registry, base_url):
+        fetcher = CargoDependencyFetcher(direct_client(), f"{base_url}/api/v1/crates")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            fetcher.get_dependencies('serde', '1.0.1')
+        assert error.value.code == 500
+        # Сбой последней версии - ошибка обхода, а не пакет без зависимостей; повторно не запрашивается
+        for _ in range(2):
+            with pytest.raises(urllib.error.HTTPError):
+                fetcher.get_dependencies('app')
+        assert registry.reset_stats()['errors'] == 2
+
+
+def test_error_rate_is_reproducible():
+    outcomes = []
+    for _ in range(2):
+        with serve(error_rate=0.4, seed=7) as (registry, base_url):
+            client = direct_client()
+            run = []
+            for _ in range(50):
+                try:
+                    client.get(f"{base_url}/api/v1/crates/serde")
+                    run.append(True)
+                except urllib.error.HTTPError as e:
+                    assert e.code == 500
+                    run.append(False)
+            stats = registry.reset_stats()
+        assert stats['ok'] == run.count(True) and stats['errors'] == run.count(False)
+        outcomes.append(run)
+
+    # Ошибки внедряются по зерну генератора: одинаковые запуски дают одинаковую картину
+    assert outcomes[0] == outcomes[1]
+    assert 5 < outcomes[0].count(False) < 35
+
+
+def test_rate_limit_answers_429_with_retry_after():
+    with serve(rate_limit=0.5, burst=2) as (registry, base_url):
+        client = direct_client()
+        for _ in range(2):
+            client.get(f"{base_url}/api/v1/crates/serde")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            client.get(f"{base_url}/api/v1/crates/serde")
+        assert error.value.code == 429
+        assert int(error.value.headers['Retry-After']) >= 1
+        stats = registry.reset_stats()
+        assert (stats['ok'], stats['rate_limited']) == (2, 1)
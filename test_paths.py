@@ -0,0 +1,97 @@
+from collections import deque
+import random
+from typing import Dict, List
+
+from test_cycles import build, random_graph
+
+
+def brute_force_paths(adjacency: Dict[str, List[str]], source: str, target: str) -> List[List[str]]:
+    # Все простые пути от source до target
+    paths = []
+
+    def extend(path: List[str]):
+        if path[-1] == target:
+            paths.append(path)
+            return
+        for child in adjacency.get(path[-1], []):
+            if child not in path:
+                extend(path + [child])
+
+    extend([source])
+    return paths
+
+
+def assert_is_path(adjacency: Dict[str, List[str]], path: List[str], source: str, target: str):
+    assert path[0] == source and path[-1] == target
+    assert len(set(path)) == len(path)
+    for parent, child in zip(path, path[1:]):
+        assert child in adjacency[parent], (parent, child)
+
+
+def test_k_shortest_paths_match_brute_force():
+    rng = random.Random(19)
+    for _ in range(300):
+        adjacency = random_graph(rng, rng.randint(2, 7), rng.randint(0, 18))
+        graph = build(adjacency)
+        names = sorted(adjacency)
+        source, target = rng.choice(names), rng.choice(names)
+        if source not in graph.ids or target not in graph.ids:
+            continue
+
+        expected = sorted(len(path) for path in brute_force_paths(adjacency, source, target))
+        k = rng.randint(1, 8)
+        found = graph.k_shortest_paths(source, target, k)
+
+        for path in found:
+            assert_is_path(adjacency, path, source, target)
+        assert len({tuple(path) for path in found}) == len(found)
+        # Пути выдаются по неубыванию длины, и это ровно k кратчайших
+        assert [len(path) for path in found] == expected[:k]
+
+
+def test_shortest_path_matches_bfs():
+    rng = random.Random(91)
+    for _ in range(200):
+        adjacency = random_graph(rng, rng.randint(2, 9), rng.randint(0, 20))
+        graph = build(adjacency)
+        names = sorted(name for name in adjacency if name in graph.ids)
+        if not names:
+            continue
+        source, target = rng.choice(names), rng.choice(names)
+
+        # Число узлов кратчайшего пути обычным поиском в ширину
+        depth = {source: 1}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for child in adjacency[node]:
+                if child not in depth:
+                    depth[child] = depth[node] + 1
+                    queue.append(child)
+
+        path = graph.shortest_path(source, target)
+        if target not in depth:
+            assert path is None
+        else:
+            assert_is_path(adjacency, path, source, target)
+            assert len(path) == depth[target]
+
+
+def test_paths_between_package_versions():
+    # Без версии имени пакета соответствуют все его узлы вида пакет@версия
+    graph = build({'app': ['serde@1.0.0', 'log@0.4.0'], 'log@0.4.0': ['serde@1.0.1'],
+                   'serde@1.0.0': [], 'serde@1.0.1': []})
+
+    class Resolver:
+        def resolve(self, package_name: str, requirement: str) -> str:
+            return requirement
+
+    # Узлы с версиями регистрируются так же, как при обходе
+    for node in ('serde@1.0.0', 'serde@1.0.1', 'log@0.4.0'):
+        graph.resolve_node(Resolver(), *node.split('@'), 'latest')
+
+    assert graph.shortest_path('app', 'serde') == ['app', 'serde@1.0.0']
+    assert graph.k_shortest_paths('app', 'serde', 5) == [['app', 'serde@1.0.0'],
+                                                         ['app', 'log@0.4.0', 'serde@1.0.1']]
+    assert graph.k_shortest_paths('serde', 'app', 3) == []
+    assert graph.shortest_path('app', 'tokio') is None
@@ -0,0 +1,41 @@
+import json
+import sys
+
+import KONF2_3
+
+
+def test_profile_writes_chrome_trace(tmp_path, monkeypatch):
+    repository = {'A': ['B', 'C'], 'B': ['D'], 'C': ['D', 'A'], 'D': []}
+    (tmp_path / 'repo.json').write_text(json.dumps(repository), encoding='utf-8')
+    trace_path = tmp_path / 'trace.json'
+    monkeypatch.setattr(sys, 'argv', ['prog', '--package', 'A', '--test-mode',
+                                      '--file-repo', str(tmp_path / 'repo.json'),
+                                      '--jobs', '2', '--profile', str(trace_path)])
+    KONF2_3.DependencyGraphVisualizer().run()
+
+    trace = json.loads(trace_path.read_text(encoding='utf-8'))
+    events = trace['traceEvents']
+    assert events
+
+    open_events = {}
+    for event in events:
+        assert isinstance(event['name'], str) and event['name']
+        assert isinstance(event['pid'], int) and isinstance(event['tid'], int)
+        assert event['ts'] >= 0
+        if event['ph'] == 'X':
+            assert event['dur'] >= 0
+        else:
+            # Парные события начала и конца должны закрываться в том же потоке
+            assert event['ph'] in ('B', 'E'), event
+            stack = open_events.setdefault(event['tid'], [])
+            if event['ph'] == 'B':
+                stack.append(event)
+            else:
+                assert stack and stack.pop()['ts'] <= event['ts']
+    assert not any(open_events.values())
+
+    # Загружен каждый пакет, и сводка в трассе совпадает с событиями
+    fetched = sorted(event['name'] for event in events if event['cat'] == 'fetch')
+    assert fetched == ['A@latest', 'B@latest', 'C@latest', 'D@latest']
+    assert trace['otherData']['summary']['fetch']['count'] == len(fetched)
+    assert {event['name'] for event in events if event['cat'] == 'phase'} >= {'открытие источника', 'обход графа'}
@@ -0,0 +1,121 @@
+from contextlib import contextmanager
+import threading
+import time
+import urllib.error
+
+import pytest
+
+from cargo_http import ConnectionPool, HttpClient, RequestScheduler, parse_retry_after
+from cargo_mock_registry import MockRegistry
+
+
+DATASET = {f"crate{i}": {'1.0.0': [], '1.1.0': [{'name': 'serde', 'req': '^1', 'kind': 'normal'}]}
+           for i in range(20)}
+
+
+@contextmanager
+def serve(**options):
+    # Реестр-заглушка и клиент с короткой задержкой повторов, чтобы тесты шли быстро
+    registry = MockRegistry(DATASET, **options)
+    base_url = registry.start()
+    pool = ConnectionPool(4)
+    scheduler = RequestScheduler(pool, backoff=0.01, max_backoff=0.05, seed=25)
+    try:
+        yield registry, HttpClient(pool=pool, scheduler=scheduler), base_url
+    finally:
+        pool.close()
+        registry.stop()
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(' 0 ') == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('') is None
+    assert parse_retry_after('soon') is None
+    # HTTP-дата в прошлом - ждать не нужно
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    future = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(time.time() + 60))
+    assert 50 < parse_retry_after(future) <= 60
+
+
+def test_injected_errors_are_retried():
+    with serve(error_rate=0.4, seed=7) as (registry, client, base_url):
+        client.scheduler.max_retries = 10
+        for name in DATASET:
+            assert client.get_json(f"{base_url}/api/v1/crates/{name}")['crate']['name'] == name
+
+        stats = registry.reset_stats()
+        assert stats['errors'] > 0
+        assert stats['ok'] == len(DATASET)
+        assert client.scheduler.stats['retries'] == stats['errors']
+        assert client.scheduler.stats['requests'] == stats['requests']
+
+
+def test_retries_exhausted():
+    with serve(error_rate=1.0) as (registry, client, base_url):
+        client.scheduler.max_retries = 2
+        with pytest.raises(urllib.error.HTTPError) as error:
+            client.get(f"{base_url}/api/v1/crates/crate0")
+        assert error.value.code == 500
+        # Первая попытка и два повтора
+        assert registry.reset_stats()['requests'] == 3
+
+
+def test_not_found_is_not_retried():
+    with serve() as (registry, client, base_url):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            client.get(f"{base_url}/api/v1/crates/missing")
+        assert error.value.code == 404
+        assert registry.reset_stats()['requests'] == 1
+        assert client.scheduler.stats['retries'] == 0
+
+
+def test_retry_after_is_honored():
+    with serve(rate_limit=1, burst=1) as (registry, client, base_url):
+        client.get(f"{base_url}/api/v1/crates/crate0")
+
+        start = time.monotonic()
+        client.get(f"{base_url}/api/v1/crates/crate1")
+        elapsed = time.monotonic() - start
+
+        stats = registry.reset_stats()
+        assert stats['rate_limited'] == 1
+        assert client.scheduler.stats['throttled'] == 1
+        # Повтор выполнен не раньше, чем разрешил Retry-After: 1
+        assert elapsed >= 0.9
+        assert client.scheduler.limiter.paused_until > 0
+
+
+def test_retry_after_longer_than_max_wait_fails():
+    with serve(rate_limit=0.2, burst=1) as (registry, client, base_url):
+        client.scheduler.max_wait = 0.5
+        client.get(f"{base_url}/api/v1/crates/crate0")
+
+        start = time.monotonic()
+        with pytest.raises(urllib.error.HTTPError) as error:
+            client.get(f"{base_url}/api/v1/crates/crate1")
+        assert error.value.code == 429
+        assert time.monotonic() - start < 0.5
+        assert client.scheduler.stats['retries'] == 0
+
+
+def test_concurrent_requests_are_coalesced():
+    with serve(latency=0.2) as (registry, client, base_url):
+        barrier = threading.Barrier(20)
+        results = []
+
+        def fetch():
+            barrier.wait()
+            results.append(client.get_json(f"{base_url}/api/v1/crates/crate3"))
+
+        threads = [threading.Thread(target=fetch) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(results) == 20
+        assert all(result == results[0] for result in results)
+        assert registry.reset_stats()['requests'] == 1
+        assert client.scheduler.stats['coalesced'] == 19
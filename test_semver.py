@@ -0,0 +1,103 @@
+from cargo_semver import VersionIndex, VersionResolver, compile_requirement, parse_version
+
+
+VERSIONS = ['0.1.0', '0.2.3', '0.2.9', '0.3.0', '1.0.0', '1.2.3', '1.2.9', '1.3.0',
+            '1.9.9', '2.0.0-alpha.1', '2.0.0', '2.1.0-rc.1']
+
+
+def matching(requirement: str):
+    return VersionIndex(VERSIONS).max_satisfying(requirement)
+
+
+def test_parse_version_orders_prerelease_before_release():
+    assert parse_version('1.0.0-alpha') < parse_version('1.0.0-alpha.1') < parse_version('1.0.0-beta')
+    assert parse_version('1.0.0-beta.2') < parse_version('1.0.0-beta.11') < parse_version('1.0.0')
+    assert parse_version('1.0.0+build.5') == parse_version('1.0.0')
+    assert parse_version('1.0') is None
+    assert parse_version('not-a-version') is None
+
+
+def test_caret_requirements():
+    # Cargo: требование без оператора - то же, что ^
+    assert matching('^1.2.3') == '1.9.9'
+    assert matching('1.2.3') == '1.9.9'
+    assert matching('^0.2.3') == '0.2.9'
+    assert matching('^0.3') == '0.3.0'
+    assert matching('^0.0.1') is None
+    assert matching('^3') is None
+
+
+def test_tilde_wildcard_and_exact_requirements():
+    assert matching('~1.2.3') == '1.2.9'
+    assert matching('~1') == '1.9.9'
+    assert matching('1.2.*') == '1.2.9'
+    assert matching('1.*') == '1.9.9'
+    assert matching('*') == '2.0.0'
+    assert matching('=1.2.3') == '1.2.3'
+    assert matching('=1.2.4') is None
+
+
+def test_comparison_ranges():
+    assert matching('>=1.0.0, <1.3.0') == '1.2.9'
+    assert matching('>1.2.3, <=1.3.0') == '1.3.0'
+    assert matching('<1.0.0') == '0.3.0'
+    assert matching('>2.0.0') is None
+
+
+def test_prerelease_only_when_requested():
+    assert matching('>=2.0.0-alpha.1') == '2.0.0'
+    assert matching('^2.1.0-rc.1') == '2.1.0-rc.1'
+    assert matching('>=2.0.0-alpha, <2.0.0') == '2.0.0-alpha.1'
+    assert VersionIndex(['1.0.0-beta.1']).max_satisfying('*') is None
+    # Буква x в pre-release - не подстановочный знак: требование остается ^1.0.0-x.1
+    prereleases = VersionIndex(['1.0.0-x.1', '1.0.0-x.2', '1.5.0'])
+    assert prereleases.max_satisfying('1.0.0-x.1') == '1.5.0'
+    assert prereleases.max_satisfying('1.0.0-a.1') == '1.5.0'
+    assert prereleases.max_satisfying('=1.0.0-x.1') == '1.0.0-x.1'
+    assert prereleases.max_satisfying('1.0.x') is None
+    assert prereleases.max_satisfying('1.x') == '1.5.0'
+
+
+def test_invalid_requirement():
+    assert compile_requirement('^x.y') is None
+    assert matching('^x.y') is None
+
+
+def test_matches_brute_force():
+    # Сравнение двоичного поиска с прямой проверкой границ по всем версиям
+    index = VersionIndex(VERSIONS)
+    for requirement in ['^1.2', '~0.2', '>=0.2.5, <1.2.5', '<=1.2.9', '>0.1.0, <0.3.0', '=2.0.0',
+                        '>=2.0.0-alpha.1', '>=2.1.0-alpha, <3']:
+        prerelease_versions, bounds = compile_requirement(requirement)
+        candidates = []
+        for version in VERSIONS:
+            key = parse_version(version)
+            if key[3] != 1 and key[:3] not in prerelease_versions:
+                continue
+            if all((op == '>=' and key >= bound) or (op == '>' and key > bound) or
+                   (op == '<' and key < bound) or (op == '<=' and key <= bound) for op, bound in bounds):
+                candidates.append(key)
+        expected = max(candidates) if candidates else None
+        found = index.max_satisfying(requirement)
+        assert (parse_version(found) if found else None) == expected, requirement
+
+
+def test_resolver_caches_index_and_failures():
+    class Source:
+        calls = 0
+
+        def get_versions(self, package_name):
+            Source.calls += 1
+            if package_name == 'broken':
+                raise OSError('нет соединения')
+            return ['1.0.0', '1.1.0']
+
+    resolver = VersionResolver(Source())
+    assert resolver.resolve('serde', '^1') == '1.1.0'
+    assert resolver.resolve('serde', '=1.0.0') == '1.0.0'
+    assert resolver.resolve('serde', '^2') is None
+    # Ошибка запоминается: пакет не запрашивается повторно до конца обхода
+    assert resolver.resolve('broken', '*') is None
+    assert resolver.resolve('broken', '^1') is None
+    assert Source.calls == 2
+    assert list(resolver.failures) == ['broken']
@@ -0,0 +1,82 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+import pytest
+
+from cargo_server import GraphService
+from KONF2_3 import CachingDependencyFetcher, DependencyGraph
+from test_snapshot import Registry
+
+
+REGISTRY = {
+    'app': {'1.0.0': [('serde', '^1'), ('log', '^0.4')]},
+    'tool': {'1.0.0': [('serde', '^0.9')]},
+    'log': {'0.4.0': [('serde', '^1')]},
+    'serde': {'0.9.0': [], '1.0.0': []},
+}
+
+
+def build():
+    graph = DependencyGraph()
+    results = graph.build_graph_batch(['app', 'tool'], CachingDependencyFetcher(Registry(REGISTRY)))
+    return graph, results
+
+
+@contextmanager
+def serve():
+    service = GraphService(build)
+    assert service.refresh()
+    server = service.create_server('127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def get(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_queries_on_versioned_graph():
+    with serve() as base_url:
+        status, payload = get(f"{base_url}/status")
+        assert status == 200 and payload['ready'] and payload['roots'] == ['app', 'tool']
+
+        # Имя без версии означает все версии пакета в графе
+        for package in ('app', 'app@1.0.0'):
+            status, payload = get(f"{base_url}/deps?package={package}")
+            assert status == 200 and sorted(payload['dependencies']) == ['log@0.4.0', 'serde@1.0.0']
+
+        status, payload = get(f"{base_url}/deps?package=tool&transitive=1")
+        assert payload['dependencies'] == ['serde@0.9.0']
+
+        status, payload = get(f"{base_url}/rdeps?package=serde")
+        assert status == 200 and payload['dependents'] == ['app@1.0.0', 'log@0.4.0', 'tool@1.0.0']
+        status, payload = get(f"{base_url}/rdeps?package=serde@0.9.0")
+        assert payload['dependents'] == ['tool@1.0.0']
+        status, payload = get(f"{base_url}/rdeps?package=serde@1.0.0&transitive=1")
+        assert payload['dependents'] == ['app@1.0.0', 'log@0.4.0']
+
+        status, payload = get(f"{base_url}/path?from=log&to=serde")
+        assert status == 200 and payload['path'] == ['log@0.4.0', 'serde@1.0.0']
+        status, payload = get(f"{base_url}/path?from=app&to=serde&k=3")
+        assert payload['paths'] == [['app@1.0.0', 'serde@1.0.0'], ['app@1.0.0', 'log@0.4.0', 'serde@1.0.0']]
+        status, payload = get(f"{base_url}/path?from=tool&to=log")
+        assert status == 200 and payload['path'] is None
+
+
+@pytest.mark.parametrize('query', ['/deps?package=missing', '/rdeps?package=serde@2.0.0',
+                                   '/path?from=app&to=missing', '/deps', '/unknown'])
+def test_unknown_packages_and_routes(query):
+    with serve() as base_url:
+        status, payload = get(base_url + query)
+        assert status == 404 and 'error' in payload
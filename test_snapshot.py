@@ -0,0 +1,85 @@
+from typing import Dict, List, Tuple
+
+from KONF2_3 import DependencyGraph, SnapshotFetcher
+
+
+class Registry:
+
+    # Источник с опубликованными версиями: пакет -> версия -> [(зависимость, требование)]
+    def __init__(self, packages: Dict[str, Dict[str, List[Tuple[str, str]]]]):
+        self.packages = packages
+        self.requests: List[Tuple[str, str]] = []
+
+    def get_versions(self, package_name: str) -> List[str]:
+        return list(self.packages.get(package_name, {}))
+
+    def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
+        self.requests.append((package_name, version))
+        return [{'name': name, 'version': requirement, 'kind': 'normal'}
+                for name, requirement in self.packages.get(package_name, {}).get(version, [])]
+
+
+class PlainRegistry:
+
+    # Источник без списка версий, как файловый тестовый репозиторий
+    def __init__(self, packages: Dict[str, List[str]]):
+        self.packages = packages
+        self.requests: List[str] = []
+
+    def get_dependencies(self, package_name: str, version: str = "latest") -> List[Dict[str, str]]:
+        self.requests.append(package_name)
+        return [{'name': name, 'version': '1.0', 'kind': 'normal'} for name in self.packages.get(package_name, [])]
+
+
+def build(fetcher, path: str, incremental: bool) -> Tuple[Dict, SnapshotFetcher]:
+    snapshot = DependencyGraph.load_snapshot(path) if incremental else None
+    snapshot_fetcher = SnapshotFetcher(fetcher, snapshot)
+    if snapshot:
+        snapshot_fetcher.detect_changes()
+
+    graph = DependencyGraph()
+    result = graph.build_graph_dfs('app', snapshot_fetcher)
+    graph.save_snapshot(path, {'package': 'app'}, snapshot_fetcher)
+    return {package: sorted(deps) for package, deps in result['graph'].items()}, snapshot_fetcher
+
+
+def test_incremental_build_fetches_only_changed_packages(tmp_path):
+    path = str(tmp_path / 'graph.json')
+    registry = Registry({
+        'app': {'1.0.0': [('serde', '^1'), ('log', '^0.4')]},
+        'serde': {'1.0.0': []},
+        'log': {'0.4.0': [('serde', '^1')]},
+    })
+    build(registry, path, incremental=False)
+
+    # Новая версия log с новой зависимостью; app и serde не менялись
+    registry.packages['log']['0.4.1'] = [('cfg-if', '^1')]
+    registry.packages['cfg-if'] = {'1.0.0': []}
+    registry.requests.clear()
+
+    graph, snapshot_fetcher = build(registry, path, incremental=True)
+    assert graph == {'app@1.0.0': ['log@0.4.1', 'serde@1.0.0'], 'log@0.4.1': ['cfg-if@1.0.0']}
+    assert sorted(registry.requests) == [('cfg-if', '1.0.0'), ('log', '0.4.1')]
+    assert (snapshot_fetcher.fetched, snapshot_fetcher.revalidated, snapshot_fetcher.reused) == (2, 0, 2)
+
+    # Без изменений в источнике зависимости заново не запрашиваются
+    registry.requests.clear()
+    _, snapshot_fetcher = build(registry, path, incremental=True)
+    assert registry.requests == []
+    assert (snapshot_fetcher.fetched, snapshot_fetcher.reused) == (0, 4)
+
+
+def test_plain_source_is_revalidated(tmp_path):
+    path = str(tmp_path / 'graph.json')
+    registry = PlainRegistry({'app': ['a', 'b'], 'a': ['c']})
+    build(registry, path, incremental=False)
+
+    registry.packages['b'] = ['d']
+    registry.requests.clear()
+    graph, snapshot_fetcher = build(registry, path, incremental=True)
+
+    assert graph == {'app': ['a', 'b'], 'a': ['c'], 'b': ['d']}
+    # Без списка версий изменение видно только по самим зависимостям: каждый пакет
+    # снимка запрашивается при проверке, и счетчик это отражает
+    assert sorted(registry.requests) == ['a', 'app', 'b', 'c', 'd']
+    assert (snapshot_fetcher.fetched, snapshot_fetcher.revalidated, snapshot_fetcher.reused) == (1, 4, 0)
@@ -0,0 +1,42 @@
+from collections import deque
+
+import pytest
+
+from cargo_synth import FANOUT_DISTRIBUTIONS, generate_synthetic
+from test_cycles import build
+
+
+def depths(repository: dict) -> dict:
+    # Длина кратчайшего пути от корня P0 до каждого пакета
+    depth = {'P0': 0}
+    queue = deque(['P0'])
+    while queue:
+        package = queue.popleft()
+        for dependency in repository[package]:
+            if dependency not in depth:
+                depth[dependency] = depth[package] + 1
+                queue.append(dependency)
+    return depth
+
+
+@pytest.mark.parametrize('distribution', FANOUT_DISTRIBUTIONS)
+def test_every_package_is_reachable_from_root(distribution):
+    repository = generate_synthetic(500, 12, 2.5, distribution, 0.05, seed=3)
+    assert len(repository) == 500
+    assert all(dependency in repository for dependencies in repository.values() for dependency in dependencies)
+    assert len(depths(repository)) == 500
+    assert generate_synthetic(500, 12, 2.5, distribution, 0.05, seed=3) == repository
+
+
+def test_levels_without_skips_give_exact_depth():
+    # Без ребер через уровень каждый путь от корня проходит все уровни подряд
+    repository = generate_synthetic(1000, 40, 2.0, skip_rate=0.0)
+    depth = depths(repository)
+    assert max(depth.values()) == 39
+    for package, dependencies in repository.items():
+        assert all(depth[dependency] == depth[package] + 1 for dependency in dependencies)
+
+
+def test_cycle_density_controls_cycles():
+    assert not build(generate_synthetic(300, 10, 3.0)).find_cyclic_components()
+    assert build(generate_synthetic(300, 10, 3.0, cycle_density=0.1)).find_cyclic_components()